@@ -13,11 +13,21 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    # Redis (optional): used for rate limiting when set, e.g. "redis://localhost:6379/0"
+    redis_url: str = ""
+
     # CORS
     cors_origins: List[str] = ["*"]
 
     # Server
     debug: bool = True
+    # Stripe /debug/* routes (collection setup, test subscriptions); off unless
+    # explicitly enabled with ENABLE_DEBUG_ROUTES=true
+    enable_debug_routes: bool = False
+
+    # File serving: when set (e.g. "/protected/uploads/documents/"), document files are
+    # handed to an internal Nginx location via X-Accel-Redirect instead of streamed by Python
+    x_accel_documents_prefix: str = ""
 
     # Feature Flags
     enable_gemini_3_pro_preview: bool = True
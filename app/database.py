@@ -1,7 +1,8 @@
 import os
 import sys
 import logging
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.errors import ServerSelectionTimeoutError
 from dotenv import load_dotenv
 
@@ -23,11 +24,72 @@ DB_NAME = os.getenv("MONGODB_DB", "Fleety_db")
 
 client = None
 db = None
+async_client = None
+async_db = None
+# URL the sync client actually connected to (Atlas or the local fallback)
+active_url = MONGODB_URL
+
+
+POSITION_RETENTION_SECONDS = 60 * 60 * 24 * 30
+
+
+# (collection, keys, options) for every index the app relies on. Built once
+# per connection here rather than in the model constructors, which run per request
+_INDEXES = [
+    ("contacts", [("user_id", ASCENDING), ("_id", DESCENDING)], {}),
+    ("documents", "vehicle_id", {}),
+    ("documents", "user_id", {}),
+    ("documents", [("user_id", ASCENDING), ("vehicle_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ("documents", [("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ("documents", [("user_id", ASCENDING), ("expiry_date", ASCENDING)],
+     {"partialFilterExpression": {"expiry_date": {"$exists": True}}}),
+    # Not unique: several document records may link the same stored file
+    ("documents", [("user_id", ASCENDING), ("content_hash", ASCENDING)], {}),
+    ("drivers", "user_id", {}),
+    ("drivers", "vehicle_id", {}),
+    ("drivers", [("user_id", ASCENDING), ("_id", DESCENDING)], {}),
+    ("drivers", [("user_id", ASCENDING), ("assigned_vehicles", ASCENDING)], {}),
+    ("vehicles", "user_id", {}),
+    ("fuel_logs", "user_id", {}),
+    ("fuel_logs", "vehicle_id", {}),
+    ("fuel_logs", [("vehicle_id", ASCENDING), ("date", DESCENDING)], {}),
+    ("maintenance", "vehicle_id", {}),
+    ("maintenance", "user_id", {}),
+    ("users", "email", {"unique": True}),
+    ("reminders", "user_id", {}),
+    ("reminders", [("vehicle_id", ASCENDING), ("user_id", ASCENDING)], {}),
+    ("public_contact_inquiries", [("email", ASCENDING), ("created_at", DESCENDING)], {}),
+    ("webhook_events", "event_id", {"unique": True}),
+    # Nearby search ($geoNear) and per-vehicle latest/history lookups
+    ("VehiclePositions", [("location", "2dsphere")], {}),
+    ("VehiclePositions", [("vehicleId", ASCENDING), ("timestamp", DESCENDING)], {}),
+    # Raw positions expire after 30 days (the history route's cap); the
+    # hourly archive kept by VehiclePosition.create_position has no TTL
+    ("VehiclePositions", "timestamp", {"expireAfterSeconds": POSITION_RETENTION_SECONDS}),
+    ("VehicleLatestPositions", "vehicleId", {"unique": True}),
+    # Nearby search runs against current positions: geohash prefixes for
+    # small radii, $geoNear for the rest
+    ("VehicleLatestPositions", [("location", "2dsphere")], {}),
+    ("VehicleLatestPositions", "geohash7", {}),
+    ("VehiclePositionsArchive", [("vehicleId", ASCENDING), ("hour", ASCENDING)], {"unique": True}),
+]
+
+
+def ensure_indexes(database):
+    """Create the indexes backing the app's queries (idempotent)"""
+    # Each index is guarded on its own so one failure (e.g. a unique index
+    # over existing duplicates) doesn't leave the rest unbuilt
+    for collection, keys, options in _INDEXES:
+        try:
+            database[collection].create_index(keys, **options)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not create index {collection} {keys}: {e}")
+
 
 # Lazy initialization - only connect when needed
 def _connect_to_database():
     """Internal function to establish database connection"""
-    global client, db
+    global client, db, active_url
     
     if db is not None:
         return db  # Already connected
@@ -46,6 +108,7 @@ def _connect_to_database():
         client.admin.command("ping")
         logger.info("✅ MongoDB Atlas connected successfully")
         db = client[DB_NAME]
+        ensure_indexes(db)
         return db
         
     except ServerSelectionTimeoutError as e:
@@ -57,7 +120,9 @@ def _connect_to_database():
             client = MongoClient("mongodb://localhost:27017", serverSelectionTimeoutMS=5000)
             client.admin.command("ping")
             logger.info("✅ Local MongoDB connected successfully")
+            active_url = "mongodb://localhost:27017"
             db = client[DB_NAME]
+            ensure_indexes(db)
             return db
         except Exception as local_err:
             logger.error(f"❌ Local MongoDB also failed: {local_err}")
@@ -85,8 +150,30 @@ def get_database():
     
     return db
 
+def get_async_database():
+    """Return the Motor (asyncio) database instance (lazy initialization)
+
+    Connects through get_database() first so the Atlas/local fallback and
+    index creation happen once, then points Motor at the same server.
+    """
+    global async_client, async_db
+
+    if async_db is None:
+        get_database()
+        async_client = AsyncIOMotorClient(
+            active_url,
+            serverSelectionTimeoutMS=5000,
+            connectTimeoutMS=10000,
+            retryWrites=True
+        )
+        async_db = async_client[DB_NAME]
+
+    return async_db
+
 def close_database():
-    """Close the MongoDB connection"""
+    """Close the MongoDB connections"""
+    if async_client:
+        async_client.close()
     if client:
         client.close()
         logger.info("MongoDB connection closed")
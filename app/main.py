@@ -1,19 +1,85 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.config import settings
-from app.database import get_database, close_database
+from app.database import get_database, get_async_database, close_database
+from app.models.vehicle import Vehicle
+from app.models.fuel_log import FuelLog
+from app.models.maintenance import Maintenance
+from app.models.reminder import Reminder
+from app.models.public_contact import PublicContactInquiry
+from app.models.vehicle_position import VehiclePosition
+from app.services.rag_service import RAGService
+from app.services.memory_service import MemoryService
+from app.services.greeting_service import GreetingService
+from app.services.analytics_buffer import analytics_buffer
+from app.services.position_buffer import position_buffer
+from app.services.email_service import close_http_client
+from app.services.redis_client import close_redis
 from app.routes import auth, vehicles, maintenance, reminders, settings as settings_routes, contact, public_contact, faq, support, newsletter, waitlist, vehicle_positions, drivers, fuel, stripe, documents
 import logging
 import os
+import sys
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting Fleety API")
+    # Initialize database connection
+    get_database()
+
+    # AI services are built once per worker and shared through app.state
+    app.state.rag = RAGService()
+    app.state.memory = MemoryService()
+    app.state.greeting = GreetingService(app.state.memory)
+
+    # Warm the FAQ index now so the first /api/faq/search doesn't pay for it.
+    # Runs before uvicorn accepts connections, in every worker process.
+    try:
+        await app.state.rag.warmup()
+    except Exception as e:
+        logger.warning(f"RAG warmup failed, index will load on first search: {e}")
+
+    # Stateless model wrappers over the Motor database, shared by every request
+    async_db = get_async_database()
+    app.state.vehicle_model = Vehicle(async_db)
+    app.state.fuel_log_model = FuelLog(async_db)
+    app.state.maintenance_model = Maintenance(async_db)
+    app.state.reminder_model = Reminder(async_db)
+    app.state.public_contact_model = PublicContactInquiry(async_db)
+    app.state.position_model = VehiclePosition(async_db)
+
+    # Batched analytics writes; stop() flushes whatever is still queued
+    analytics_buffer.start()
+    # Batched GPS position writes, same pattern
+    await app.state.position_model.backfill_latest_positions()
+    await app.state.position_model.migrate_latest_geohashes()
+    position_buffer.start(app.state.position_model.insert_positions)
+    # Pick up Stripe webhook events a previous process stored but never finished
+    await stripe.resume_pending_webhooks()
+
+    yield
+
+    logger.info("Shutting down Fleety API")
+    await stripe.drain_webhook_tasks()
+    await analytics_buffer.stop()
+    await position_buffer.stop()
+    await close_http_client()
+    await close_redis()
+    close_database()
+
+
 app = FastAPI(
     title="Fleety API",
     description="Vehicle Maintenance Log API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware - must be added first for proper request handling
@@ -51,20 +117,6 @@ app.include_router(stripe.router)
 app.include_router(documents.router)
 
 
-# Lifecycle events
-@app.on_event("startup")
-async def startup():
-    logger.info("Starting Fleety API")
-    # Initialize database connection
-    get_database()
-
-
-@app.on_event("shutdown")
-async def shutdown():
-    logger.info("Shutting down Fleety API")
-    close_database()
-
-
 @app.get("/", tags=["root"])
 async def root():
     return {
@@ -85,5 +137,8 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=settings.debug
+        reload=settings.debug,
+        # uvloop is not available on Windows; uvicorn falls back to asyncio there
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools"
     )
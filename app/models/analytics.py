@@ -1,6 +1,7 @@
 from app.database import get_database
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator
 from bson import ObjectId
+from pymongo import InsertOne
 from datetime import datetime
 import logging
 
@@ -41,6 +42,127 @@ class Analytics:
         collection.create_index([("user_id", 1), ("created_at", -1)])
         return collection
 
+    # Shared $group accumulators for per-user aggregate stats
+    _STATS_GROUP = {
+        "total_queries": {"$sum": 1},
+        "avg_similarity_score": {"$avg": "$similarity_score"},
+        "faq_matched_count": {"$sum": {"$cond": ["$faq_matched", 1, 0]}},
+        "ai_fallback_count": {"$sum": {"$cond": ["$fallback_ai_used", 1, 0]}},
+        "avg_misunderstanding_risk": {"$avg": "$misunderstanding_risk"},
+        "avg_grounding_confidence": {"$avg": "$grounding_confidence"},
+        "avg_response_quality": {"$avg": "$response_quality"}
+    }
+
+    @staticmethod
+    def _format_stats(stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Turn a raw stats $group result into the API shape"""
+        if not stats:
+            return {
+                "total_queries": 0,
+                "avg_similarity_score": 0.0,
+                "faq_match_rate": 0.0,
+                "ai_fallback_rate": 0.0,
+                "avg_misunderstanding_risk": 0.0,
+                "avg_grounding_confidence": 0.0,
+                "avg_response_quality": 0.0
+            }
+        
+        total = stats.get("total_queries", 1)
+        
+        return {
+            "total_queries": stats.get("total_queries", 0),
+            "avg_similarity_score": round(stats.get("avg_similarity_score") or 0.0, 2),
+            "faq_match_rate": round(stats.get("faq_matched_count", 0) / total, 2),
+            "ai_fallback_rate": round(stats.get("ai_fallback_count", 0) / total, 2),
+            "avg_misunderstanding_risk": round(stats.get("avg_misunderstanding_risk") or 0.0, 2),
+            "avg_grounding_confidence": round(stats.get("avg_grounding_confidence") or 0.0, 2),
+            "avg_response_quality": round(stats.get("avg_response_quality") or 0.0, 2)
+        }
+
+    @staticmethod
+    def _format_sentiment(result: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Turn per-sentiment counts into a fixed distribution dict"""
+        distribution = {
+            "positive": 0,
+            "neutral": 0,
+            "negative": 0,
+            "frustrated": 0
+        }
+        
+        for item in result:
+            sentiment = item.get("_id", "neutral")
+            if sentiment in distribution:
+                distribution[sentiment] = item.get("count", 0)
+        
+        return distribution
+
+    @staticmethod
+    def _format_intents(result: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Turn per-intent counts into intents with percentages"""
+        # Calculate total for percentages
+        total = sum(item.get("count", 0) for item in result)
+        
+        intents = []
+        for item in result:
+            intent_data = {
+                "intent": item.get("_id", "unknown"),
+                "count": item.get("count", 0),
+                "percentage": round((item.get("count", 0) / total * 100), 1) if total > 0 else 0
+            }
+            intents.append(intent_data)
+        
+        return intents
+
+    @staticmethod
+    def build_document(
+        user_id: str,
+        query: str,
+        intent: str,
+        analytics_metadata: Dict[str, Any],
+        grounding_confidence: Optional[float] = None,
+        is_grounded: Optional[bool] = None,
+        response_quality: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Build the analytics document for a query/response interaction (see record_interaction)"""
+        return {
+            "user_id": user_id,
+            "query": query[:500],  # Store first 500 chars to save space
+            "intent": intent,
+            
+            # From analytics metadata
+            "faq_matched": analytics_metadata.get("faq_matched", False),
+            "similarity_score": analytics_metadata.get("similarity_score", 0.0),
+            "persona_used": analytics_metadata.get("persona_used", "neutral"),
+            "persona_confidence": analytics_metadata.get("persona_confidence", 0.0),
+            "sentiment": analytics_metadata.get("sentiment", "neutral"),
+            "sentiment_score": analytics_metadata.get("sentiment_score", 0.0),
+            "fallback_ai_used": analytics_metadata.get("fallback_ai_used", False),
+            
+            # Misunderstanding detection
+            "misunderstanding_risk": analytics_metadata.get("misunderstanding_risk", 0.0),
+            "misunderstanding_indicators": analytics_metadata.get("misunderstanding_indicators", []),
+            "should_request_clarification": analytics_metadata.get("should_request_clarification", False),
+            
+            # Query metadata
+            "query_complexity": analytics_metadata.get("query_metadata", {}).get("complexity", 0.0),
+            "query_word_count": analytics_metadata.get("query_metadata", {}).get("word_count", 0),
+            "is_vague_query": analytics_metadata.get("query_metadata", {}).get("is_vague", False),
+            "has_technical_terms": analytics_metadata.get("query_metadata", {}).get("has_technical_terms", False),
+            
+            # FAQ source
+            "faq_source": analytics_metadata.get("faq_source"),
+            
+            # Grounding info
+            "grounding_confidence": grounding_confidence,
+            "is_grounded": is_grounded,
+            
+            # Response quality
+            "response_quality": response_quality,
+            
+            # Timestamp
+            "created_at": datetime.utcnow()
+        }
+
     @classmethod
     async def record_interaction(
         cls,
@@ -70,44 +192,15 @@ class Analytics:
         try:
             collection = cls.get_collection()
             
-            document = {
-                "user_id": user_id,
-                "query": query[:500],  # Store first 500 chars to save space
-                "intent": intent,
-                
-                # From analytics metadata
-                "faq_matched": analytics_metadata.get("faq_matched", False),
-                "similarity_score": analytics_metadata.get("similarity_score", 0.0),
-                "persona_used": analytics_metadata.get("persona_used", "neutral"),
-                "persona_confidence": analytics_metadata.get("persona_confidence", 0.0),
-                "sentiment": analytics_metadata.get("sentiment", "neutral"),
-                "sentiment_score": analytics_metadata.get("sentiment_score", 0.0),
-                "fallback_ai_used": analytics_metadata.get("fallback_ai_used", False),
-                
-                # Misunderstanding detection
-                "misunderstanding_risk": analytics_metadata.get("misunderstanding_risk", 0.0),
-                "misunderstanding_indicators": analytics_metadata.get("misunderstanding_indicators", []),
-                "should_request_clarification": analytics_metadata.get("should_request_clarification", False),
-                
-                # Query metadata
-                "query_complexity": analytics_metadata.get("query_metadata", {}).get("complexity", 0.0),
-                "query_word_count": analytics_metadata.get("query_metadata", {}).get("word_count", 0),
-                "is_vague_query": analytics_metadata.get("query_metadata", {}).get("is_vague", False),
-                "has_technical_terms": analytics_metadata.get("query_metadata", {}).get("has_technical_terms", False),
-                
-                # FAQ source
-                "faq_source": analytics_metadata.get("faq_source"),
-                
-                # Grounding info
-                "grounding_confidence": grounding_confidence,
-                "is_grounded": is_grounded,
-                
-                # Response quality
-                "response_quality": response_quality,
-                
-                # Timestamp
-                "created_at": datetime.utcnow()
-            }
+            document = cls.build_document(
+                user_id=user_id,
+                query=query,
+                intent=intent,
+                analytics_metadata=analytics_metadata,
+                grounding_confidence=grounding_confidence,
+                is_grounded=is_grounded,
+                response_quality=response_quality
+            )
             
             result = collection.insert_one(document)
             logger.info(f"Recorded analytics for user {user_id}: {str(result.inserted_id)}")
@@ -117,6 +210,23 @@ class Analytics:
             logger.error(f"Error recording analytics: {str(e)}")
             return None
 
+    @classmethod
+    def insert_documents(cls, documents: List[Dict[str, Any]]) -> int:
+        """
+        Write pre-built analytics documents in one unordered bulk_write
+        (blocking; used by the background AnalyticsBuffer flusher)
+        
+        Returns:
+            Number of documents inserted
+        """
+        if not documents:
+            return 0
+        result = cls.get_collection().bulk_write(
+            [InsertOne(document) for document in documents],
+            ordered=False
+        )
+        return result.inserted_count
+
     @classmethod
     async def get_user_analytics(
         cls,
@@ -153,6 +263,30 @@ class Analytics:
             logger.error(f"Error fetching user analytics: {str(e)}")
             return []
 
+    @classmethod
+    def iter_user_analytics(
+        cls,
+        user_id: str,
+        limit: int = 50,
+        skip: int = 0,
+        batch_size: int = 200
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Like get_user_analytics, but yields records one at a time straight off
+        the cursor (blocking; meant to be consumed from a threadpool)
+        """
+        try:
+            records = cls.get_collection().find(
+                {"user_id": user_id}
+            ).sort("created_at", -1).skip(skip).limit(limit).batch_size(batch_size)
+            
+            for record in records:
+                record["id"] = str(record["_id"])
+                yield record
+        
+        except Exception as e:
+            logger.error(f"Error streaming user analytics: {str(e)}")
+
     @classmethod
     async def get_aggregate_stats(
         cls,
@@ -177,45 +311,12 @@ class Analytics:
             
             pipeline = [
                 {"$match": {"user_id": user_id}},
-                {
-                    "$group": {
-                        "_id": "$user_id",
-                        "total_queries": {"$sum": 1},
-                        "avg_similarity_score": {"$avg": "$similarity_score"},
-                        "faq_matched_count": {"$sum": {"$cond": ["$faq_matched", 1, 0]}},
-                        "ai_fallback_count": {"$sum": {"$cond": ["$fallback_ai_used", 1, 0]}},
-                        "avg_misunderstanding_risk": {"$avg": "$misunderstanding_risk"},
-                        "avg_grounding_confidence": {"$avg": "$grounding_confidence"},
-                        "avg_response_quality": {"$avg": "$response_quality"}
-                    }
-                }
+                {"$group": {"_id": "$user_id", **cls._STATS_GROUP}}
             ]
             
             result = list(collection.aggregate(pipeline))
             
-            if not result:
-                return {
-                    "total_queries": 0,
-                    "avg_similarity_score": 0.0,
-                    "faq_match_rate": 0.0,
-                    "ai_fallback_rate": 0.0,
-                    "avg_misunderstanding_risk": 0.0,
-                    "avg_grounding_confidence": 0.0,
-                    "avg_response_quality": 0.0
-                }
-            
-            stats = result[0]
-            total = stats.get("total_queries", 1)
-            
-            return {
-                "total_queries": stats.get("total_queries", 0),
-                "avg_similarity_score": round(stats.get("avg_similarity_score", 0.0), 2),
-                "faq_match_rate": round(stats.get("faq_matched_count", 0) / total, 2),
-                "ai_fallback_rate": round(stats.get("ai_fallback_count", 0) / total, 2),
-                "avg_misunderstanding_risk": round(stats.get("avg_misunderstanding_risk", 0.0), 2),
-                "avg_grounding_confidence": round(stats.get("avg_grounding_confidence", 0.0), 2),
-                "avg_response_quality": round(stats.get("avg_response_quality", 0.0), 2)
-            }
+            return cls._format_stats(result[0] if result else None)
         
         except Exception as e:
             logger.error(f"Error fetching aggregate stats: {str(e)}")
@@ -252,19 +353,7 @@ class Analytics:
             
             result = list(collection.aggregate(pipeline))
             
-            distribution = {
-                "positive": 0,
-                "neutral": 0,
-                "negative": 0,
-                "frustrated": 0
-            }
-            
-            for item in result:
-                sentiment = item.get("_id", "neutral")
-                if sentiment in distribution:
-                    distribution[sentiment] = item.get("count", 0)
-            
-            return distribution
+            return cls._format_sentiment(result)
         
         except Exception as e:
             logger.error(f"Error fetching sentiment distribution: {str(e)}")
@@ -302,23 +391,71 @@ class Analytics:
             
             result = list(collection.aggregate(pipeline))
             
-            # Calculate total for percentages
-            total = sum(item.get("count", 0) for item in result)
+            return cls._format_intents(result)
+        
+        except Exception as e:
+            logger.error(f"Error fetching top intents: {str(e)}")
+            return []
+
+    @classmethod
+    async def get_dashboard(
+        cls,
+        user_id: str,
+        intents_limit: int = 5,
+        history_limit: int = 50,
+        skip: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Get stats, sentiment, top intents and history for a user
+        in a single $facet aggregation (one round trip instead of four)
+        
+        Returns:
+        {
+            "stats": {...},
+            "sentiment": {...},
+            "intents": [...],
+            "history": [...]
+        }
+        """
+        try:
+            collection = cls.get_collection()
             
-            intents = []
-            for item in result:
-                intent_data = {
-                    "intent": item.get("_id", "unknown"),
-                    "count": item.get("count", 0),
-                    "percentage": round((item.get("count", 0) / total * 100), 1) if total > 0 else 0
+            pipeline = [
+                {"$match": {"user_id": user_id}},
+                {
+                    "$facet": {
+                        "stats": [{"$group": {"_id": None, **cls._STATS_GROUP}}],
+                        "sentiment": [{"$group": {"_id": "$sentiment", "count": {"$sum": 1}}}],
+                        "intents": [{"$sortByCount": "$intent"}, {"$limit": intents_limit}],
+                        "history": [
+                            {"$sort": {"created_at": -1}},
+                            {"$skip": skip},
+                            {"$limit": history_limit}
+                        ]
+                    }
                 }
-                intents.append(intent_data)
+            ]
+            
+            result = list(collection.aggregate(pipeline))
+            facets = result[0] if result else {}
+            
+            history = []
+            for record in facets.get("history", []):
+                record["id"] = str(record.pop("_id"))
+                history.append(record)
             
-            return intents
+            stats = facets.get("stats") or [None]
+            
+            return {
+                "stats": cls._format_stats(stats[0]),
+                "sentiment": cls._format_sentiment(facets.get("sentiment", [])),
+                "intents": cls._format_intents(facets.get("intents", [])),
+                "history": history
+            }
         
         except Exception as e:
-            logger.error(f"Error fetching top intents: {str(e)}")
-            return []
+            logger.error(f"Error fetching analytics dashboard: {str(e)}")
+            return {}
 
     @classmethod
     async def delete_old_analytics(cls, days: int = 90) -> int:
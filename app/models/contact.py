@@ -1,5 +1,14 @@
 from datetime import datetime
 from bson.objectid import ObjectId
+from app.utils.cache import TTLCache
+
+# Per-user contact counts; a short TTL keeps the total close to live without a COUNT per page
+_count_cache = TTLCache(maxsize=1024, ttl=10)
+
+
+def _oid(value):
+    """Accept an ObjectId as-is so callers can convert once and reuse it"""
+    return value if isinstance(value, ObjectId) else ObjectId(value)
 
 
 class Contact:
@@ -20,13 +29,15 @@ class Contact:
             "message": message,
             "agreeToTermsAndPrivacy": agree_to_terms_and_privacy,
             "agreeToPDPA": agree_to_pdpa,
-            "user_id": ObjectId(user_id) if user_id else None,
+            "user_id": _oid(user_id) if user_id else None,
             "status": "open",  # open, in_progress, closed
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
         result = self.collection.insert_one(contact_data)
         contact_data["_id"] = str(result.inserted_id)
+        if user_id:
+            _count_cache.pop(str(user_id))
         return contact_data
     
     def get_all(self, skip: int = 0, limit: int = 50):
@@ -35,16 +46,24 @@ class Contact:
     
     def get_by_id(self, contact_id: str):
         """Get contact request by ID"""
-        return self.collection.find_one({"_id": ObjectId(contact_id)})
+        return self.collection.find_one({"_id": _oid(contact_id)})
     
     def get_by_user(self, user_id: str, skip: int = 0, limit: int = 50):
         """Get contact requests by user"""
-        return list(self.collection.find({"user_id": ObjectId(user_id)}).skip(skip).limit(limit))
+        return list(self.collection.find({"user_id": _oid(user_id)}).skip(skip).limit(limit))
+    
+    def count_for_user(self, user_id: str) -> int:
+        """Count contact requests by user (cached briefly)"""
+        total = _count_cache.get(user_id)
+        if total is None:
+            total = self.collection.count_documents({"user_id": _oid(user_id)})
+            _count_cache.set(user_id, total)
+        return total
     
     def update_status(self, contact_id: str, status: str):
         """Update contact request status"""
         result = self.collection.update_one(
-            {"_id": ObjectId(contact_id)},
+            {"_id": _oid(contact_id)},
             {
                 "$set": {
                     "status": status,
@@ -57,12 +76,12 @@ class Contact:
     def add_reply(self, contact_id: str, reply_message: str, admin_id: str = None):
         """Add a reply to a contact request"""
         result = self.collection.update_one(
-            {"_id": ObjectId(contact_id)},
+            {"_id": _oid(contact_id)},
             {
                 "$push": {
                     "replies": {
                         "message": reply_message,
-                        "admin_id": ObjectId(admin_id) if admin_id else None,
+                        "admin_id": _oid(admin_id) if admin_id else None,
                         "created_at": datetime.utcnow(),
                     }
                 },
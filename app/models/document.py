@@ -17,8 +17,6 @@ class Document:
     
     def __init__(self, db):
         self.collection: Collection = db["documents"]
-        self.collection.create_index("vehicle_id")
-        self.collection.create_index("user_id")
 
     def create(self, user_id: str, vehicle_id: str, document_data: dict):
         """Create a new document record"""
@@ -33,6 +31,7 @@ class Document:
             "file_size": document_data.get("file_size", 0),
             "mime_type": document_data.get("mime_type"),
             "expiry_date": document_data.get("expiry_date"),
+            "content_hash": document_data.get("content_hash"),
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
@@ -55,6 +54,24 @@ class Document:
         except Exception:
             return None
 
+    def find_by_hash(self, user_id: str, content_hash: str):
+        """Find an existing document of the user with identical file contents"""
+        return self.collection.find_one(
+            {"user_id": user_id, "content_hash": content_hash},
+            {"file_url": 1}
+        )
+
+    def find_by_file_url(self, user_id: str, file_url: str):
+        """Find a document of the user that links the given stored file (name and type only)"""
+        return self.collection.find_one(
+            {"user_id": user_id, "file_url": file_url},
+            {"file_name": 1, "mime_type": 1}
+        )
+
+    def count_by_file_url(self, user_id: str, file_url: str) -> int:
+        """Count documents of the user that link the given stored file"""
+        return self.collection.count_documents({"user_id": user_id, "file_url": file_url})
+
     def get_by_vehicle(self, vehicle_id: str, user_id: str) -> List[dict]:
         """Get all documents for a specific vehicle"""
         documents = list(self.collection.find({
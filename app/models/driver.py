@@ -4,11 +4,14 @@ from datetime import datetime
 from typing import List, Optional
 
 
+def _oid(value):
+    """Accept an ObjectId as-is so callers can convert once and reuse it"""
+    return value if isinstance(value, ObjectId) else ObjectId(value)
+
+
 class Driver:
     def __init__(self, db):
         self.collection: Collection = db["drivers"]
-        self.collection.create_index("user_id")
-        self.collection.create_index("vehicle_id")
 
     def create(self, user_id: str, driver_data: dict):
         driver = {
@@ -31,7 +34,7 @@ class Driver:
     def get_by_id(self, driver_id: str, user_id: str):
         try:
             driver = self.collection.find_one({
-                "_id": ObjectId(driver_id),
+                "_id": _oid(driver_id),
                 "user_id": user_id
             })
             if driver:
@@ -68,7 +71,7 @@ class Driver:
         try:
             data["updated_at"] = datetime.utcnow()
             result = self.collection.update_one(
-                {"_id": ObjectId(driver_id), "user_id": user_id},
+                {"_id": _oid(driver_id), "user_id": user_id},
                 {"$set": data}
             )
             return result.modified_count > 0
@@ -78,7 +81,7 @@ class Driver:
     def assign_vehicle(self, driver_id: str, user_id: str, vehicle_id: str):
         try:
             result = self.collection.update_one(
-                {"_id": ObjectId(driver_id), "user_id": user_id},
+                {"_id": _oid(driver_id), "user_id": user_id},
                 {
                     "$addToSet": {"assigned_vehicles": vehicle_id},
                     "$set": {"updated_at": datetime.utcnow()}
@@ -91,7 +94,7 @@ class Driver:
     def unassign_vehicle(self, driver_id: str, user_id: str, vehicle_id: str):
         try:
             result = self.collection.update_one(
-                {"_id": ObjectId(driver_id), "user_id": user_id},
+                {"_id": _oid(driver_id), "user_id": user_id},
                 {
                     "$pull": {"assigned_vehicles": vehicle_id},
                     "$set": {"updated_at": datetime.utcnow()}
@@ -104,7 +107,7 @@ class Driver:
     def delete(self, driver_id: str, user_id: str):
         try:
             result = self.collection.delete_one({
-                "_id": ObjectId(driver_id),
+                "_id": _oid(driver_id),
                 "user_id": user_id
             })
             return result.deleted_count > 0
@@ -1,5 +1,5 @@
 from app.database import get_database
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from bson import ObjectId
 from datetime import datetime
 import numpy as np
@@ -49,6 +49,19 @@ class FAQ:
             logger.error(f"Error inserting FAQ: {str(e)}")
             raise
 
+    @classmethod
+    def _load_json_fallback(cls) -> List[Dict[str, Any]]:
+        """Load FAQs from the bundled JSON file (used when MongoDB is empty or unavailable)"""
+        json_file = Path(__file__).parent.parent / "data" / "faq_data.json"
+        if not json_file.exists():
+            return []
+        with open(json_file, 'r') as f:
+            json_data = json.load(f)
+        # Add _id field for consistency
+        for idx, faq in enumerate(json_data):
+            faq["_id"] = f"faq_{idx:02d}"
+        return json_data
+
     @classmethod
     async def find_all(cls) -> List[Dict[str, Any]]:
         """
@@ -70,32 +83,49 @@ class FAQ:
                 
             # If collection is empty, try loading from JSON
             logger.info("FAQ collection empty, loading from JSON fallback...")
-            json_file = Path(__file__).parent.parent / "data" / "faq_data.json"
-            if json_file.exists():
-                with open(json_file, 'r') as f:
-                    json_data = json.load(f)
-                    # Add _id field for consistency
-                    for idx, faq in enumerate(json_data):
-                        faq["_id"] = f"faq_{idx:02d}"
-                    return json_data
-            
-            return []
+            return cls._load_json_fallback()
         except Exception as e:
             logger.error(f"Error fetching FAQs from DB: {str(e)}, trying JSON fallback...")
             # Fallback to JSON if database fails
             try:
-                json_file = Path(__file__).parent.parent / "data" / "faq_data.json"
-                if json_file.exists():
-                    with open(json_file, 'r') as f:
-                        json_data = json.load(f)
-                        for idx, faq in enumerate(json_data):
-                            faq["_id"] = f"faq_{idx:02d}"
-                        return json_data
+                return cls._load_json_fallback()
             except Exception as json_err:
                 logger.error(f"JSON fallback also failed: {str(json_err)}")
             
             return []
 
+    @classmethod
+    def iter_all(cls, batch_size: int = 200, outcome: Optional[Dict[str, bool]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Like find_all, but yields FAQs one at a time straight off the cursor
+        (blocking; meant to be consumed from a threadpool, e.g. by StreamingResponse)
+        
+        If `outcome` is given, outcome["complete"] is set to True only when the
+        full list was produced (a cursor failure mid-stream leaves it unset)
+        """
+        yielded = False
+        try:
+            cursor = cls.get_collection().find({}, {"embedding": 0}).batch_size(batch_size)
+            for doc in cursor:
+                doc["_id"] = str(doc["_id"])
+                yielded = True
+                yield doc
+        except Exception as e:
+            logger.error(f"Error streaming FAQs from DB: {str(e)}")
+            if yielded:
+                return  # part of the list is already on the wire
+
+        if not yielded:
+            logger.info("No FAQs from MongoDB, loading from JSON fallback...")
+            try:
+                yield from cls._load_json_fallback()
+            except Exception as json_err:
+                logger.error(f"JSON fallback also failed: {str(json_err)}")
+                return
+
+        if outcome is not None:
+            outcome["complete"] = True
+
     @classmethod
     async def vector_search(
         cls,
@@ -1,4 +1,5 @@
-from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
 from bson import ObjectId
 from datetime import datetime
 from typing import List, Optional
@@ -6,12 +7,9 @@ from typing import List, Optional
 
 class FuelLog:
     def __init__(self, db):
-        self.collection: Collection = db["fuel_logs"]
-        self.collection.create_index("user_id")
-        self.collection.create_index("vehicle_id")
-        self.collection.create_index([("vehicle_id", 1), ("date", -1)])
+        self.collection: AsyncIOMotorCollection = db["fuel_logs"]
 
-    def create(self, user_id: str, vehicle_id: str, fuel_data: dict):
+    async def create(self, user_id: str, vehicle_id: str, fuel_data: dict):
         fuel_log = {
             "user_id": user_id,
             "vehicle_id": vehicle_id,
@@ -39,13 +37,13 @@ class FuelLog:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
-        result = self.collection.insert_one(fuel_log)
+        result = await self.collection.insert_one(fuel_log)
         fuel_log["_id"] = str(result.inserted_id)
         return fuel_log
 
-    def get_by_id(self, fuel_log_id: str, user_id: str):
+    async def get_by_id(self, fuel_log_id: str, user_id: str):
         try:
-            fuel_log = self.collection.find_one({
+            fuel_log = await self.collection.find_one({
                 "_id": ObjectId(fuel_log_id),
                 "user_id": user_id
             })
@@ -55,27 +53,27 @@ class FuelLog:
         except Exception:
             return None
 
-    def get_by_vehicle(self, user_id: str, vehicle_id: str, limit: int = 100):
-        fuel_logs = list(self.collection.find({
+    async def get_by_vehicle(self, user_id: str, vehicle_id: str, limit: int = 100):
+        fuel_logs = await self.collection.find({
             "user_id": user_id,
             "vehicle_id": vehicle_id
-        }).sort("date", -1).limit(limit))
+        }).sort("date", -1).limit(limit).to_list(length=limit)
         
         for log in fuel_logs:
             if "_id" in log:
                 log["_id"] = str(log["_id"])
         return fuel_logs
 
-    def get_stats(self, user_id: str, vehicle_id: str, days: int = 30):
+    async def get_stats(self, user_id: str, vehicle_id: str, days: int = 30):
         """Calculate fuel economy statistics for the given period"""
         from datetime import timedelta
         
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        logs = list(self.collection.find({
+        logs = await self.collection.find({
             "user_id": user_id,
             "vehicle_id": vehicle_id,
             "date": {"$gte": cutoff_date}
-        }).sort("date", 1))
+        }).sort("date", 1).to_list(length=None)
 
         if len(logs) < 1:
             return {
@@ -108,10 +106,10 @@ class FuelLog:
             "fuel_type": logs[0]["fuel_type"] if logs else None,
         }
 
-    def update(self, fuel_log_id: str, user_id: str, data: dict):
+    async def update(self, fuel_log_id: str, user_id: str, data: dict):
         try:
             data["updated_at"] = datetime.utcnow()
-            result = self.collection.update_one(
+            result = await self.collection.update_one(
                 {"_id": ObjectId(fuel_log_id), "user_id": user_id},
                 {"$set": data}
             )
@@ -119,9 +117,24 @@ class FuelLog:
         except Exception:
             return False
 
-    def delete(self, fuel_log_id: str, user_id: str):
+    async def update_and_return(self, fuel_log_id: str, user_id: str, data: dict):
+        """Apply the update and return the updated log in one round trip (None if not found)"""
         try:
-            result = self.collection.delete_one({
+            data["updated_at"] = datetime.utcnow()
+            fuel_log = await self.collection.find_one_and_update(
+                {"_id": ObjectId(fuel_log_id), "user_id": user_id},
+                {"$set": data},
+                return_document=ReturnDocument.AFTER
+            )
+            if fuel_log:
+                fuel_log["_id"] = str(fuel_log["_id"])
+            return fuel_log
+        except Exception:
+            return None
+
+    async def delete(self, fuel_log_id: str, user_id: str):
+        try:
+            result = await self.collection.delete_one({
                 "_id": ObjectId(fuel_log_id),
                 "user_id": user_id
             })
@@ -1,4 +1,5 @@
-from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
 from bson import ObjectId
 from datetime import datetime
 from typing import List, Optional
@@ -6,11 +7,9 @@ from typing import List, Optional
 
 class Maintenance:
     def __init__(self, db):
-        self.collection: Collection = db["maintenance"]
-        self.collection.create_index("vehicle_id")
-        self.collection.create_index("user_id")
+        self.collection: AsyncIOMotorCollection = db["maintenance"]
 
-    def create(self, user_id: str, vehicle_id: str, maintenance_data: dict):
+    async def create(self, user_id: str, vehicle_id: str, maintenance_data: dict):
         maintenance = {
             "user_id": user_id,
             "vehicle_id": vehicle_id,
@@ -24,14 +23,14 @@ class Maintenance:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
-        result = self.collection.insert_one(maintenance)
+        result = await self.collection.insert_one(maintenance)
         maintenance["id"] = str(result.inserted_id)
         maintenance.pop("_id", None)
         return maintenance
 
-    def get_by_id(self, maintenance_id: str, user_id: str):
+    async def get_by_id(self, maintenance_id: str, user_id: str):
         try:
-            record = self.collection.find_one({
+            record = await self.collection.find_one({
                 "_id": ObjectId(maintenance_id),
                 "user_id": user_id
             })
@@ -42,21 +41,21 @@ class Maintenance:
         except Exception:
             return None
 
-    def get_by_vehicle(self, vehicle_id: str, user_id: str):
-        records = list(self.collection.find({
+    async def get_by_vehicle(self, vehicle_id: str, user_id: str):
+        records = await self.collection.find({
             "vehicle_id": vehicle_id,
             "user_id": user_id
-        }).sort("date", -1))
+        }).sort("date", -1).to_list(length=None)
         return [
             {**r, "id": str(r["_id"])} for r in records if "_id" in r
         ]
 
-    def update(self, maintenance_id: str, user_id: str, data: dict):
+    async def update(self, maintenance_id: str, user_id: str, data: dict):
         try:
             if "date" in data and isinstance(data["date"], str):
                 data["date"] = datetime.fromisoformat(data["date"])
             data["updated_at"] = datetime.utcnow()
-            result = self.collection.update_one(
+            result = await self.collection.update_one(
                 {"_id": ObjectId(maintenance_id), "user_id": user_id},
                 {"$set": data}
             )
@@ -64,9 +63,27 @@ class Maintenance:
         except Exception:
             return False
 
-    def delete(self, maintenance_id: str, user_id: str):
+    async def update_and_return(self, maintenance_id: str, user_id: str, data: dict):
+        """Apply the update and return the updated record in one round trip (None if not found)"""
         try:
-            result = self.collection.delete_one({
+            if "date" in data and isinstance(data["date"], str):
+                data["date"] = datetime.fromisoformat(data["date"])
+            data["updated_at"] = datetime.utcnow()
+            record = await self.collection.find_one_and_update(
+                {"_id": ObjectId(maintenance_id), "user_id": user_id},
+                {"$set": data},
+                return_document=ReturnDocument.AFTER
+            )
+            if record:
+                record["id"] = str(record["_id"])
+                record.pop("_id", None)
+            return record
+        except Exception:
+            return None
+
+    async def delete(self, maintenance_id: str, user_id: str):
+        try:
+            result = await self.collection.delete_one({
                 "_id": ObjectId(maintenance_id),
                 "user_id": user_id
             })
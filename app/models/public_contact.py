@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson.objectid import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
 
 
 class PublicContactInquiry:
@@ -7,9 +8,9 @@ class PublicContactInquiry:
     
     def __init__(self, db):
         self.db = db
-        self.collection = db.public_contact_inquiries
+        self.collection: AsyncIOMotorCollection = db.public_contact_inquiries
     
-    def create(self, name: str, email: str, phone: str, subject: str, message: str, 
+    async def create(self, name: str, email: str, phone: str, subject: str, message: str, 
                agree_to_terms_and_privacy: bool, agree_to_pdpa: bool, 
                ip_address: str = None, user_agent: str = None):
         """Create a new public contact inquiry"""
@@ -27,29 +28,29 @@ class PublicContactInquiry:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
-        result = self.collection.insert_one(inquiry_data)
+        result = await self.collection.insert_one(inquiry_data)
         inquiry_data["_id"] = result.inserted_id
         return inquiry_data
     
-    def get_all(self, skip: int = 0, limit: int = 50):
+    async def get_all(self, skip: int = 0, limit: int = 50):
         """Get all inquiries (admin only)"""
-        return list(self.collection.find().skip(skip).limit(limit))
+        return await self.collection.find().skip(skip).limit(limit).to_list(length=None)
     
-    def get_by_id(self, inquiry_id: str):
+    async def get_by_id(self, inquiry_id: str):
         """Get inquiry by ID"""
         try:
-            return self.collection.find_one({"_id": ObjectId(inquiry_id)})
+            return await self.collection.find_one({"_id": ObjectId(inquiry_id)})
         except:
             return None
     
-    def get_by_email(self, email: str):
+    async def get_by_email(self, email: str):
         """Get inquiries by email"""
-        return list(self.collection.find({"email": email}))
+        return await self.collection.find({"email": email}).to_list(length=None)
     
-    def update_status(self, inquiry_id: str, status: str):
+    async def update_status(self, inquiry_id: str, status: str):
         """Update inquiry status"""
         try:
-            result = self.collection.update_one(
+            result = await self.collection.update_one(
                 {"_id": ObjectId(inquiry_id)},
                 {
                     "$set": {
@@ -62,15 +63,15 @@ class PublicContactInquiry:
         except:
             return False
     
-    def mark_as_read(self, inquiry_id: str):
+    async def mark_as_read(self, inquiry_id: str):
         """Mark inquiry as read by admin"""
-        return self.update_status(inquiry_id, "read")
+        return await self.update_status(inquiry_id, "read")
     
-    def count_by_email(self, email: str, hours: int = 24):
+    async def count_by_email(self, email: str, hours: int = 24):
         """Count inquiries from same email in last N hours"""
         from datetime import timedelta
         cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        return self.collection.count_documents({
+        return await self.collection.count_documents({
             "email": email,
             "created_at": {"$gte": cutoff_time}
         })
@@ -1,16 +1,34 @@
-from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
 from bson import ObjectId
 from datetime import datetime
 from typing import Optional
 
 
+# Fields of ReminderResponse (id comes from _id)
+_RESPONSE_PROJECTION = {
+    "service_type": 1,
+    "description": 1,
+    "due_by_mileage": 1,
+    "due_by_date": 1,
+    "reminder_threshold_miles": 1,
+    "reminder_threshold_days": 1,
+    "is_recurring": 1,
+    "recurring_interval_miles": 1,
+    "recurring_interval_months": 1,
+    "last_completed_date": 1,
+    "last_completed_mileage": 1,
+    "is_active": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
+
 class Reminder:
     def __init__(self, db):
-        self.collection: Collection = db["reminders"]
-        self.collection.create_index("vehicle_id")
-        self.collection.create_index("user_id")
+        self.collection: AsyncIOMotorCollection = db["reminders"]
 
-    def create(self, user_id: str, vehicle_id: str, reminder_data: dict):
+    async def create(self, user_id: str, vehicle_id: str, reminder_data: dict):
         reminder = {
             "user_id": user_id,
             "vehicle_id": vehicle_id,
@@ -29,14 +47,14 @@ class Reminder:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
-        result = self.collection.insert_one(reminder)
+        result = await self.collection.insert_one(reminder)
         reminder["id"] = str(result.inserted_id)
         reminder.pop("_id", None)
         return reminder
 
-    def get_by_id(self, reminder_id: str, user_id: str):
+    async def get_by_id(self, reminder_id: str, user_id: str):
         try:
-            reminder = self.collection.find_one({
+            reminder = await self.collection.find_one({
                 "_id": ObjectId(reminder_id),
                 "user_id": user_id
             })
@@ -47,23 +65,28 @@ class Reminder:
         except Exception:
             return None
 
-    def get_by_vehicle(self, vehicle_id: str, user_id: str):
-        reminders = list(self.collection.find({
-            "vehicle_id": vehicle_id,
-            "user_id": user_id
-        }))
-        return [
-            {**{k: v for k, v in r.items() if k != "_id"}, "id": str(r["_id"])} for r in reminders if "_id" in r
-        ]
+    async def get_by_vehicle(self, vehicle_id: str, user_id: str):
+        """Reminders shaped like ReminderResponse (only its fields are fetched)"""
+        reminders = await self.collection.find(
+            {"vehicle_id": vehicle_id, "user_id": user_id},
+            _RESPONSE_PROJECTION
+        ).to_list(length=None)
+        for r in reminders:
+            r["id"] = str(r.pop("_id"))
+        return reminders
+
+    @staticmethod
+    def _parse_dates(data: dict):
+        if "due_by_date" in data and data["due_by_date"] and isinstance(data["due_by_date"], str):
+            data["due_by_date"] = datetime.fromisoformat(data["due_by_date"])
+        if "last_completed_date" in data and data["last_completed_date"] and isinstance(data["last_completed_date"], str):
+            data["last_completed_date"] = datetime.fromisoformat(data["last_completed_date"])
 
-    def update(self, reminder_id: str, user_id: str, data: dict):
+    async def update(self, reminder_id: str, user_id: str, data: dict):
         try:
-            if "due_by_date" in data and data["due_by_date"] and isinstance(data["due_by_date"], str):
-                data["due_by_date"] = datetime.fromisoformat(data["due_by_date"])
-            if "last_completed_date" in data and data["last_completed_date"] and isinstance(data["last_completed_date"], str):
-                data["last_completed_date"] = datetime.fromisoformat(data["last_completed_date"])
+            self._parse_dates(data)
             data["updated_at"] = datetime.utcnow()
-            result = self.collection.update_one(
+            result = await self.collection.update_one(
                 {"_id": ObjectId(reminder_id), "user_id": user_id},
                 {"$set": data}
             )
@@ -71,9 +94,26 @@ class Reminder:
         except Exception:
             return False
 
-    def delete(self, reminder_id: str, user_id: str):
+    async def update_and_return(self, reminder_id: str, user_id: str, data: dict):
+        """Apply the update and return the updated reminder in one round trip (None if not found)"""
+        try:
+            self._parse_dates(data)
+            data["updated_at"] = datetime.utcnow()
+            reminder = await self.collection.find_one_and_update(
+                {"_id": ObjectId(reminder_id), "user_id": user_id},
+                {"$set": data},
+                return_document=ReturnDocument.AFTER
+            )
+            if reminder:
+                reminder["id"] = str(reminder["_id"])
+                reminder.pop("_id", None)
+            return reminder
+        except Exception:
+            return None
+
+    async def delete(self, reminder_id: str, user_id: str):
         try:
-            result = self.collection.delete_one({
+            result = await self.collection.delete_one({
                 "_id": ObjectId(reminder_id),
                 "user_id": user_id
             })
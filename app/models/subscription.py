@@ -2,11 +2,13 @@
 Subscription Model for Fleety Stripe Integration
 Handles subscription storage and management in MongoDB
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List
 from pydantic import BaseModel, Field
 from bson import ObjectId
-from app.database import get_database
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.database import get_database, get_async_database
 
 class SubscriptionBase(BaseModel):
     """Base subscription schema"""
@@ -16,6 +18,7 @@ class SubscriptionBase(BaseModel):
     stripe_customer_id: str
     stripe_subscription_id: str
     stripe_price_id: str
+    stripe_subscription_item_id: Optional[str] = None
     status: str = "active"  # active, cancelled, past_due, trialing
     current_period_start: Optional[datetime] = None
     current_period_end: Optional[datetime] = None
@@ -32,6 +35,7 @@ class SubscriptionCreate(BaseModel):
     stripe_customer_id: str
     stripe_subscription_id: str
     stripe_price_id: str
+    stripe_subscription_item_id: Optional[str] = None
     status: str = "active"
 
 
@@ -65,15 +69,32 @@ class SubscriptionResponse(BaseModel):
 
 
 class Subscription:
-    """MongoDB Subscription Model - Synchronous"""
+    """MongoDB Subscription Model - Synchronous (plus Motor lookups for the API routes)"""
     collection_name = "subscriptions"
 
+    # Fields the Stripe routes read from a user's subscription
+    route_projection = {
+        "plan_id": 1,
+        "vehicle_count": 1,
+        "status": 1,
+        "current_period_end": 1,
+        "cancel_at_period_end": 1,
+        "stripe_customer_id": 1,
+        "stripe_subscription_id": 1,
+        "stripe_subscription_item_id": 1,
+    }
+
     @classmethod
     def get_collection(cls):
         """Get MongoDB collection (synchronous)"""
         db = get_database()
         return db[cls.collection_name]
 
+    @classmethod
+    def get_async_collection(cls):
+        """Get MongoDB collection (Motor)"""
+        return get_async_database()[cls.collection_name]
+
     @classmethod
     def create(cls, subscription_data: SubscriptionCreate) -> dict:
         """Create a new subscription"""
@@ -96,6 +117,12 @@ class Subscription:
         collection = cls.get_collection()
         return collection.find_one({"user_id": user_id})
 
+    @classmethod
+    async def find_by_user_id_async(cls, user_id: str) -> Optional[dict]:
+        """Find subscription by user ID without blocking the event loop (route fields only)"""
+        collection = cls.get_async_collection()
+        return await collection.find_one({"user_id": user_id}, cls.route_projection)
+
     @classmethod
     def find_by_stripe_subscription_id(cls, stripe_subscription_id: str) -> Optional[dict]:
         """Find subscription by Stripe subscription ID"""
@@ -163,6 +190,95 @@ class Subscription:
         return list(collection.find({"status": "active"}))
 
 
+class WebhookEvent:
+    """MongoDB log of received Stripe webhook events - Synchronous"""
+    collection_name = "webhook_events"
+
+    @classmethod
+    def get_collection(cls):
+        """Get MongoDB collection (synchronous)"""
+        db = get_database()
+        return db[cls.collection_name]
+
+    # A "received" event whose handler hasn't reported back within this long
+    # is assumed lost (crash/restart) and may be taken over by a retry
+    PROCESSING_LEASE = timedelta(minutes=5)
+    # Failed events are retried (by Stripe redeliveries or the startup sweep)
+    # until they have been attempted this many times
+    MAX_ATTEMPTS = 5
+
+    @classmethod
+    def _reclaimable(cls, now: datetime) -> dict:
+        """Filter for stored events that should be processed again"""
+        return {
+            "attempts": {"$not": {"$gte": cls.MAX_ATTEMPTS}},
+            "$or": [
+                {"status": "failed"},
+                {"status": "received", "claimed_at": {"$lt": now - cls.PROCESSING_LEASE}},
+                # stored before claims were tracked
+                {"status": "received", "claimed_at": {"$exists": False}},
+            ],
+        }
+
+    @classmethod
+    def record(cls, event_id: str, event_type: str, payload: str) -> bool:
+        """
+        Persist a raw event and claim it for processing.
+        Returns False if it is already processed or currently being processed.
+        """
+        collection = cls.get_collection()
+        now = datetime.utcnow()
+        
+        # The unique index on event_id makes this a single atomic check-and-insert
+        try:
+            collection.insert_one({
+                "event_id": event_id,
+                "type": event_type,
+                "payload": payload,
+                "status": "received",  # received, processed, failed
+                "error": None,
+                "attempts": 1,
+                "received_at": now,
+                "claimed_at": now,
+                "processed_at": None,
+            })
+            return True
+        except DuplicateKeyError:
+            # Stripe retried an event we stored but never finished (or that
+            # failed): take it over
+            return cls.claim(event_id, now) is not None
+
+    @classmethod
+    def claim(cls, event_id: str, now: Optional[datetime] = None) -> Optional[dict]:
+        """Atomically take over an unfinished event; returns it, or None if not claimable"""
+        now = now or datetime.utcnow()
+        return cls.get_collection().find_one_and_update(
+            {"event_id": event_id, **cls._reclaimable(now)},
+            {"$set": {"status": "received", "claimed_at": now, "error": None}, "$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    @classmethod
+    def find_unfinished(cls) -> List[dict]:
+        """Event ids that failed or never finished processing and can be retried"""
+        return list(cls.get_collection().find(
+            cls._reclaimable(datetime.utcnow()), {"event_id": 1}
+        ))
+
+    @classmethod
+    def mark_processed(cls, event_id: str, error: Optional[str] = None) -> None:
+        """Record the outcome of processing an event"""
+        collection = cls.get_collection()
+        collection.update_one(
+            {"event_id": event_id},
+            {"$set": {
+                "status": "failed" if error else "processed",
+                "error": error,
+                "processed_at": datetime.utcnow(),
+            }}
+        )
+
+
 # Enterprise Lead/Contact Model
 class EnterpriseLeadBase(BaseModel):
     """Schema for enterprise sales leads"""
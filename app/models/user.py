@@ -1,13 +1,21 @@
+from pymongo import ReturnDocument
 from pymongo.collection import Collection
 from bson import ObjectId
 from datetime import datetime
+from app.utils.cache import TTLCache
+
+# User documents by id for hot read paths (settings); writes through this model evict
+_user_cache = TTLCache(maxsize=10000, ttl=60)
+
+
+def invalidate_cached_user(user_id: str) -> None:
+    """Drop a user from the read cache after a write outside this model"""
+    _user_cache.pop(str(user_id))
 
 
 class User:
     def __init__(self, db):
         self.collection: Collection = db["users"]
-        # Create unique index on email
-        self.collection.create_index("email", unique=True)
 
     def create(self, email: str, hashed_password: str, full_name: str = ""):
         user = {
@@ -43,6 +51,15 @@ class User:
         except Exception:
             return None
 
+    def get_by_id_cached(self, user_id: str):
+        """get_by_id backed by a short per-process TTL cache"""
+        user = _user_cache.get(user_id)
+        if user is None:
+            user = self.get_by_id(user_id)
+            if user:
+                _user_cache.set(user_id, user)
+        return user
+
     def get_by_reset_token(self, token: str):
         """Get user by reset token"""
         user = self.collection.find_one({"reset_token": token})
@@ -56,6 +73,23 @@ class User:
             result = self.collection.update_one(
                 {"_id": ObjectId(user_id)}, {"$set": data}
             )
+            _user_cache.pop(str(user_id))
             return result.modified_count > 0
         except Exception:
             return False
+
+    def find_and_update_preferences(self, user_id: str, data: dict):
+        """Apply preference updates and return the updated user in one round-trip"""
+        try:
+            data["updated_at"] = datetime.utcnow()
+            user = self.collection.find_one_and_update(
+                {"_id": ObjectId(user_id)},
+                {"$set": data},
+                return_document=ReturnDocument.AFTER
+            )
+            _user_cache.pop(str(user_id))
+            if user:
+                user["id"] = str(user["_id"])
+            return user
+        except Exception:
+            return None
@@ -1,4 +1,5 @@
-from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
 from bson import ObjectId
 from datetime import datetime
 from typing import List, Optional
@@ -6,10 +7,9 @@ from typing import List, Optional
 
 class Vehicle:
     def __init__(self, db):
-        self.collection: Collection = db["vehicles"]
-        self.collection.create_index("user_id")
+        self.collection: AsyncIOMotorCollection = db["vehicles"]
 
-    def create(self, user_id: str, vehicle_data: dict):
+    async def create(self, user_id: str, vehicle_data: dict):
         vehicle = {
             "user_id": user_id,
             "make": vehicle_data.get("make"),
@@ -23,13 +23,13 @@ class Vehicle:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
-        result = self.collection.insert_one(vehicle)
+        result = await self.collection.insert_one(vehicle)
         vehicle["_id"] = str(result.inserted_id)
         return vehicle
 
-    def get_by_id(self, vehicle_id: str, user_id: str):
+    async def get_by_id(self, vehicle_id: str, user_id: str):
         try:
-            vehicle = self.collection.find_one({
+            vehicle = await self.collection.find_one({
                 "_id": ObjectId(vehicle_id),
                 "user_id": user_id
             })
@@ -39,8 +39,18 @@ class Vehicle:
         except Exception:
             return None
 
-    def get_all_by_user(self, user_id: str):
-        vehicles = list(self.collection.find({"user_id": user_id}))
+    async def exists(self, vehicle_id: str, user_id: str) -> bool:
+        """Ownership check that only touches the _id index"""
+        try:
+            return await self.collection.find_one(
+                {"_id": ObjectId(vehicle_id), "user_id": user_id},
+                {"_id": 1}
+            ) is not None
+        except Exception:
+            return False
+
+    async def get_all_by_user(self, user_id: str):
+        vehicles = await self.collection.find({"user_id": user_id}).to_list(length=None)
         result = []
         for v in vehicles:
             if "_id" in v:
@@ -48,10 +58,10 @@ class Vehicle:
                 result.append(v)
         return result
 
-    def update(self, vehicle_id: str, user_id: str, data: dict):
+    async def update(self, vehicle_id: str, user_id: str, data: dict):
         try:
             data["updated_at"] = datetime.utcnow()
-            result = self.collection.update_one(
+            result = await self.collection.update_one(
                 {"_id": ObjectId(vehicle_id), "user_id": user_id},
                 {"$set": data}
             )
@@ -59,9 +69,24 @@ class Vehicle:
         except Exception:
             return False
 
-    def delete(self, vehicle_id: str, user_id: str):
+    async def update_and_return(self, vehicle_id: str, user_id: str, data: dict):
+        """Apply the update and return the updated vehicle in one round trip (None if not found)"""
+        try:
+            data["updated_at"] = datetime.utcnow()
+            vehicle = await self.collection.find_one_and_update(
+                {"_id": ObjectId(vehicle_id), "user_id": user_id},
+                {"$set": data},
+                return_document=ReturnDocument.AFTER
+            )
+            if vehicle:
+                vehicle["_id"] = str(vehicle["_id"])
+            return vehicle
+        except Exception:
+            return None
+
+    async def delete(self, vehicle_id: str, user_id: str):
         try:
-            result = self.collection.delete_one({
+            result = await self.collection.delete_one({
                 "_id": ObjectId(vehicle_id),
                 "user_id": user_id
             })
@@ -1,7 +1,29 @@
-from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
+import logging
+import re
+from operator import itemgetter
+from motor.motor_asyncio import AsyncIOMotorCollection
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, AsyncIterator, List
 from bson import ObjectId
-from app.database import get_database
+from pymongo import UpdateOne
+from app.utils import geohash
+
+logger = logging.getLogger(__name__)
+
+
+# Nearby search: radii up to this use the geohash index instead of $geoNear
+GEOHASH_MAX_RADIUS_M = 500
+NEARBY_LIMIT = 200
+# Fields the position routes return
+_POSITION_PROJECTION = {
+    "_id": 0,
+    "vehicleId": 1,
+    "location": 1,
+    "speed": 1,
+    "direction": 1,
+    "status": 1,
+    "timestamp": 1
+}
 
 
 class VehiclePosition:
@@ -9,20 +31,46 @@ class VehiclePosition:
     
     def __init__(self, db):
         self.db = db
-        self.collection = db["VehiclePositions"]
-        self._ensure_indexes()
+        self.collection: AsyncIOMotorCollection = db["VehiclePositions"]
+        # One position per vehicle per hour, kept after the raw TTL expires
+        self.archive: AsyncIOMotorCollection = db["VehiclePositionsArchive"]
+        # Current position per vehicle, upserted on every write
+        self.latest: AsyncIOMotorCollection = db["VehicleLatestPositions"]
+        # Indexes are created once at connect time in app.database.ensure_indexes
+        # Set by migrate_latest_geohashes once every latest position has a
+        # geohash7; until then nearby searches all go through $geoNear
+        self.geohash_ready = False
     
-    def _ensure_indexes(self):
-        """Create necessary indexes for performance"""
-        try:
-            # Geospatial index for location-based queries
-            self.collection.create_index([("location", "2dsphere")])
-            # Index for latest position lookup
-            self.collection.create_index([("vehicleId", 1), ("timestamp", -1)])
-        except Exception as e:
-            print(f"Index creation warning: {e}")
+    @staticmethod
+    def build_position_doc(
+        vehicle_id: str,
+        latitude: float,
+        longitude: float,
+        speed: float = 0,
+        direction: int = 0,
+        status: str = "active"
+    ) -> Dict[str, Any]:
+        """
+        Build a position document stamped with the current time
+        
+        Raises:
+            bson.errors.InvalidId: If vehicle_id is not a valid ObjectId
+        """
+        vehicle_oid = ObjectId(vehicle_id) if isinstance(vehicle_id, str) else vehicle_id
+        return {
+            "vehicleId": vehicle_oid,
+            "location": {
+                "type": "Point",
+                "coordinates": [longitude, latitude]  # GeoJSON format: [lon, lat]
+            },
+            "speed": speed,
+            "direction": direction,
+            "status": status,
+            "timestamp": datetime.now(timezone.utc),
+            "geohash7": geohash.encode(latitude, longitude, geohash.POSITION_PRECISION)
+        }
     
-    def create_position(
+    async def create_position(
         self,
         vehicle_id: str,
         latitude: float,
@@ -46,28 +94,82 @@ class VehiclePosition:
             Created position document
         """
         try:
-            vehicle_oid = ObjectId(vehicle_id) if isinstance(vehicle_id, str) else vehicle_id
-            
-            position_doc = {
-                "vehicleId": vehicle_oid,
-                "location": {
-                    "type": "Point",
-                    "coordinates": [longitude, latitude]  # GeoJSON format: [lon, lat]
-                },
-                "speed": speed,
-                "direction": direction,
-                "status": status,
-                "timestamp": datetime.now(timezone.utc)
-            }
-            
-            result = self.collection.insert_one(position_doc)
-            position_doc["_id"] = result.inserted_id
+            position_doc = self.build_position_doc(
+                vehicle_id, latitude, longitude, speed, direction, status
+            )
+            await self.insert_positions([position_doc])
             return position_doc
         except Exception as e:
-            print(f"Error creating position: {e}")
+            logger.error(f"Error creating position: {e}")
             return None
     
-    def get_latest_position(self, vehicle_id: str) -> Optional[Dict[str, Any]]:
+    async def insert_positions(self, position_docs: List[Dict[str, Any]]) -> int:
+        """
+        Write a batch of position documents in one round trip (plus one each
+        for the per-vehicle latest positions and the hourly archive)
+        
+        The three writes are independent: each is attempted even if an
+        earlier one failed, and the first failure is re-raised afterwards.
+        
+        Returns:
+            Number of positions inserted
+        """
+        inserted = 0
+        errors = []
+        try:
+            result = await self.collection.insert_many(position_docs, ordered=False)
+            inserted = len(result.inserted_ids)
+        except Exception as e:
+            logger.error(f"Error inserting {len(position_docs)} positions: {e}")
+            errors.append(e)
+        for write in (self._update_latest_positions, self._archive_positions):
+            try:
+                await write(position_docs)
+            except Exception as e:
+                logger.error(f"Error in {write.__name__} for {len(position_docs)} positions: {e}")
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return inserted
+    
+    async def _update_latest_positions(self, position_docs: List[Dict[str, Any]]) -> None:
+        """Upsert the newest position of each vehicle in the batch"""
+        newest: Dict[Any, Dict[str, Any]] = {}
+        for doc in position_docs:
+            current = newest.get(doc["vehicleId"])
+            if current is None or doc["timestamp"] >= current["timestamp"]:
+                newest[doc["vehicleId"]] = doc
+        
+        requests = []
+        for vehicle_oid, doc in newest.items():
+            # Pipeline update so an older position (a late batch or a direct
+            # write racing the buffer) never overwrites a newer one. A missing
+            # timestamp (fresh upsert) compares as null, i.e. older.
+            is_newer = {"$lt": ["$timestamp", doc["timestamp"]]}
+            requests.append(UpdateOne(
+                {"vehicleId": vehicle_oid},
+                [{"$set": {
+                    k: {"$cond": [is_newer, {"$literal": v}, f"${k}"]}
+                    for k, v in doc.items() if k != "_id"
+                }}],
+                upsert=True
+            ))
+        await self.latest.bulk_write(requests, ordered=False)
+    
+    async def _archive_positions(self, position_docs: List[Dict[str, Any]]) -> None:
+        """Keep the first position of each hour per vehicle for long-term analytics"""
+        requests = []
+        for doc in position_docs:
+            hour = doc["timestamp"].replace(minute=0, second=0, microsecond=0)
+            archived = {k: v for k, v in doc.items() if k != "_id"}
+            requests.append(UpdateOne(
+                {"vehicleId": doc["vehicleId"], "hour": hour},
+                {"$setOnInsert": archived},
+                upsert=True
+            ))
+        await self.archive.bulk_write(requests, ordered=False)
+    
+    async def get_latest_position(self, vehicle_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the latest position for a specific vehicle
         
@@ -80,24 +182,26 @@ class VehiclePosition:
         try:
             vehicle_oid = ObjectId(vehicle_id) if isinstance(vehicle_id, str) else vehicle_id
             
-            position = self.collection.find_one(
-                {"vehicleId": vehicle_oid},
-                sort=[("timestamp", -1)]
-            )
+            position = await self.latest.find_one({"vehicleId": vehicle_oid})
+            if position is None:
+                # Vehicles that haven't reported since the latest collection existed
+                position = await self.collection.find_one(
+                    {"vehicleId": vehicle_oid},
+                    sort=[("timestamp", -1)]
+                )
             return position
         except Exception as e:
-            print(f"Error getting latest position: {e}")
+            logger.error(f"Error getting latest position: {e}")
             return None
     
-    def get_all_latest_positions(self) -> List[Dict[str, Any]]:
+    async def backfill_latest_positions(self) -> None:
         """
-        Get latest positions for all vehicles
-        
-        Returns:
-            List of latest position documents
+        Seed the latest-position collection from history when it is empty
+        (first start after it was introduced); a no-op afterwards
         """
         try:
-            # Pipeline to get latest position for each vehicle
+            if await self.latest.estimated_document_count() > 0:
+                return
             pipeline = [
                 {"$sort": {"timestamp": -1}},
                 {
@@ -106,21 +210,79 @@ class VehiclePosition:
                         "position": {"$first": "$$ROOT"}
                     }
                 },
-                {"$replaceRoot": {"newRoot": "$position"}}
+                {"$replaceRoot": {"newRoot": "$position"}},
+                {"$project": {"_id": 0}},
+                {
+                    "$merge": {
+                        "into": "VehicleLatestPositions",
+                        "on": "vehicleId",
+                        "whenMatched": "keepExisting",
+                        "whenNotMatched": "insert"
+                    }
+                }
             ]
-            
-            positions = list(self.collection.aggregate(pipeline))
-            return positions
+            async for _ in self.collection.aggregate(pipeline):
+                pass
+            # Raw history written before geohash7 existed doesn't carry it
+            await self._set_missing_geohashes()
+        except Exception as e:
+            logger.error(f"Error backfilling latest positions: {e}")
+    
+    async def migrate_latest_geohashes(self) -> None:
+        """
+        One-off migration (run from the app lifespan): add geohash7 to latest
+        positions stored before it existed, then enable geohash nearby search
+        """
+        try:
+            updated = await self._set_missing_geohashes()
+            if updated:
+                logger.info(f"Added geohash7 to {updated} latest positions")
+            self.geohash_ready = True
+        except Exception as e:
+            logger.error(f"Error migrating latest position geohashes: {e}")
+    
+    async def _set_missing_geohashes(self, batch_size: int = 1000) -> int:
+        """Compute geohash7 for latest positions that lack it; returns how many were updated"""
+        updated = 0
+        requests = []
+        cursor = self.latest.find({"geohash7": {"$exists": False}}, {"location": 1})
+        async for doc in cursor:
+            coordinates = (doc.get("location") or {}).get("coordinates")
+            if not coordinates:
+                continue
+            lng, lat = coordinates
+            requests.append(UpdateOne(
+                # Don't clobber one a concurrent insert_positions just wrote
+                {"_id": doc["_id"], "geohash7": {"$exists": False}},
+                {"$set": {"geohash7": geohash.encode(lat, lng, geohash.POSITION_PRECISION)}}
+            ))
+            if len(requests) >= batch_size:
+                updated += (await self.latest.bulk_write(requests, ordered=False)).modified_count
+                requests = []
+        if requests:
+            updated += (await self.latest.bulk_write(requests, ordered=False)).modified_count
+        return updated
+    
+    async def get_all_latest_positions(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Get latest positions for all vehicles
+        
+        Yields:
+            Latest position documents, straight off the cursor
+        """
+        try:
+            # One document per vehicle, kept current by insert_positions
+            async for position in self.latest.find({}, _POSITION_PROJECTION):
+                yield position
         except Exception as e:
-            print(f"Error getting all latest positions: {e}")
-            return []
+            logger.error(f"Error getting all latest positions: {e}")
     
-    def get_position_history(
+    async def get_position_history(
         self,
         vehicle_id: str,
         limit: int = 100,
         hours_back: int = 24
-    ) -> List[Dict[str, Any]]:
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
         Get historical positions for a vehicle
         
@@ -129,76 +291,91 @@ class VehiclePosition:
             limit: Maximum number of positions to return
             hours_back: How many hours of history to retrieve
         
-        Returns:
-            List of position documents in chronological order
+        Yields:
+            Position documents in chronological order
         """
         try:
-            from datetime import timedelta
-            
             vehicle_oid = ObjectId(vehicle_id) if isinstance(vehicle_id, str) else vehicle_id
             start_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
             
-            positions = list(
-                self.collection.find(
-                    {
-                        "vehicleId": vehicle_oid,
-                        "timestamp": {"$gte": start_time}
-                    },
-                    sort=[("timestamp", 1)]
-                ).limit(limit)
-            )
-            return positions
+            cursor = self.collection.find(
+                {
+                    "vehicleId": vehicle_oid,
+                    "timestamp": {"$gte": start_time}
+                },
+                sort=[("timestamp", 1)]
+            ).limit(limit)
+            async for position in cursor:
+                yield position
         except Exception as e:
-            print(f"Error getting position history: {e}")
-            return []
+            logger.error(f"Error getting position history: {e}")
     
-    def find_vehicles_near_location(
+    async def find_vehicles_near_location(
         self,
         longitude: float,
         latitude: float,
         max_distance_meters: int = 5000
-    ) -> List[Dict[str, Any]]:
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Find vehicles near a specific location using geospatial query
+        Find vehicles whose current position is near a location
+        
+        Small radii are answered from the geohash index (once
+        migrate_latest_geohashes has run); larger ones with $geoNear on the
+        2dsphere index.
         
         Args:
             longitude: Query longitude
             latitude: Query latitude
             max_distance_meters: Search radius in meters
         
-        Returns:
-            List of positions for vehicles within distance
+        Yields:
+            Latest position per vehicle in range (with distance_m), nearest first
         """
         try:
+            cells = None
+            if self.geohash_ready and max_distance_meters <= GEOHASH_MAX_RADIUS_M:
+                cells = geohash.covering_cells(latitude, longitude, max_distance_meters)
+            
+            if cells is not None:
+                # Prefix matches on the geohash index, then exact distance in Python
+                found = []
+                query = {"geohash7": {"$in": [re.compile("^" + cell) for cell in cells]}}
+                async for position in self.latest.find(query, _POSITION_PROJECTION):
+                    lng, lat = position["location"]["coordinates"]
+                    distance = geohash.distance_m(latitude, longitude, lat, lng)
+                    if distance <= max_distance_meters:
+                        position["distance_m"] = distance
+                        found.append(position)
+                found.sort(key=itemgetter("distance_m"))
+                for position in found[:NEARBY_LIMIT]:
+                    yield position
+                return
+            
+            # $geoNear must be the first stage to use the 2dsphere index; it
+            # returns each point's distance so callers don't recompute it
             pipeline = [
-                {"$sort": {"timestamp": -1}},
-                {
-                    "$group": {
-                        "_id": "$vehicleId",
-                        "position": {"$first": "$$ROOT"}
-                    }
-                },
                 {
                     "$geoNear": {
                         "near": {
                             "type": "Point",
                             "coordinates": [longitude, latitude]
                         },
-                        "distanceField": "distance",
+                        "distanceField": "distance_m",
                         "maxDistance": max_distance_meters,
-                        "spherical": True
+                        "spherical": True,
+                        "key": "location"
                     }
                 },
-                {"$replaceRoot": {"newRoot": "$position"}}
+                {"$project": {**_POSITION_PROJECTION, "distance_m": 1}},
+                {"$limit": NEARBY_LIMIT}
             ]
             
-            results = list(self.collection.aggregate(pipeline))
-            return results
+            async for position in self.latest.aggregate(pipeline):
+                yield position
         except Exception as e:
-            print(f"Error in geospatial query: {e}")
-            return []
+            logger.error(f"Error in geospatial query: {e}")
     
-    def delete_old_positions(self, days_to_keep: int = 30) -> int:
+    async def delete_old_positions(self, days_to_keep: int = 30) -> int:
         """
         Clean up old position records (data retention)
         
@@ -209,11 +386,9 @@ class VehiclePosition:
             Number of documents deleted
         """
         try:
-            from datetime import timedelta
-            
             cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_to_keep)
-            result = self.collection.delete_many({"timestamp": {"$lt": cutoff_date}})
+            result = await self.collection.delete_many({"timestamp": {"$lt": cutoff_date}})
             return result.deleted_count
         except Exception as e:
-            print(f"Error deleting old positions: {e}")
+            logger.error(f"Error deleting old positions: {e}")
             return 0
@@ -250,7 +250,7 @@ class Waitlist:
 
             result = []
             for entry in entries:
-                entry["id"] = str(entry["_id"])
+                entry["id"] = str(entry.pop("_id"))
                 result.append(entry)
 
             return result
@@ -3,7 +3,8 @@ from pydantic import BaseModel, EmailStr
 from app.database import get_database
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, TokenResponse, UserResponse, ChangePasswordRequest, SubscriptionInfo
-from app.utils.auth import hash_password, verify_password, create_access_token, decode_token
+from app.utils.auth import hash_password, verify_password, create_access_token, decode_token, revoke_user_tokens
+from app.utils.auth_dep import bearer_token
 from app.services.email_service import send_password_reset_email
 from app.middleware.subscription import get_subscription_status
 import secrets
@@ -147,13 +148,13 @@ async def login(user_data: UserLogin, db=Depends(get_database)):
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(authorization: str = Header(None), db=Depends(get_database)):
-    if not authorization or not authorization.startswith("Bearer "):
+    token = bearer_token(authorization)
+    if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
     
-    token = authorization.replace("Bearer ", "")
     from app.utils.auth import decode_token
     payload = decode_token(token)
     if not payload:
@@ -206,13 +207,13 @@ async def get_current_user(authorization: str = Header(None), db=Depends(get_dat
 
 @router.put("/change-password")
 async def change_password(password_data: ChangePasswordRequest, authorization: str = Header(None), db=Depends(get_database)):
-    if not authorization or not authorization.startswith("Bearer "):
+    token = bearer_token(authorization)
+    if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
     
-    token = authorization.replace("Bearer ", "")
     payload = decode_token(token)
     
     if not payload:
@@ -255,6 +256,9 @@ async def change_password(password_data: ChangePasswordRequest, authorization: s
             detail="Failed to update password"
         )
     
+    # Sessions issued with the old password stop working
+    await revoke_user_tokens(user_id)
+    
     # Verify update
     updated_user = user_model.get_by_id(user_id)
     print(f"  Updated hash matches new hash: {updated_user.get('hashed_password') == new_hashed_password}")
@@ -340,5 +344,6 @@ async def reset_password(request: ResetPasswordRequest, db=Depends(get_database)
         "reset_token": None,
         "reset_token_expires": None
     })
+    await revoke_user_tokens(user["id"])
     
     return ResetPasswordResponse(message="Password reset successfully. You can now login with your new password.")
@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header, UploadFile, File, Form
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response
+from fastapi.responses import FileResponse, StreamingResponse, ORJSONResponse
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
+import asyncio
 import os
 import uuid
-import shutil
+import hashlib
 from pathlib import Path
+from urllib.parse import quote
 
+import anyio
+
+from app.config import settings
 from app.database import get_database
+from app.utils.deps import get_vehicle_model
 from app.models.document import Document
 from app.models.vehicle import Vehicle
-from app.utils.auth import decode_token
+from app.utils.auth_dep import get_current_user_id
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
 
@@ -25,6 +31,7 @@ ALLOWED_EXTENSIONS = {
     ".doc", ".docx", ".xls", ".xlsx"
 }
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 
 
 # Pydantic schemas
@@ -46,6 +53,10 @@ class DocumentResponse(BaseModel):
         from_attributes = True
 
 
+# Compiled once; list endpoints validate and serialize through it instead of per-call response_model handling
+_DOC_LIST = TypeAdapter(List[DocumentResponse])
+
+
 class DocumentUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -53,25 +64,6 @@ class DocumentUpdate(BaseModel):
     expiry_date: Optional[datetime] = None
 
 
-def get_current_user_id(authorization: str = Header(None)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-    
-    token = authorization.replace("Bearer ", "")
-    payload = decode_token(token)
-    
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    return payload.get("sub")
-
-
 def validate_file(file: UploadFile):
     """Validate uploaded file"""
     # Check file extension
@@ -85,6 +77,40 @@ def validate_file(file: UploadFile):
     return ext
 
 
+def _save_upload(source, file_path: Path):
+    """
+    Stream an upload to disk in chunks, hashing it on the way.
+    Returns (bytes written, content hash); size is -1 as soon as MAX_FILE_SIZE is exceeded.
+    """
+    file_size = 0
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, "wb") as buffer:
+        while True:
+            chunk = source.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            file_size += len(chunk)
+            if file_size > MAX_FILE_SIZE:
+                return -1, None
+            h.update(chunk)
+            buffer.write(chunk)
+    return file_size, h.hexdigest()
+
+
+def _content_disposition(filename: str) -> str:
+    """Attachment header for a download, RFC 5987-encoded for non-ASCII names"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _remove_if_exists(file_path: Path):
+    """Remove a file from disk, ignoring it if already gone"""
+    if file_path.exists():
+        os.remove(file_path)
+
+
 @router.post("/vehicle/{vehicle_id}", response_model=DocumentResponse)
 async def upload_document(
     vehicle_id: str,
@@ -94,18 +120,10 @@ async def upload_document(
     description: Optional[str] = Form(default=None),
     expiry_date: Optional[str] = Form(default=None),
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    vehicle_model: Vehicle = Depends(get_vehicle_model)
 ):
     """Upload a document for a vehicle"""
-    # Verify vehicle exists and belongs to user
-    vehicle_model = Vehicle(db)
-    vehicle = vehicle_model.get_by_id(vehicle_id, user_id)
-    if not vehicle:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found"
-        )
-    
     # Validate file
     ext = validate_file(file)
     
@@ -113,28 +131,34 @@ async def upload_document(
     unique_filename = f"{uuid.uuid4()}{ext}"
     file_path = UPLOAD_DIR / unique_filename
     
-    # Save file
+    # Verify vehicle ownership while the file is being written: the Mongo round trip
+    # and the disk write (threadpool) are independent, so both run concurrently
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get file size
-        file_size = os.path.getsize(file_path)
-        
-        if file_size > MAX_FILE_SIZE:
-            os.remove(file_path)
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
-            )
+        vehicle_exists, (file_size, content_hash) = await asyncio.gather(
+            vehicle_model.exists(vehicle_id, user_id),
+            anyio.to_thread.run_sync(_save_upload, file.file, file_path),
+        )
     except Exception as e:
-        if file_path.exists():
-            os.remove(file_path)
+        await anyio.to_thread.run_sync(_remove_if_exists, file_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}"
         )
     
+    if not vehicle_exists:
+        await anyio.to_thread.run_sync(_remove_if_exists, file_path)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found"
+        )
+    
+    if file_size < 0:
+        await anyio.to_thread.run_sync(_remove_if_exists, file_path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+        )
+    
     # Parse expiry date if provided
     parsed_expiry = None
     if expiry_date:
@@ -143,45 +167,54 @@ async def upload_document(
         except ValueError:
             pass
     
-    # Create document record
     document_model = Document(db)
-    document_data = {
-        "document_type": document_type,
-        "title": title or file.filename,
-        "description": description,
-        "file_name": file.filename,
-        "file_url": f"/api/documents/file/{unique_filename}",
-        "file_size": file_size,
-        "mime_type": file.content_type,
-        "expiry_date": parsed_expiry,
-    }
-    
-    created_document = document_model.create(user_id, vehicle_id, document_data)
-    return created_document
+    file_url = f"/api/documents/file/{unique_filename}"
+    try:
+        # Identical file already stored for this user: link it instead of keeping a second copy
+        # Document uses sync PyMongo, so both calls go through the threadpool
+        # like the file I/O above
+        existing = await anyio.to_thread.run_sync(document_model.find_by_hash, user_id, content_hash)
+        if existing and existing.get("file_url"):
+            await anyio.to_thread.run_sync(_remove_if_exists, file_path)
+            file_url = existing["file_url"]
+        
+        # Create document record
+        document_data = {
+            "document_type": document_type,
+            "title": title or file.filename,
+            "description": description,
+            "file_name": file.filename,
+            "file_url": file_url,
+            "file_size": file_size,
+            "mime_type": file.content_type,
+            "expiry_date": parsed_expiry,
+            "content_hash": content_hash,
+        }
+        
+        return await anyio.to_thread.run_sync(document_model.create, user_id, vehicle_id, document_data)
+    except Exception as e:
+        # No record points at the file just written, so don't leave it on disk
+        await anyio.to_thread.run_sync(_remove_if_exists, file_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save document: {str(e)}"
+        )
 
 
-@router.get("/vehicle/{vehicle_id}", response_model=List[DocumentResponse])
+@router.get("/vehicle/{vehicle_id}", response_model=List[DocumentResponse], response_class=ORJSONResponse)
 async def get_vehicle_documents(
     vehicle_id: str,
     user_id: str = Depends(get_current_user_id),
     db=Depends(get_database)
 ):
     """Get all documents for a vehicle"""
-    # Verify vehicle exists and belongs to user
-    vehicle_model = Vehicle(db)
-    vehicle = vehicle_model.get_by_id(vehicle_id, user_id)
-    if not vehicle:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found"
-        )
-    
+    # Ownership is part of the query filter ({vehicle_id, user_id}), so no separate vehicle lookup
     document_model = Document(db)
     documents = document_model.get_by_vehicle(vehicle_id, user_id)
-    return documents
+    return ORJSONResponse(_DOC_LIST.dump_python(_DOC_LIST.validate_python(documents), mode="json"))
 
 
-@router.get("/all", response_model=List[DocumentResponse])
+@router.get("/all", response_model=List[DocumentResponse], response_class=ORJSONResponse)
 async def get_all_documents(
     user_id: str = Depends(get_current_user_id),
     db=Depends(get_database)
@@ -189,10 +222,10 @@ async def get_all_documents(
     """Get all documents for the current user"""
     document_model = Document(db)
     documents = document_model.get_all_by_user(user_id)
-    return documents
+    return ORJSONResponse(_DOC_LIST.dump_python(_DOC_LIST.validate_python(documents), mode="json"))
 
 
-@router.get("/expiring", response_model=List[DocumentResponse])
+@router.get("/expiring", response_model=List[DocumentResponse], response_class=ORJSONResponse)
 async def get_expiring_documents(
     days: int = 30,
     user_id: str = Depends(get_current_user_id),
@@ -201,12 +234,34 @@ async def get_expiring_documents(
     """Get documents expiring within specified days"""
     document_model = Document(db)
     documents = document_model.get_expiring_soon(user_id, days)
-    return documents
+    return ORJSONResponse(_DOC_LIST.dump_python(_DOC_LIST.validate_python(documents), mode="json"))
 
 
 @router.get("/file/{filename}")
-async def get_document_file(filename: str):
-    """Serve a document file"""
+def get_document_file(
+    filename: str,
+    user_id: str = Depends(get_current_user_id),
+    db=Depends(get_database)
+):
+    """Serve a document file owned by the current user"""
+    document_model = Document(db)
+    document = document_model.find_by_file_url(user_id, f"/api/documents/file/{filename}")
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    # Same headers on both paths: downloads keep the original filename
+    headers = {"Content-Disposition": _content_disposition(document.get("file_name") or filename)}
+    media_type = document.get("mime_type")
+    
+    # Behind Nginx: let it sendfile() the bytes from an internal location
+    # (Nginx passes Content-Type and Content-Disposition through)
+    if settings.x_accel_documents_prefix:
+        headers["X-Accel-Redirect"] = f"{settings.x_accel_documents_prefix.rstrip('/')}/{filename}"
+        return Response(media_type=media_type, headers=headers)
+    
     file_path = UPLOAD_DIR / filename
     
     if not file_path.exists():
@@ -215,7 +270,7 @@ async def get_document_file(filename: str):
             detail="File not found"
         )
     
-    return FileResponse(file_path)
+    return FileResponse(file_path, media_type=media_type, headers=headers)
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
@@ -256,7 +311,7 @@ async def update_document(
         )
     
     # Update document
-    update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
+    update_dict = update_data.model_dump(exclude_unset=True, exclude_none=True)
     updated = document_model.update(document_id, user_id, update_dict)
     
     if not updated:
@@ -269,7 +324,7 @@ async def update_document(
 
 
 @router.delete("/{document_id}")
-async def delete_document(
+def delete_document(
     document_id: str,
     user_id: str = Depends(get_current_user_id),
     db=Depends(get_database)
@@ -285,12 +340,11 @@ async def delete_document(
             detail="Document not found"
         )
     
-    # Delete file from disk
+    # Delete file from disk, unless another document still links the same file
     try:
-        filename = document["file_url"].split("/")[-1]
-        file_path = UPLOAD_DIR / filename
-        if file_path.exists():
-            os.remove(file_path)
+        if document_model.count_by_file_url(user_id, document["file_url"]) <= 1:
+            filename = document["file_url"].split("/")[-1]
+            _remove_if_exists(UPLOAD_DIR / filename)
     except Exception:
         pass  # Continue even if file deletion fails
     
@@ -1,33 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.driver import Driver
 from app.schemas.driver import DriverCreate, DriverUpdate, DriverResponse, DriverVehicleAssignment
 from app.database import get_database
-from app.utils.auth import decode_token
+from app.utils.auth_dep import get_current_user_id
+from app.utils.ids import parse_object_id
 from typing import List
 
 router = APIRouter(prefix="/api/drivers", tags=["drivers"])
 
 
-def get_current_user_id(authorization: str = Header(None)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-    
-    token = authorization.replace("Bearer ", "")
-    payload = decode_token(token)
-    
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    return payload.get("sub")
-
-
 @router.post("", response_model=DriverResponse)
 async def create_driver(
     driver_data: DriverCreate,
@@ -36,7 +17,7 @@ async def create_driver(
 ):
     """Create a new driver"""
     driver_model = Driver(db)
-    driver = driver_model.create(user_id, driver_data.dict())
+    driver = driver_model.create(user_id, driver_data.model_dump())
     return driver
 
 
@@ -58,14 +39,12 @@ async def get_driver(
     db=Depends(get_database)
 ):
     """Get a specific driver"""
-    try:
-        driver_model = Driver(db)
-        driver = driver_model.get_by_id(driver_id, user_id)
-        if not driver:
-            raise HTTPException(status_code=404, detail="Driver not found")
-        return driver
-    except InvalidId:
-        raise HTTPException(status_code=400, detail="Invalid driver ID")
+    driver_oid = parse_object_id(driver_id, "Invalid driver ID")
+    driver_model = Driver(db)
+    driver = driver_model.get_by_id(driver_oid, user_id)
+    if not driver:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    return driver
 
 
 @router.put("/{driver_id}", response_model=DriverResponse)
@@ -76,23 +55,21 @@ async def update_driver(
     db=Depends(get_database)
 ):
     """Update a driver"""
-    try:
-        driver_model = Driver(db)
-        
-        # Verify driver exists and belongs to user
-        existing = driver_model.get_by_id(driver_id, user_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Driver not found")
-        
-        # Update the driver
-        update_data = driver_data.dict(exclude_unset=True)
-        if driver_model.update(driver_id, user_id, update_data):
-            updated = driver_model.get_by_id(driver_id, user_id)
-            return updated
-        else:
-            raise HTTPException(status_code=400, detail="Failed to update driver")
-    except InvalidId:
-        raise HTTPException(status_code=400, detail="Invalid driver ID")
+    driver_oid = parse_object_id(driver_id, "Invalid driver ID")
+    driver_model = Driver(db)
+    
+    # Verify driver exists and belongs to user
+    existing = driver_model.get_by_id(driver_oid, user_id)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    
+    # Update the driver
+    update_data = driver_data.model_dump(exclude_unset=True)
+    if driver_model.update(driver_oid, user_id, update_data):
+        updated = driver_model.get_by_id(driver_oid, user_id)
+        return updated
+    else:
+        raise HTTPException(status_code=400, detail="Failed to update driver")
 
 
 @router.post("/{driver_id}/assign-vehicle")
@@ -103,21 +80,19 @@ async def assign_vehicle(
     db=Depends(get_database)
 ):
     """Assign a vehicle to a driver"""
-    try:
-        driver_model = Driver(db)
-        
-        # Verify driver exists and belongs to user
-        existing = driver_model.get_by_id(driver_id, user_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Driver not found")
-        
-        if driver_model.assign_vehicle(driver_id, user_id, assignment.vehicle_id):
-            updated = driver_model.get_by_id(driver_id, user_id)
-            return {"message": "Vehicle assigned successfully", "driver": updated}
-        else:
-            raise HTTPException(status_code=400, detail="Failed to assign vehicle")
-    except InvalidId:
-        raise HTTPException(status_code=400, detail="Invalid driver ID")
+    driver_oid = parse_object_id(driver_id, "Invalid driver ID")
+    driver_model = Driver(db)
+    
+    # Verify driver exists and belongs to user
+    existing = driver_model.get_by_id(driver_oid, user_id)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    
+    if driver_model.assign_vehicle(driver_oid, user_id, assignment.vehicle_id):
+        updated = driver_model.get_by_id(driver_oid, user_id)
+        return {"message": "Vehicle assigned successfully", "driver": updated}
+    else:
+        raise HTTPException(status_code=400, detail="Failed to assign vehicle")
 
 
 @router.post("/{driver_id}/unassign-vehicle")
@@ -128,21 +103,19 @@ async def unassign_vehicle(
     db=Depends(get_database)
 ):
     """Unassign a vehicle from a driver"""
-    try:
-        driver_model = Driver(db)
-        
-        # Verify driver exists and belongs to user
-        existing = driver_model.get_by_id(driver_id, user_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Driver not found")
-        
-        if driver_model.unassign_vehicle(driver_id, user_id, assignment.vehicle_id):
-            updated = driver_model.get_by_id(driver_id, user_id)
-            return {"message": "Vehicle unassigned successfully", "driver": updated}
-        else:
-            raise HTTPException(status_code=400, detail="Failed to unassign vehicle")
-    except InvalidId:
-        raise HTTPException(status_code=400, detail="Invalid driver ID")
+    driver_oid = parse_object_id(driver_id, "Invalid driver ID")
+    driver_model = Driver(db)
+    
+    # Verify driver exists and belongs to user
+    existing = driver_model.get_by_id(driver_oid, user_id)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    
+    if driver_model.unassign_vehicle(driver_oid, user_id, assignment.vehicle_id):
+        updated = driver_model.get_by_id(driver_oid, user_id)
+        return {"message": "Vehicle unassigned successfully", "driver": updated}
+    else:
+        raise HTTPException(status_code=400, detail="Failed to unassign vehicle")
 
 
 @router.get("/vehicle/{vehicle_id}", response_model=List[DriverResponse])
@@ -164,17 +137,15 @@ async def delete_driver(
     db=Depends(get_database)
 ):
     """Delete a driver"""
-    try:
-        driver_model = Driver(db)
-        
-        # Verify driver exists and belongs to user
-        existing = driver_model.get_by_id(driver_id, user_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Driver not found")
-        
-        if driver_model.delete(driver_id, user_id):
-            return {"message": "Driver deleted successfully"}
-        else:
-            raise HTTPException(status_code=400, detail="Failed to delete driver")
-    except InvalidId:
-        raise HTTPException(status_code=400, detail="Invalid driver ID")
+    driver_oid = parse_object_id(driver_id, "Invalid driver ID")
+    driver_model = Driver(db)
+    
+    # Verify driver exists and belongs to user
+    existing = driver_model.get_by_id(driver_oid, user_id)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    
+    if driver_model.delete(driver_oid, user_id):
+        return {"message": "Driver deleted successfully"}
+    else:
+        raise HTTPException(status_code=400, detail="Failed to delete driver")
@@ -1,19 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Header, Request
+from fastapi import APIRouter, HTTPException, Depends, status, Header, Request, BackgroundTasks
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from app.services.rag_service import RAGService
 from app.services.chatbot_safety import safety
+from app.services.semantic_cache import semantic_cache
 from app.services.greeting_service import GreetingService
 from app.services.memory_service import MemoryService
 from app.models.analytics import Analytics
-from app.utils.auth import decode_token
+from app.utils.auth import decode_token_cached
+from app.utils.auth_dep import get_current_user_id, bearer_token
+from app.utils.deps import get_rag_service, get_memory_service, get_greeting_service
+from app.utils.responses import iter_json_envelope
+from app.utils.cache import TTLCache
 from app.models.faq import FAQ
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/faq", tags=["FAQ"])
 
+# Short-lived response caches for the public, non-personalized endpoints
+FAQ_ALL_TTL = 60  # seconds
+ANONYMOUS_GREETING_TTL = 10  # seconds
+_response_cache = TTLCache(maxsize=8)
+_faq_all_generation = 0
+
 # ========== SCHEMAS ==========
 
 class SearchQuery(BaseModel):
@@ -85,35 +98,15 @@ class IntentData(BaseModel):
     count: int
     percentage: float
 
-# ========== DEPENDENCIES ==========
-
-rag_service = RAGService()
-memory_service = MemoryService()
-greeting_service = GreetingService(memory_service)
-
-def get_current_user_id(authorization: str = Header(None)):
-    """Extract user_id from Bearer token"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header missing"
-        )
-    
-    token = authorization.replace("Bearer ", "")
-    payload = decode_token(token)
-    
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    return payload.get("sub")
-
 # ========== ROUTES ==========
 
 @router.get("/greeting")
-async def get_greeting(request: Request, authorization: str = Header(None)):
+async def get_greeting(
+    request: Request,
+    authorization: str = Header(None),
+    memory_service: MemoryService = Depends(get_memory_service),
+    greeting_service: GreetingService = Depends(get_greeting_service)
+):
     """
     Get personalized greeting using Memory System
     
@@ -130,10 +123,14 @@ async def get_greeting(request: Request, authorization: str = Header(None)):
         persona = "friendly"  # Default persona
         
         # Try to extract user from token if available
-        if authorization and authorization.startswith("Bearer "):
+        token = bearer_token(authorization)
+        if not token:
+            cached = _response_cache.get("greeting:anonymous")
+            if cached is not None:
+                return cached
+        else:
             try:
-                token = authorization.replace("Bearer ", "")
-                payload = decode_token(token)
+                payload = await decode_token_cached(token)
                 if payload:
                     user_id = payload.get("sub")
                     # Get user memory for personalization
@@ -151,7 +148,7 @@ async def get_greeting(request: Request, authorization: str = Header(None)):
             persona=persona
         )
         
-        return GreetingResponse(
+        response = GreetingResponse(
             greeting=greeting_data["greeting"],
             personalized=greeting_data["personalized"],
             username=greeting_data.get("username"),
@@ -160,6 +157,9 @@ async def get_greeting(request: Request, authorization: str = Header(None)):
             last_seen=greeting_data.get("last_seen"),
             discovery_question=greeting_data.get("discovery_question")
         )
+        if not token:
+            _response_cache.set("greeting:anonymous", response, ttl=ANONYMOUS_GREETING_TTL)
+        return response
     
     except Exception as e:
         logger.error(f"Greeting error: {str(e)}")
@@ -173,15 +173,45 @@ async def get_greeting(request: Request, authorization: str = Header(None)):
             last_seen=None
         )
 
+def _cache_faq_all(chunks, generation: int, outcome: dict):
+    """Pass chunks through and keep the full body once the stream completes"""
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    # Skip storing a list cut short by a cursor error, or if the FAQs
+    # changed while this response was streaming
+    if outcome.get("complete") and generation == _faq_all_generation:
+        _response_cache.set("faq:all", b"".join(body), ttl=FAQ_ALL_TTL)
+
+
+def invalidate_faq_all_cache():
+    """Drop the cached /all body (call when FAQs are added or removed)"""
+    global _faq_all_generation
+    _faq_all_generation += 1
+    _response_cache.pop("faq:all")
+
+
 @router.get("/all")
 async def get_all_faqs():
     """
     Get all FAQs without authentication
     Used for populating public FAQ list on landing page
+    
+    Streamed straight off the Mongo cursor (in the threadpool) on a miss;
+    the encoded body is then served from memory for FAQ_ALL_TTL seconds
     """
     try:
-        faqs = await FAQ.find_all()
-        return {"faqs": faqs}
+        cached = _response_cache.get("faq:all")
+        if cached is not None:
+            return Response(cached, media_type="application/json")
+        outcome = {}
+        return StreamingResponse(
+            _cache_faq_all(
+                iter_json_envelope("faqs", FAQ.iter_all(outcome=outcome)), _faq_all_generation, outcome
+            ),
+            media_type="application/json"
+        )
     except Exception as e:
         logger.error(f"Error fetching FAQs: {str(e)}")
         raise HTTPException(
@@ -189,8 +219,46 @@ async def get_all_faqs():
             detail=f"Error fetching FAQs: {str(e)}"
         )
 
+async def record_search_interaction(
+    rag_service: RAGService,
+    memory_service: MemoryService,
+    user_id: str,
+    query: str,
+    intent: str,
+    result: dict,
+    response_quality: float
+):
+    """
+    Background task: update user memory and record analytics for a search.
+    Both writes run concurrently; failures are logged, never raised.
+    """
+    outcomes = await asyncio.gather(
+        memory_service.update_interaction(
+            user_id=user_id,
+            topic=intent,
+            query=query,
+            response_quality=response_quality
+        ),
+        rag_service.record_analytics(
+            user_id=user_id,
+            query=query,
+            intent=intent,
+            result=result
+        ),
+        return_exceptions=True
+    )
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            logger.warning(f"Could not record interaction/analytics: {str(outcome)}")
+
 @router.post("/search")
-async def search_faqs(query: SearchQuery, request: Request):
+async def search_faqs(
+    query: SearchQuery,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    rag_service: RAGService = Depends(get_rag_service),
+    memory_service: MemoryService = Depends(get_memory_service)
+):
     """
     Search FAQs using RAG with Gemini 3.0 + Safety Compliance:
     1. Validate query (spam, abuse, injection, malicious intent)
@@ -218,34 +286,31 @@ async def search_faqs(query: SearchQuery, request: Request):
                 detail=error_message
             )
 
-        # Call RAG service to process query
-        result = await rag_service.search_and_generate(query.query)
-        
-        # Detect user intent
+        # Detect user intent once and hand it down the RAG pipeline
         intent, _ = rag_service.semantic_search.detect_intent(query.query)
         
+        # Reuse the answer of an equivalent recent query; otherwise run the RAG pipeline
+        result = semantic_cache.get(query.query)
+        if result is None:
+            result = await rag_service.search_and_generate(query.query, intent=intent)
+            semantic_cache.set(query.query, result)
+        
         # Calculate response quality score based on grounding confidence
         response_quality = result.get("grounding_confidence", 0.0)
         
         # Record interaction in memory and analytics (if user_id available from token)
+        # Written after the response is sent; the client doesn't wait on these
         if user_id != "anonymous":
-            try:
-                await memory_service.update_interaction(
-                    user_id=user_id,
-                    topic=intent or "general",
-                    query=query.query,
-                    response_quality=response_quality
-                )
-                
-                # Record analytics to database
-                await rag_service.record_analytics(
-                    user_id=user_id,
-                    query=query.query,
-                    intent=intent or "general",
-                    result=result
-                )
-            except Exception as e:
-                logger.warning(f"Could not record interaction/analytics: {str(e)}")
+            background_tasks.add_task(
+                record_search_interaction,
+                rag_service=rag_service,
+                memory_service=memory_service,
+                user_id=user_id,
+                query=query.query,
+                intent=intent or "general",
+                result=result,
+                response_quality=response_quality
+            )
 
         return SearchResponse(
             question=query.query,
@@ -270,7 +335,8 @@ async def search_faqs(query: SearchQuery, request: Request):
 async def add_faq(
     question: str,
     answer: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Admin endpoint: Add new FAQ
@@ -282,6 +348,9 @@ async def add_faq(
 
         # Create FAQ document
         result = await FAQ.insert(question, answer, embedding)
+        rag_service.invalidate_faq_index()
+        semantic_cache.clear()
+        invalidate_faq_all_cache()
         
         return {"success": True, "faq_id": str(result.inserted_id)}
 
@@ -297,7 +366,8 @@ async def add_faq(
 @router.delete("/{faq_id}")
 async def delete_faq(
     faq_id: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Admin endpoint: Delete FAQ
@@ -309,6 +379,9 @@ async def delete_faq(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="FAQ not found"
             )
+        rag_service.invalidate_faq_index()
+        semantic_cache.clear()
+        invalidate_faq_all_cache()
         return {"success": True, "message": "FAQ deleted"}
 
     except HTTPException:
@@ -323,7 +396,7 @@ async def delete_faq(
 # ========== ANALYTICS ENDPOINTS ==========
 
 @router.get("/analytics/stats")
-async def get_analytics_stats(authorization: str = Header(None)):
+async def get_analytics_stats(user_id: str = Depends(get_current_user_id)):
     """
     Get aggregated analytics stats for current user
     Requires authentication
@@ -340,22 +413,6 @@ async def get_analytics_stats(authorization: str = Header(None)):
     }
     """
     try:
-        if not authorization or not authorization.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authorization required"
-            )
-        
-        token = authorization.replace("Bearer ", "")
-        payload = decode_token(token)
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        user_id = payload.get("sub")
-        
         stats = await Analytics.get_aggregate_stats(user_id)
         return AnalyticsStatsResponse(**stats) if stats else AnalyticsStatsResponse(
             total_queries=0,
@@ -377,7 +434,7 @@ async def get_analytics_stats(authorization: str = Header(None)):
         )
 
 @router.get("/analytics/sentiment")
-async def get_sentiment_distribution(authorization: str = Header(None)):
+async def get_sentiment_distribution(user_id: str = Depends(get_current_user_id)):
     """
     Get sentiment distribution of user's queries
     Requires authentication
@@ -385,22 +442,6 @@ async def get_sentiment_distribution(authorization: str = Header(None)):
     Returns sentiment counts and percentages
     """
     try:
-        if not authorization or not authorization.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authorization required"
-            )
-        
-        token = authorization.replace("Bearer ", "")
-        payload = decode_token(token)
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        user_id = payload.get("sub")
-        
         distribution = await Analytics.get_sentiment_distribution(user_id)
         return SentimentDistributionResponse(**distribution) if distribution else SentimentDistributionResponse(
             positive=0, neutral=0, negative=0, frustrated=0
@@ -418,7 +459,7 @@ async def get_sentiment_distribution(authorization: str = Header(None)):
 @router.get("/analytics/intents")
 async def get_top_intents(
     limit: int = 5,
-    authorization: str = Header(None)
+    user_id: str = Depends(get_current_user_id)
 ):
     """
     Get top intents/topics user has asked about
@@ -430,22 +471,6 @@ async def get_top_intents(
     Returns list of intents with counts
     """
     try:
-        if not authorization or not authorization.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authorization required"
-            )
-        
-        token = authorization.replace("Bearer ", "")
-        payload = decode_token(token)
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        user_id = payload.get("sub")
-        
         intents = await Analytics.get_top_intents(user_id, limit=limit)
         return {"intents": intents, "count": len(intents)}
     
@@ -462,7 +487,7 @@ async def get_top_intents(
 async def get_analytics_history(
     limit: int = 50,
     skip: int = 0,
-    authorization: str = Header(None)
+    user_id: str = Depends(get_current_user_id)
 ):
     """
     Get user's analytics history (recent queries)
@@ -472,33 +497,75 @@ async def get_analytics_history(
     - limit: Records per page (default 50)
     - skip: Records to skip for pagination (default 0)
     
-    Returns paginated list of analytics records
+    Returns paginated list of analytics records, streamed off the Mongo cursor
     """
     try:
-        if not authorization or not authorization.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authorization required"
-            )
-        
-        token = authorization.replace("Bearer ", "")
-        payload = decode_token(token)
-        if not payload:
+        return StreamingResponse(
+            iter_json_envelope(
+                "analytics",
+                Analytics.iter_user_analytics(user_id, limit=limit, skip=skip),
+                fields={"limit": limit, "skip": skip},
+                count_key="count"
+            ),
+            media_type="application/json"
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching analytics history: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching history: {str(e)}"
+        )
+
+
+@router.get("/analytics/dashboard")
+async def get_analytics_dashboard(
+    intents_limit: int = 5,
+    history_limit: int = 50,
+    skip: int = 0,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Get stats, sentiment distribution, top intents and recent history in one call
+    Requires authentication
+    
+    Backed by a single $facet aggregation, so the dashboard needs one request
+    and one database round trip instead of four
+    
+    Query params:
+    - intents_limit: Max intents to return (default 5)
+    - history_limit: History records per page (default 50)
+    - skip: History records to skip for pagination (default 0)
+    """
+    try:
+        dashboard = await Analytics.get_dashboard(
+            user_id,
+            intents_limit=intents_limit,
+            history_limit=history_limit,
+            skip=skip
+        )
+        if not dashboard:
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error fetching dashboard"
             )
         
-        user_id = payload.get("sub")
-        
-        history = await Analytics.get_user_analytics(user_id, limit=limit, skip=skip)
-        return {"analytics": history, "count": len(history), "limit": limit, "skip": skip}
+        return {
+            "stats": AnalyticsStatsResponse(**dashboard["stats"]),
+            "sentiment": SentimentDistributionResponse(**dashboard["sentiment"]),
+            "intents": dashboard["intents"],
+            "history": dashboard["history"],
+            "limit": history_limit,
+            "skip": skip
+        }
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching analytics history: {str(e)}")
+        logger.error(f"Error fetching analytics dashboard: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching history: {str(e)}"
-        )
\ No newline at end of file
+            detail=f"Error fetching dashboard: {str(e)}"
+        )
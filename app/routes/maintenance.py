@@ -1,50 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
-from app.database import get_database
+from app.utils.deps import get_vehicle_model, get_maintenance_model
 from app.models.maintenance import Maintenance
 from app.models.vehicle import Vehicle
 from app.schemas.maintenance import MaintenanceCreate, MaintenanceUpdate, MaintenanceResponse
-from app.utils.auth import decode_token
+from app.utils.auth_dep import get_current_user_id
+from app.utils.ids import parse_object_id
 
 router = APIRouter(prefix="/api/maintenance", tags=["maintenance"])
 
 
-def get_current_user_id(authorization: str = Header(None)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-    
-    token = authorization.replace("Bearer ", "")
-    payload = decode_token(token)
-    
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    return payload.get("sub")
-
-
 @router.get("/vehicle/{vehicle_id}", response_model=List[MaintenanceResponse])
 async def get_maintenance_records(
     vehicle_id: str,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    vehicle_model: Vehicle = Depends(get_vehicle_model),
+    maintenance_model: Maintenance = Depends(get_maintenance_model)
 ):
-    # Verify vehicle belongs to user
-    vehicle_model = Vehicle(db)
-    vehicle = vehicle_model.get_by_id(vehicle_id, user_id)
-    if not vehicle:
+    parse_object_id(vehicle_id, "Invalid vehicle ID")
+
+    # Ownership check and fetch run concurrently; records are discarded
+    # if the vehicle turns out not to belong to the user
+    vehicle_exists, records = await asyncio.gather(
+        vehicle_model.exists(vehicle_id, user_id),
+        maintenance_model.get_by_vehicle(vehicle_id, user_id),
+    )
+    if not vehicle_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vehicle not found"
         )
-    
-    maintenance_model = Maintenance(db)
-    records = maintenance_model.get_by_vehicle(vehicle_id, user_id)
     return records
 
 
@@ -53,20 +40,20 @@ async def create_maintenance_record(
     vehicle_id: str,
     maintenance: MaintenanceCreate,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    vehicle_model: Vehicle = Depends(get_vehicle_model),
+    maintenance_model: Maintenance = Depends(get_maintenance_model)
 ):
-    # Verify vehicle belongs to user
-    vehicle_model = Vehicle(db)
-    vehicle = vehicle_model.get_by_id(vehicle_id, user_id)
-    if not vehicle:
+    parse_object_id(vehicle_id, "Invalid vehicle ID")
+
+    # Verify vehicle belongs to user (must precede the insert)
+    if not await vehicle_model.exists(vehicle_id, user_id):
         # More detailed error for debugging
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Vehicle not found (id: {vehicle_id})"
         )
     
-    maintenance_model = Maintenance(db)
-    created_record = maintenance_model.create(user_id, vehicle_id, maintenance.dict())
+    created_record = await maintenance_model.create(user_id, vehicle_id, maintenance.model_dump())
     return created_record
 
 
@@ -74,10 +61,11 @@ async def create_maintenance_record(
 async def get_maintenance_record(
     maintenance_id: str,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    maintenance_model: Maintenance = Depends(get_maintenance_model)
 ):
-    maintenance_model = Maintenance(db)
-    record = maintenance_model.get_by_id(maintenance_id, user_id)
+    parse_object_id(maintenance_id, "Invalid maintenance ID")
+
+    record = await maintenance_model.get_by_id(maintenance_id, user_id)
     
     if not record:
         raise HTTPException(
@@ -93,29 +81,20 @@ async def update_maintenance_record(
     maintenance_id: str,
     maintenance_update: MaintenanceUpdate,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    maintenance_model: Maintenance = Depends(get_maintenance_model)
 ):
-    maintenance_model = Maintenance(db)
+    parse_object_id(maintenance_id, "Invalid maintenance ID")
+
+    # Update and fetch in one atomic round trip; the user_id filter doubles as the ownership check
+    update_data = maintenance_update.model_dump(exclude_unset=True, exclude_none=True)
+    updated_record = await maintenance_model.update_and_return(maintenance_id, user_id, update_data)
     
-    # Check if record exists
-    existing_record = maintenance_model.get_by_id(maintenance_id, user_id)
-    if not existing_record:
+    if not updated_record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Maintenance record not found"
         )
     
-    # Update record
-    update_data = {k: v for k, v in maintenance_update.dict().items() if v is not None}
-    success = maintenance_model.update(maintenance_id, user_id, update_data)
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to update maintenance record"
-        )
-    
-    updated_record = maintenance_model.get_by_id(maintenance_id, user_id)
     return updated_record
 
 
@@ -123,11 +102,11 @@ async def update_maintenance_record(
 async def delete_maintenance_record(
     maintenance_id: str,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    maintenance_model: Maintenance = Depends(get_maintenance_model)
 ):
-    maintenance_model = Maintenance(db)
-    
-    success = maintenance_model.delete(maintenance_id, user_id)
+    parse_object_id(maintenance_id, "Invalid maintenance ID")
+
+    success = await maintenance_model.delete(maintenance_id, user_id)
     
     if not success:
         raise HTTPException(
@@ -1,19 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from app.database import get_database
+from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi.responses import ORJSONResponse
+from app.utils.deps import get_public_contact_model
 from app.models.public_contact import PublicContactInquiry
 from app.schemas.public_contact import PublicContactCreate, PublicContactResponse
-from app.services.email_service import ResendEmailService
+from app.services.email_service import ResendEmailService, get_http_client
+from app.services.redis_client import sliding_window_hit, fixed_window_hit
+import asyncio
+import hashlib
 import logging
+import re
+from pathlib import Path
 from typing import Optional
 import os
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import escape
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/public/contact", tags=["public-contact"])
+router = APIRouter(prefix="/api/public/contact", tags=["public-contact"], default_response_class=ORJSONResponse)
 
 # Initialize email service
 email_service = ResendEmailService()
 
+# Email settings are fixed for the process, so resolve them once at import
+_EMAIL_ENABLED = email_service.enabled
+_RESEND_URL = email_service.api_url
+_RESEND_HEADERS = email_service.headers
+_USER_FROM = f"Fleety Support <{email_service.from_email}>"
+_ADMIN_FROM = f"Fleety System <{email_service.from_email}>"
+_ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@fleety.local")
+
+# Caps concurrent Resend requests so a burst of inquiries can't open an
+# unbounded number of sockets or trip Resend's own throttling. Created on
+# first use: before Python 3.10 a Semaphore binds to the loop current at
+# construction, which at import time isn't the one uvicorn runs
+_EMAIL_CONCURRENCY = 20
+_email_sem: Optional[asyncio.Semaphore] = None
+
+
+def _get_email_sem() -> asyncio.Semaphore:
+    global _email_sem
+    if _email_sem is None:
+        _email_sem = asyncio.Semaphore(_EMAIL_CONCURRENCY)
+    return _email_sem
+
+# Email templates are parsed once at import; autoescape keeps user-submitted
+# fields (name, subject, message) from injecting markup into the emails
+_templates = Environment(
+    loader=FileSystemLoader(Path(__file__).parent.parent / "templates"),
+    autoescape=select_autoescape(["html"]),
+    enable_async=True
+)
+ADMIN_TEMPLATE = _templates.get_template("public_contact_admin.html")
+
+# The confirmation email has a single placeholder, so it is split once into
+# static halves and assembled by concatenation instead of a template render
+_USER_PREFIX, _USER_SUFFIX = _templates.loader.get_source(
+    _templates, "public_contact_user.html"
+)[0].split("{{ name }}")
+
+# Rate limits: submissions allowed per email / per client IP in a 24h window
+RATE_LIMIT_WINDOW = 24 * 60 * 60
+EMAIL_RATE_LIMIT = 3
+IP_RATE_LIMIT = 10
+
+# Crawler/scraper signatures only: API and server-side integrations (curl,
+# HTTP client libraries, no User-Agent at all) may post here legitimately
+_BOT_UA_RE = re.compile(
+    r"bot[/;)-]|\bbot\b|crawl|spider|slurp|scrapy|headlesschrome|phantomjs",
+    re.IGNORECASE
+)
+
 
 def get_client_ip(request: Request) -> str:
     """Extract client IP address from request"""
@@ -27,11 +84,21 @@ def get_user_agent(request: Request) -> str:
     return request.headers.get("user-agent", "unknown")
 
 
+def _is_obvious_spam(inquiry_data: PublicContactCreate, user_agent: str) -> bool:
+    """Cheap checks that reject a submission before any rate-limit lookup"""
+    return (
+        not inquiry_data.agreeToPDPA
+        or not inquiry_data.agreeToTermsAndPrivacy
+        or _BOT_UA_RE.search(user_agent) is not None
+    )
+
+
 @router.post("", response_model=PublicContactResponse, status_code=201)
 async def create_public_contact_inquiry(
     inquiry_data: PublicContactCreate,
     request: Request,
-    db=Depends(get_database)
+    background_tasks: BackgroundTasks,
+    inquiry_model: PublicContactInquiry = Depends(get_public_contact_model)
 ):
     """
     Create a new public contact inquiry from landing page
@@ -46,20 +113,43 @@ async def create_public_contact_inquiry(
     
     logger.info(f"New contact inquiry from {inquiry_data.email} (IP: {client_ip})")
     
-    # Rate limiting: Check if email has submitted too many inquiries in last 24 hours
-    inquiry_model = PublicContactInquiry(db)
-    inquiry_count = inquiry_model.count_by_email(inquiry_data.email, hours=24)
+    # Reject obvious spam before touching Redis or MongoDB
+    if _is_obvious_spam(inquiry_data, user_agent):
+        logger.warning(f"Rejected inquiry from {inquiry_data.email} (IP: {client_ip}, UA: {user_agent})")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unable to process this inquiry. Please submit it through the contact form."
+        )
+    
+    # Rate limiting in Redis: a sliding 24h window per email (keyed by a short
+    # hash, so addresses aren't stored in Redis) and a cheaper fixed-window
+    # INCR counter per IP, which stays O(1) in memory during spam bursts.
+    # Without Redis, fall back to counting this email's inquiries in MongoDB.
+    email_key = hashlib.blake2b(inquiry_data.email.lower().encode(), digest_size=8).hexdigest()
+    email_count, ip_count = await asyncio.gather(
+        sliding_window_hit(f"pc:rl:{email_key}", RATE_LIMIT_WINDOW),
+        fixed_window_hit(f"pc:rl:ip:{client_ip}", RATE_LIMIT_WINDOW)
+    )
+    if email_count is None:
+        email_count = await inquiry_model.count_by_email(inquiry_data.email, hours=24)
     
-    if inquiry_count >= 3:
+    if email_count >= EMAIL_RATE_LIMIT:
         logger.warning(f"Rate limit exceeded for email: {inquiry_data.email}")
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many inquiries from this email. Please try again later."
         )
     
+    if ip_count is not None and ip_count >= IP_RATE_LIMIT:
+        logger.warning(f"Rate limit exceeded for IP: {client_ip}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many inquiries from this network. Please try again later."
+        )
+    
     try:
         # Create the inquiry
-        created_inquiry = inquiry_model.create(
+        created_inquiry = await inquiry_model.create(
             name=inquiry_data.name,
             email=inquiry_data.email,
             phone=inquiry_data.phone or "",
@@ -71,11 +161,9 @@ async def create_public_contact_inquiry(
             user_agent=user_agent
         )
         
-        # Send confirmation email to user
-        await send_user_confirmation_email(inquiry_data.name, inquiry_data.email)
-        
-        # Send admin notification email
-        await send_admin_notification_email(inquiry_data)
+        # Emails go out after the response is sent; both senders log and
+        # swallow their own errors, so a failed email never fails the inquiry
+        background_tasks.add_task(send_inquiry_emails, inquiry_data)
         
         logger.info(f"Contact inquiry created successfully: {created_inquiry['_id']}")
         
@@ -93,82 +181,41 @@ async def create_public_contact_inquiry(
         )
 
 
+async def send_inquiry_emails(inquiry_data: PublicContactCreate) -> None:
+    """Send the user confirmation and admin notification concurrently"""
+    # return_exceptions so one failed send never cancels the other
+    await asyncio.gather(
+        send_user_confirmation_email(inquiry_data.name, inquiry_data.email),
+        send_admin_notification_email(inquiry_data),
+        return_exceptions=True
+    )
+
+
 async def send_user_confirmation_email(name: str, email: str) -> bool:
     """Send confirmation email to the user who submitted the form"""
     
-    html_content = f"""
-    <html>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', sans-serif; background-color: #f4f4f4; padding: 20px;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: white; border-radius: 8px; padding: 40px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                <div style="text-align: center; margin-bottom: 30px;">
-                    <img src="http://localhost:8000/public/FL_Logo.svg" alt="Fleety Logo" style="height: 50px; margin-bottom: 10px;">
-                    <p style="color: #666; font-size: 12px; margin: 0; font-style: italic;">Smarter Fleet Management</p>
-                </div>
-                
-                <h1 style="color: #000; margin: 0 0 20px 0; font-size: 28px;">We've Received Your Message</h1>
-                
-                <p style="color: #555; font-size: 16px; line-height: 1.6; margin: 0 0 20px 0;">
-                    Hi {name},
-                </p>
-                
-                <p style="color: #555; font-size: 16px; line-height: 1.6; margin: 0 0 20px 0;">
-                    Thank you for reaching out to Fleety! We've received your inquiry and our team will review it shortly.
-                </p>
-                
-                <p style="color: #555; font-size: 16px; line-height: 1.6; margin: 0 0 20px 0;">
-                    We typically respond to all inquiries within 24 hours during business hours. If your message is urgent, please feel free to call our support team.
-                </p>
-                
-                <div style="background-color: #f9f9f9; border-left: 4px solid #000; padding: 20px; margin: 30px 0;">
-                    <h3 style="color: #000; margin: 0 0 10px 0;">Quick Links:</h3>
-                    <ul style="color: #555; font-size: 14px; line-height: 1.8; margin: 0; padding-left: 20px;">
-                        <li><a href="http://localhost:3000/about" style="color: #0066cc; text-decoration: none;">Learn about Fleety</a></li>
-                        <li><a href="http://localhost:3000/blog" style="color: #0066cc; text-decoration: none;">Read our Blog</a></li>
-                        <li><a href="http://localhost:3000" style="color: #0066cc; text-decoration: none;">Back to Homepage</a></li>
-                    </ul>
-                </div>
-                
-                <p style="color: #555; font-size: 16px; line-height: 1.6; margin: 0 0 30px 0;">
-                    Best regards,<br>
-                    The Fleety Team
-                </p>
-                
-                <div style="border-top: 1px solid #eee; padding-top: 20px; margin-top: 20px;">
-                    <p style="color: #999; font-size: 12px; margin: 0;">
-                        © 2025 Fleety. All rights reserved.
-                    </p>
-                </div>
-            </div>
-        </body>
-    </html>
-    """
-    
-    payload = {
-        "from": f"Fleety Support <{email_service.from_email}>",
-        "to": email,
-        "subject": "We've Received Your Inquiry - Fleety",
-        "html": html_content
-    }
+    if not _EMAIL_ENABLED:
+        logger.warning("Email service not configured - skipping confirmation email")
+        return False
     
     try:
-        if email_service.enabled:
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    email_service.api_url,
-                    json=payload,
-                    headers={"Authorization": f"Bearer {email_service.api_key}"},
-                    timeout=10.0
-                )
-            
-            if response.status_code == 200:
-                logger.info(f"Confirmation email sent to {email}")
-                return True
-            else:
-                logger.error(f"Failed to send confirmation email: {response.status_code}")
-                return False
+        html_content = _USER_PREFIX + str(escape(name)) + _USER_SUFFIX
+        
+        payload = {
+            "from": _USER_FROM,
+            "to": email,
+            "subject": "We've Received Your Inquiry - Fleety",
+            "html": html_content
+        }
+        
+        async with _get_email_sem():
+            response = await get_http_client().post(_RESEND_URL, json=payload, headers=_RESEND_HEADERS)
+        
+        if response.status_code == 200:
+            logger.info(f"Confirmation email sent to {email}")
+            return True
         else:
-            logger.warning("Email service not configured - skipping confirmation email")
+            logger.error(f"Failed to send confirmation email: {response.status_code}")
             return False
             
     except Exception as e:
@@ -176,91 +223,44 @@ async def send_user_confirmation_email(name: str, email: str) -> bool:
         return False
 
 
+def _admin_email_context(inquiry_data: PublicContactCreate) -> dict:
+    """Escape the submitted fields once; autoescape leaves Markup values untouched"""
+    return {
+        "name": escape(inquiry_data.name),
+        "email": escape(inquiry_data.email),
+        "phone": escape(inquiry_data.phone or "Not provided"),
+        "subject": escape(inquiry_data.subject),
+        "message": escape(inquiry_data.message),
+        "agreeToPDPA": inquiry_data.agreeToPDPA,
+        "agreeToTermsAndPrivacy": inquiry_data.agreeToTermsAndPrivacy,
+    }
+
+
 async def send_admin_notification_email(inquiry_data: PublicContactCreate) -> bool:
     """Send notification email to admin/sales team"""
     
-    admin_email = os.getenv("ADMIN_EMAIL", "admin@fleety.local")
-    
-    html_content = f"""
-    <html>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', sans-serif; background-color: #f4f4f4; padding: 20px;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: white; border-radius: 8px; padding: 40px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                <div style="text-align: center; margin-bottom: 30px;">
-                    <img src="http://localhost:8000/public/FL_Logo.svg" alt="Fleety Logo" style="height: 50px; margin-bottom: 10px;">
-                    <p style="color: #666; font-size: 12px; margin: 0; font-style: italic;">New Contact Inquiry</p>
-                </div>
-                
-                <h1 style="color: #000; margin: 0 0 20px 0; font-size: 28px;">New Landing Page Inquiry</h1>
-                
-                <div style="background-color: #f9f9f9; border: 1px solid #ddd; border-radius: 8px; padding: 20px; margin: 20px 0;">
-                    <h3 style="color: #000; margin: 0 0 15px 0;">Inquiry Details:</h3>
-                    <table style="width: 100%; border-collapse: collapse;">
-                        <tr style="border-bottom: 1px solid #eee;">
-                            <td style="padding: 10px; font-weight: bold; color: #333; width: 120px;">Name:</td>
-                            <td style="padding: 10px; color: #555;">{inquiry_data.name}</td>
-                        </tr>
-                        <tr style="border-bottom: 1px solid #eee;">
-                            <td style="padding: 10px; font-weight: bold; color: #333;">Email:</td>
-                            <td style="padding: 10px; color: #555;"><a href="mailto:{inquiry_data.email}" style="color: #0066cc; text-decoration: none;">{inquiry_data.email}</a></td>
-                        </tr>
-                        <tr style="border-bottom: 1px solid #eee;">
-                            <td style="padding: 10px; font-weight: bold; color: #333;">Phone:</td>
-                            <td style="padding: 10px; color: #555;">{inquiry_data.phone or 'Not provided'}</td>
-                        </tr>
-                        <tr style="border-bottom: 1px solid #eee;">
-                            <td style="padding: 10px; font-weight: bold; color: #333;">Subject:</td>
-                            <td style="padding: 10px; color: #555;">{inquiry_data.subject}</td>
-                        </tr>
-                    </table>
-                </div>
-                
-                <h3 style="color: #000; margin: 20px 0 10px 0;">Message:</h3>
-                <div style="background-color: #f9f9f9; border: 1px solid #ddd; border-radius: 8px; padding: 20px; margin: 20px 0;">
-                    <p style="color: #555; white-space: pre-wrap; margin: 0;">{inquiry_data.message}</p>
-                </div>
-                
-                <div style="background-color: #fff3cd; border: 1px solid #ffc107; border-radius: 8px; padding: 15px; margin: 20px 0;">
-                    <p style="color: #856404; margin: 0; font-size: 14px;">
-                        <strong>Consent:</strong> PDPA: {inquiry_data.agreeToPDPA} | Terms & Privacy: {inquiry_data.agreeToTermsAndPrivacy}
-                    </p>
-                </div>
-                
-                <div style="border-top: 1px solid #eee; padding-top: 20px; margin-top: 20px;">
-                    <p style="color: #999; font-size: 12px; margin: 0;">
-                        This is an automated notification. Please respond to the inquiry through your support system.
-                    </p>
-                </div>
-            </div>
-        </body>
-    </html>
-    """
-    
-    payload = {
-        "from": f"Fleety System <{email_service.from_email}>",
-        "to": admin_email,
-        "subject": f"New Contact Inquiry from {inquiry_data.name}",
-        "html": html_content
-    }
+    if not _EMAIL_ENABLED:
+        logger.warning("Email service not configured - skipping admin notification")
+        return False
     
     try:
-        if email_service.enabled:
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    email_service.api_url,
-                    json=payload,
-                    headers={"Authorization": f"Bearer {email_service.api_key}"},
-                    timeout=10.0
-                )
-            
-            if response.status_code == 200:
-                logger.info(f"Admin notification sent to {admin_email}")
-                return True
-            else:
-                logger.error(f"Failed to send admin notification: {response.status_code}")
-                return False
+        html_content = await ADMIN_TEMPLATE.render_async(**_admin_email_context(inquiry_data))
+        
+        payload = {
+            "from": _ADMIN_FROM,
+            "to": _ADMIN_EMAIL,
+            "subject": f"New Contact Inquiry from {inquiry_data.name}",
+            "html": html_content
+        }
+        
+        async with _get_email_sem():
+            response = await get_http_client().post(_RESEND_URL, json=payload, headers=_RESEND_HEADERS)
+        
+        if response.status_code == 200:
+            logger.info(f"Admin notification sent to {_ADMIN_EMAIL}")
+            return True
         else:
-            logger.warning("Email service not configured - skipping admin notification")
+            logger.error(f"Failed to send admin notification: {response.status_code}")
             return False
             
     except Exception as e:
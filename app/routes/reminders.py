@@ -1,51 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from typing import List
-from app.database import get_database
+from app.utils.deps import get_vehicle_model, get_reminder_model
 from app.models.reminder import Reminder
 from app.models.vehicle import Vehicle
 from app.schemas.reminder import ReminderCreate, ReminderUpdate, ReminderResponse
-from app.utils.auth import decode_token
+from app.utils.auth_dep import get_current_user_id
 
-router = APIRouter(prefix="/api/reminders", tags=["reminders"])
-
-
-def get_current_user_id(authorization: str = Header(None)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-    
-    token = authorization.replace("Bearer ", "")
-    payload = decode_token(token)
-    
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    return payload.get("sub")
+router = APIRouter(prefix="/api/reminders", tags=["reminders"], default_response_class=ORJSONResponse)
 
 
 @router.get("/vehicle/{vehicle_id}", response_model=List[ReminderResponse])
 async def get_reminders(
     vehicle_id: str,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    reminder_model: Reminder = Depends(get_reminder_model),
+    vehicle_model: Vehicle = Depends(get_vehicle_model)
 ):
     # Verify vehicle belongs to user
-    vehicle_model = Vehicle(db)
-    vehicle = vehicle_model.get_by_id(vehicle_id, user_id)
-    if not vehicle:
+    if not await vehicle_model.exists(vehicle_id, user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vehicle not found"
         )
     
-    reminder_model = Reminder(db)
-    reminders = reminder_model.get_by_vehicle(vehicle_id, user_id)
-    return reminders
+    # Documents already match ReminderResponse, so skip per-item model
+    # validation and serialize the list straight to orjson
+    reminders = await reminder_model.get_by_vehicle(vehicle_id, user_id)
+    return ORJSONResponse(reminders)
 
 
 @router.post("/vehicle/{vehicle_id}", response_model=ReminderResponse)
@@ -53,19 +35,17 @@ async def create_reminder(
     vehicle_id: str,
     reminder: ReminderCreate,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    reminder_model: Reminder = Depends(get_reminder_model),
+    vehicle_model: Vehicle = Depends(get_vehicle_model)
 ):
     # Verify vehicle belongs to user
-    vehicle_model = Vehicle(db)
-    vehicle = vehicle_model.get_by_id(vehicle_id, user_id)
-    if not vehicle:
+    if not await vehicle_model.exists(vehicle_id, user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Vehicle not found (id: {vehicle_id})"
         )
     
-    reminder_model = Reminder(db)
-    created_reminder = reminder_model.create(user_id, vehicle_id, reminder.dict())
+    created_reminder = await reminder_model.create(user_id, vehicle_id, reminder.model_dump())
     return created_reminder
 
 
@@ -73,10 +53,9 @@ async def create_reminder(
 async def get_reminder(
     reminder_id: str,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    reminder_model: Reminder = Depends(get_reminder_model)
 ):
-    reminder_model = Reminder(db)
-    reminder = reminder_model.get_by_id(reminder_id, user_id)
+    reminder = await reminder_model.get_by_id(reminder_id, user_id)
     
     if not reminder:
         raise HTTPException(
@@ -92,29 +71,18 @@ async def update_reminder(
     reminder_id: str,
     reminder_update: ReminderUpdate,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    reminder_model: Reminder = Depends(get_reminder_model)
 ):
-    reminder_model = Reminder(db)
+    # Update and read back in one round trip, scoped to the owner
+    update_data = reminder_update.model_dump(exclude_unset=True)
+    updated_reminder = await reminder_model.update_and_return(reminder_id, user_id, update_data)
     
-    # Check if reminder exists
-    existing_reminder = reminder_model.get_by_id(reminder_id, user_id)
-    if not existing_reminder:
+    if not updated_reminder:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Reminder not found"
         )
     
-    # Update reminder
-    update_data = {k: v for k, v in reminder_update.dict().items() if v is not None}
-    success = reminder_model.update(reminder_id, user_id, update_data)
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to update reminder"
-        )
-    
-    updated_reminder = reminder_model.get_by_id(reminder_id, user_id)
     return updated_reminder
 
 
@@ -122,11 +90,9 @@ async def update_reminder(
 async def delete_reminder(
     reminder_id: str,
     user_id: str = Depends(get_current_user_id),
-    db=Depends(get_database)
+    reminder_model: Reminder = Depends(get_reminder_model)
 ):
-    reminder_model = Reminder(db)
-    
-    success = reminder_model.delete(reminder_id, user_id)
+    success = await reminder_model.delete(reminder_id, user_id)
     
     if not success:
         raise HTTPException(
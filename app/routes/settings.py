@@ -1,47 +1,31 @@
-from fastapi import APIRouter, HTTPException, Header, status, Depends
-from app.database import get_database
-from app.models.user import User
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse, Response
+from app.database import get_database, get_async_database
+from app.models.user import User, invalidate_cached_user
 from app.schemas.settings import PreferencesUpdate, PreferencesResponse, UserSettingsResponse, FeaturesResponse
-from app.utils.auth import decode_token
+from app.utils.auth_dep import get_current_user_id
 from bson import ObjectId
+import anyio
 import logging
+import orjson
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/settings", tags=["settings"])
+router = APIRouter(prefix="/api/settings", tags=["settings"], default_response_class=ORJSONResponse)
 
-
-def get_current_user_id(authorization: str = Header(None)):
-    """Extract and verify user_id from Bearer token"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header missing"
-        )
-    
-    token = authorization.replace("Bearer ", "")
-    payload = decode_token(token)
-    
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    return payload.get("sub")
+# Feature flags are fixed for the life of the process, so the response body
+# is built and serialized once at import
+_FEATURES = FeaturesResponse(
+    enable_gemini_3_pro_preview=bool(settings.enable_gemini_3_pro_preview)
+)
+_FEATURES_JSON = orjson.dumps(_FEATURES.model_dump())
 
 
 @router.get("/features", response_model=FeaturesResponse)
 async def get_features():
     """Get global feature flags for all clients."""
-    try:
-        return FeaturesResponse(
-            enable_gemini_3_pro_preview=bool(settings.enable_gemini_3_pro_preview)
-        )
-    except Exception as e:
-        logger.error(f"Error getting features: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    return Response(_FEATURES_JSON, media_type="application/json")
 
 
 @router.get("/preferences", response_model=UserSettingsResponse)
@@ -50,7 +34,7 @@ async def get_preferences(user_id: str = Depends(get_current_user_id)):
     try:
         db = get_database()
         user_model = User(db)
-        user = user_model.get_by_id(user_id)
+        user = await anyio.to_thread.run_sync(user_model.get_by_id_cached, user_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -65,12 +49,13 @@ async def get_preferences(user_id: str = Depends(get_current_user_id)):
             "distance_unit": stored_prefs.get("distance_unit", "miles")
         }
         
-        return {
+        # Already shaped like UserSettingsResponse; bypass response validation
+        return ORJSONResponse({
             "id": str(user["_id"]),
             "email": user["email"],
             "full_name": user["full_name"],
             "preferences": preferences
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -87,31 +72,21 @@ async def update_preferences(
     try:
         db = get_database()
         user_model = User(db)
-        user = user_model.get_by_id(user_id)
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
         
         # Update only provided fields
-        update_dict = {}
-        if data.email_notifications is not None:
-            update_dict["preferences.email_notifications"] = data.email_notifications
-        if data.reminders_enabled is not None:
-            update_dict["preferences.reminders_enabled"] = data.reminders_enabled
-        if data.theme is not None:
-            update_dict["preferences.theme"] = data.theme
-        if data.currency is not None:
-            update_dict["preferences.currency"] = data.currency
-        if data.distance_unit is not None:
-            update_dict["preferences.distance_unit"] = data.distance_unit
+        update_dict = {f"preferences.{k}": v for k, v in data.model_dump(exclude_unset=True).items()}
         
+        # Update and read back in a single findAndModify
         if update_dict:
-            success = user_model.update(user_id, update_dict)
-            if not success:
-                raise HTTPException(status_code=400, detail="Failed to update preferences")
+            updated_user = await anyio.to_thread.run_sync(
+                user_model.find_and_update_preferences, user_id, update_dict
+            )
+        else:
+            updated_user = await anyio.to_thread.run_sync(user_model.get_by_id_cached, user_id)
+        
+        if not updated_user:
+            raise HTTPException(status_code=404, detail="User not found")
         
-        # Get updated user
-        updated_user = user_model.get_by_id(user_id)
         # Merge stored preferences with defaults
         stored_prefs = updated_user.get("preferences", {})
         preferences = {
@@ -141,7 +116,7 @@ async def get_account_info(user_id: str = Depends(get_current_user_id)):
     try:
         db = get_database()
         user_model = User(db)
-        user = user_model.get_by_id(user_id)
+        user = await anyio.to_thread.run_sync(user_model.get_by_id_cached, user_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -165,22 +140,23 @@ async def get_account_info(user_id: str = Depends(get_current_user_id)):
 async def delete_account(user_id: str = Depends(get_current_user_id)):
     """Delete user account"""
     try:
-        db = get_database()
+        db = get_async_database()
         
-        # Get all vehicles for this user to delete their maintenance and reminders
-        vehicles = list(db["vehicles"].find({"user_id": user_id}))
-        vehicle_ids = [str(v["_id"]) for v in vehicles]
+        # Get all vehicle ids for this user to delete their maintenance and reminders
+        vehicle_ids = [str(v["_id"]) async for v in db["vehicles"].find({"user_id": user_id}, {"_id": 1})]
         
-        # Delete maintenance and reminders for each vehicle
-        for vehicle_id in vehicle_ids:
-            db["maintenance"].delete_many({"vehicle_id": vehicle_id})
-            db["reminders"].delete_many({"vehicle_id": vehicle_id})
+        # Delete maintenance and reminders for all vehicles at once
+        if vehicle_ids:
+            vehicle_filter = {"vehicle_id": {"$in": vehicle_ids}}
+            await db["maintenance"].delete_many(vehicle_filter)
+            await db["reminders"].delete_many(vehicle_filter)
         
         # Delete vehicles
-        db["vehicles"].delete_many({"user_id": user_id})
+        await db["vehicles"].delete_many({"user_id": user_id})
         
         # Delete user
-        result = db["users"].delete_one({"_id": ObjectId(user_id)})
+        result = await db["users"].delete_one({"_id": ObjectId(user_id)})
+        invalidate_cached_user(user_id)
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
@@ -2,19 +2,27 @@
 Stripe Routes for Fleety Payment Integration
 Handles Stripe Checkout Sessions and Webhooks
 """
+import asyncio
 import os
+import orjson
 import stripe
 import logging
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Literal, Optional
 from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
+from fastapi.responses import Response
 from pydantic import BaseModel, Field, EmailStr
+from pymongo import IndexModel
 
+from app.config import settings
+from app.database import get_database
+from app.services.redis_client import SharedCache
 from app.models.subscription import (
     Subscription, 
     SubscriptionCreate, 
     EnterpriseLead, 
-    EnterpriseLeadCreate
+    EnterpriseLeadCreate,
+    WebhookEvent
 )
 
 logger = logging.getLogger(__name__)
@@ -22,9 +30,21 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/stripe", tags=["Stripe"])
 
 # Initialize Stripe
+# stripe-python is synchronous: every SDK call below goes through
+# asyncio.to_thread so a slow Stripe round-trip doesn't stall the event loop
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:8080")
+CHECKOUT_SUCCESS_URL = f"{FRONTEND_URL}/checkout/success?session_id={{CHECKOUT_SESSION_ID}}"
+CHECKOUT_CANCEL_URL = f"{FRONTEND_URL}/checkout/cancelled"
+BILLING_RETURN_URL = f"{FRONTEND_URL}/billing"
+# Webhook processing tasks still in flight (kept referenced so they aren't GC'd)
+_webhook_tasks = set()
+
+# Slim Stripe subscription lookups, shared through Redis when REDIS_URL is set
+# and cached per process otherwise. Write paths invalidate explicitly.
+SUBSCRIPTION_CACHE_TTL = 600
+_subscription_cache = SharedCache(maxsize=1024, ttl=SUBSCRIPTION_CACHE_TTL)
 
 # Stripe Price IDs - Set these in your .env file
 # These are created in your Stripe Dashboard
@@ -42,10 +62,74 @@ PLAN_PRICES = {
 }
 
 
+# Pricing plans are static, so the /plans body is built and serialized once
+_PLANS_RESPONSE: dict = {
+    "plans": [
+        {
+            "id": "starter",
+            "name": "Starter",
+            "price_per_vehicle": 19.90,
+            "currency": "MYR",
+            "description": "Perfect for small local fleets.",
+            "features": [
+                "Maintenance logging per vehicle",
+                "Date & mileage-based reminders",
+                "Cost tracking per vehicle",
+                "Basic email alerts",
+                "Up to 3 fleet managers",
+                "Monthly cost reports",
+                "CSV exports"
+            ]
+        },
+        {
+            "id": "pro",
+            "name": "Professional",
+            "price_per_vehicle": 34.90,
+            "currency": "MYR",
+            "description": "For growing fleets needing advanced features.",
+            "popular": True,
+            "features": [
+                "Everything in Starter +",
+                "Unlimited fleet managers",
+                "SMS alerts (via Twilio)",
+                "Receipt photo storage (10GB)",
+                "Driver assignment tracking",
+                "Fuel cost tracking",
+                "Advanced analytics & trends",
+                "Monthly maintenance forecasting",
+                "Preventive maintenance scheduling",
+                "API access (read-only)"
+            ]
+        },
+        {
+            "id": "enterprise",
+            "name": "Enterprise",
+            "price_per_vehicle": 49.90,
+            "currency": "MYR",
+            "description": "Full control for large organizations.",
+            "features": [
+                "Everything in Professional +",
+                "Unlimited receipt storage (100GB)",
+                "Custom workshop integrations",
+                "Multi-location support",
+                "Full API access (read/write)",
+                "Webhook integrations",
+                "Custom reports & dashboards",
+                "Dedicated account manager",
+                "Priority phone support (24/5)",
+                "Service history exports for resale",
+                "Insurance claim integration"
+            ]
+        }
+    ]
+}
+_PLANS_JSON = orjson.dumps(_PLANS_RESPONSE)
+
+
 # Request/Response Models
 class CheckoutRequest(BaseModel):
     """Request body for creating checkout session"""
-    plan_id: str = Field(..., pattern="^(starter|pro|enterprise)$")
+    plan_id: Literal["starter", "pro", "enterprise"]
     vehicle_count: int = Field(..., ge=1, le=500)
     user_email: Optional[str] = None
     user_id: Optional[str] = None
@@ -62,7 +146,7 @@ class EnterpriseContactRequest(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     email: EmailStr
     company_name: str = Field(..., min_length=2, max_length=200)
-    company_size: str = Field(..., pattern="^(1-10|11-50|51-200|201-500|500\\+)$")
+    company_size: Literal["1-10", "11-50", "51-200", "201-500", "500+"]
     fleet_size: int = Field(..., ge=1, le=10000)
     message: Optional[str] = Field(None, max_length=1000)
 
@@ -89,16 +173,18 @@ async def create_checkout_session(request: CheckoutRequest):
     - **user_id**: Optional user ID for tracking
     """
     try:
-        if request.plan_id not in STRIPE_PRICE_IDS:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid plan_id: {request.plan_id}"
-            )
-
         price_id = STRIPE_PRICE_IDS[request.plan_id]
         
+        # Same metadata on the session and on the subscription it creates
+        metadata = {
+            "plan_id": request.plan_id,
+            "vehicle_count": str(request.vehicle_count),
+            "user_id": request.user_id or "anonymous",
+        }
+        
         # Create Stripe Checkout Session
-        checkout_session = stripe.checkout.Session.create(
+        checkout_session = await asyncio.to_thread(
+            stripe.checkout.Session.create,
             mode="subscription",
             payment_method_types=["card"],
             line_items=[
@@ -107,21 +193,11 @@ async def create_checkout_session(request: CheckoutRequest):
                     "quantity": request.vehicle_count,
                 }
             ],
-            success_url=f"{FRONTEND_URL}/checkout/success?session_id={{CHECKOUT_SESSION_ID}}",
-            cancel_url=f"{FRONTEND_URL}/checkout/cancelled",
+            success_url=CHECKOUT_SUCCESS_URL,
+            cancel_url=CHECKOUT_CANCEL_URL,
             customer_email=request.user_email,
-            metadata={
-                "plan_id": request.plan_id,
-                "vehicle_count": str(request.vehicle_count),
-                "user_id": request.user_id or "anonymous",
-            },
-            subscription_data={
-                "metadata": {
-                    "plan_id": request.plan_id,
-                    "vehicle_count": str(request.vehicle_count),
-                    "user_id": request.user_id or "anonymous",
-                }
-            },
+            metadata=metadata,
+            subscription_data={"metadata": metadata},
             allow_promotion_codes=True,
             billing_address_collection="required",
         )
@@ -169,10 +245,14 @@ async def stripe_webhook(request: Request):
             detail="Webhook secret not configured"
         )
 
+    # Verify the HMAC signature only, then parse the body once with orjson
+    # (construct_event would json-decode it again into StripeObjects)
+    payload_text = payload.decode("utf-8")
     try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, STRIPE_WEBHOOK_SECRET
+        stripe.WebhookSignature.verify_header(
+            payload_text, sig_header, STRIPE_WEBHOOK_SECRET, tolerance=stripe.Webhook.DEFAULT_TOLERANCE
         )
+        event = orjson.loads(payload)
     except ValueError as e:
         logger.error(f"Invalid payload: {e}")
         raise HTTPException(status_code=400, detail="Invalid payload")
@@ -180,35 +260,109 @@ async def stripe_webhook(request: Request):
         logger.error(f"Invalid signature: {e}")
         raise HTTPException(status_code=400, detail="Invalid signature")
 
+    event_id = event["id"]
     event_type = event["type"]
     data = event["data"]["object"]
 
-    logger.info(f"Received webhook: {event_type}")
+    logger.info(f"Received webhook: {event_type} ({event_id})")
+
+    # Persist first so the event survives a crash. Stripe retries of an event
+    # that is already processed (or still in flight) are skipped; retries of
+    # one that never finished or failed take it over and run it again
+    claimed = await asyncio.to_thread(
+        WebhookEvent.record, event_id, event_type, payload_text
+    )
+    if not claimed:
+        logger.info(f"Duplicate webhook ignored: {event_id}")
+        return {"status": "received", "duplicate": True}
+
+    # Ack now; the handler runs after the response is sent
+    _schedule_webhook_event(event_id, event_type, data)
+
+    return {"status": "received"}
+
+
+def _schedule_webhook_event(event_id: str, event_type: str, data: dict) -> None:
+    """Run the handler in the background, tracked so shutdown can wait for it"""
+    task = asyncio.create_task(_process_webhook_event(event_id, event_type, data))
+    _webhook_tasks.add(task)
+    task.add_done_callback(_webhook_tasks.discard)
 
+
+async def resume_pending_webhooks() -> int:
+    """
+    Re-run stored webhook events that failed or never finished (e.g. the
+    process died mid-handler), up to WebhookEvent.MAX_ATTEMPTS. Called once
+    from the app lifespan on startup.
+    """
+    resumed = 0
     try:
-        if event_type == "checkout.session.completed":
-            await handle_checkout_completed(data)
-        
-        elif event_type == "customer.subscription.updated":
-            await handle_subscription_updated(data)
-        
-        elif event_type == "customer.subscription.deleted":
-            await handle_subscription_deleted(data)
-        
-        elif event_type == "invoice.payment_succeeded":
-            await handle_invoice_payment_succeeded(data)
-        
-        elif event_type == "invoice.payment_failed":
-            await handle_invoice_payment_failed(data)
-        
+        pending = await asyncio.to_thread(WebhookEvent.find_unfinished)
+        for row in pending:
+            event = await asyncio.to_thread(WebhookEvent.claim, row["event_id"])
+            if event is None:
+                continue  # taken over by a concurrent retry
+            data = orjson.loads(event["payload"])["data"]["object"]
+            _schedule_webhook_event(event["event_id"], event["type"], data)
+            resumed += 1
+    except Exception as e:
+        logger.error(f"Failed to resume pending webhooks: {str(e)}")
+    if resumed:
+        logger.info(f"Resumed {resumed} unfinished webhook events")
+    return resumed
+
+
+async def drain_webhook_tasks() -> None:
+    """Wait for in-flight webhook handlers (called on app shutdown)"""
+    if _webhook_tasks:
+        await asyncio.gather(*list(_webhook_tasks), return_exceptions=True)
+
+
+async def _process_webhook_event(event_id: str, event_type: str, data: dict):
+    """Dispatch a persisted webhook event to its handler and record the outcome"""
+    error = None
+    try:
+        handler = _EVENT_HANDLERS.get(event_type)
+        if handler:
+            await handler(data)
         else:
             logger.info(f"Unhandled event type: {event_type}")
 
     except Exception as e:
-        logger.error(f"Error handling webhook {event_type}: {str(e)}")
-        # Don't raise - return 200 to acknowledge receipt
-        
-    return {"status": "received"}
+        error = str(e)
+        logger.error(f"Error handling webhook {event_type}: {error}")
+
+    try:
+        await asyncio.to_thread(WebhookEvent.mark_processed, event_id, error)
+    except Exception as e:
+        logger.error(f"Failed to record webhook outcome for {event_id}: {str(e)}")
+
+
+async def get_cached_subscription(subscription_id: str) -> dict:
+    """
+    The parts of a Stripe subscription we read (status, first item id and
+    price id), retrieved from Stripe at most once per SUBSCRIPTION_CACHE_TTL
+    """
+    key = f"stripe_sub:{subscription_id}"
+    summary = await _subscription_cache.get(key)
+    if summary is not None:
+        return summary
+
+    subscription = await asyncio.to_thread(stripe.Subscription.retrieve, subscription_id)
+    item = subscription["items"]["data"][0]
+    summary = {
+        "id": subscription["id"],
+        "status": subscription["status"],
+        "item_id": item["id"],
+        "price_id": item["price"]["id"],
+    }
+    await _subscription_cache.set(key, summary)
+    return summary
+
+
+async def invalidate_cached_subscription(subscription_id: str):
+    """Drop a subscription from the lookup cache after it changes"""
+    await _subscription_cache.delete(f"stripe_sub:{subscription_id}")
 
 
 async def handle_checkout_completed(session: dict):
@@ -223,8 +377,8 @@ async def handle_checkout_completed(session: dict):
         logger.warning("No subscription ID in checkout session")
         return
 
-    # Retrieve full subscription details from Stripe
-    subscription = stripe.Subscription.retrieve(subscription_id)
+    # Retrieve subscription details from Stripe (cached)
+    subscription = await get_cached_subscription(subscription_id)
     
     # Create subscription record in MongoDB
     subscription_data = SubscriptionCreate(
@@ -233,45 +387,60 @@ async def handle_checkout_completed(session: dict):
         vehicle_count=int(metadata.get("vehicle_count", 1)),
         stripe_customer_id=customer_id,
         stripe_subscription_id=subscription_id,
-        stripe_price_id=subscription["items"]["data"][0]["price"]["id"],
+        stripe_price_id=subscription["price_id"],
+        stripe_subscription_item_id=subscription["item_id"],
         status=subscription["status"],
     )
     
-    Subscription.create(subscription_data)
+    await asyncio.to_thread(Subscription.create, subscription_data)
     logger.info(f"Created subscription record for: {subscription_id}")
 
 
 async def handle_subscription_updated(subscription: dict):
     """Handle subscription updates"""
-    logger.info(f"Processing subscription.updated: {subscription['id']}")
+    subscription_id = subscription["id"]
+    logger.info(f"Processing subscription.updated: {subscription_id}")
+    await invalidate_cached_subscription(subscription_id)
+    
+    # Read each field once
+    sub_status = subscription["status"]
+    start_ts = subscription["current_period_start"]
+    end_ts = subscription["current_period_end"]
+    cancel_flag = subscription.get("cancel_at_period_end", False)
+    metadata = subscription.get("metadata") or {}
     
     update_data = {
-        "status": subscription["status"],
-        "current_period_start": datetime.fromtimestamp(subscription["current_period_start"]),
-        "current_period_end": datetime.fromtimestamp(subscription["current_period_end"]),
-        "cancel_at_period_end": subscription.get("cancel_at_period_end", False),
+        "status": sub_status,
+        # Stripe timestamps are UTC epoch seconds
+        "current_period_start": datetime.fromtimestamp(start_ts, tz=timezone.utc),
+        "current_period_end": datetime.fromtimestamp(end_ts, tz=timezone.utc),
+        "cancel_at_period_end": cancel_flag,
     }
     
     # Update vehicle count if changed
-    metadata = subscription.get("metadata", {})
-    if "vehicle_count" in metadata:
-        update_data["vehicle_count"] = int(metadata["vehicle_count"])
+    vehicle_count = metadata.get("vehicle_count")
+    if vehicle_count is not None:
+        update_data["vehicle_count"] = int(vehicle_count)
     
-    if "plan_id" in metadata:
-        update_data["plan_id"] = metadata["plan_id"]
+    plan_id = metadata.get("plan_id")
+    if plan_id is not None:
+        update_data["plan_id"] = plan_id
     
-    Subscription.update_by_stripe_subscription_id(
-        subscription["id"],
+    await asyncio.to_thread(
+        Subscription.update_by_stripe_subscription_id,
+        subscription_id,
         update_data
     )
-    logger.info(f"Updated subscription: {subscription['id']}")
+    logger.info(f"Updated subscription: {subscription_id}")
 
 
 async def handle_subscription_deleted(subscription: dict):
     """Handle subscription cancellation/deletion"""
     logger.info(f"Processing subscription.deleted: {subscription['id']}")
+    await invalidate_cached_subscription(subscription["id"])
     
-    Subscription.update_by_stripe_subscription_id(
+    await asyncio.to_thread(
+        Subscription.update_by_stripe_subscription_id,
         subscription["id"],
         {"status": "cancelled"}
     )
@@ -283,7 +452,8 @@ async def handle_invoice_payment_succeeded(invoice: dict):
     subscription_id = invoice.get("subscription")
     if subscription_id:
         logger.info(f"Payment succeeded for subscription: {subscription_id}")
-        Subscription.update_by_stripe_subscription_id(
+        await asyncio.to_thread(
+            Subscription.update_by_stripe_subscription_id,
             subscription_id,
             {"status": "active"}
         )
@@ -294,12 +464,23 @@ async def handle_invoice_payment_failed(invoice: dict):
     subscription_id = invoice.get("subscription")
     if subscription_id:
         logger.warning(f"Payment failed for subscription: {subscription_id}")
-        Subscription.update_by_stripe_subscription_id(
+        await asyncio.to_thread(
+            Subscription.update_by_stripe_subscription_id,
             subscription_id,
             {"status": "past_due"}
         )
 
 
+# Webhook event type -> handler, used by _process_webhook_event
+_EVENT_HANDLERS: Dict[str, Callable[[dict], Awaitable[None]]] = {
+    "checkout.session.completed": handle_checkout_completed,
+    "customer.subscription.updated": handle_subscription_updated,
+    "customer.subscription.deleted": handle_subscription_deleted,
+    "invoice.payment_succeeded": handle_invoice_payment_succeeded,
+    "invoice.payment_failed": handle_invoice_payment_failed,
+}
+
+
 @router.post("/enterprise-contact")
 async def submit_enterprise_contact(request: EnterpriseContactRequest):
     """
@@ -308,14 +489,8 @@ async def submit_enterprise_contact(request: EnterpriseContactRequest):
     Stores lead in MongoDB for sales team follow-up.
     """
     try:
-        lead_data = EnterpriseLeadCreate(
-            name=request.name,
-            email=request.email,
-            company_name=request.company_name,
-            company_size=request.company_size,
-            fleet_size=request.fleet_size,
-            message=request.message,
-        )
+        # Same fields as the request, which FastAPI has already validated
+        lead_data = EnterpriseLeadCreate.model_construct(**request.model_dump())
         
         EnterpriseLead.create(lead_data)
         
@@ -343,12 +518,13 @@ async def get_subscription_status(user_id: str):
     Get subscription status for a user.
     """
     try:
-        subscription = Subscription.find_by_user_id(user_id)
+        subscription = await Subscription.find_by_user_id_async(user_id)
         
         if not subscription:
-            return SubscriptionStatusResponse(has_subscription=False)
+            return SubscriptionStatusResponse.model_construct(has_subscription=False)
         
-        return SubscriptionStatusResponse(
+        # Values come from our own subscription documents, so skip re-validation
+        return SubscriptionStatusResponse.model_construct(
             has_subscription=True,
             plan_id=subscription.get("plan_id"),
             vehicle_count=subscription.get("vehicle_count"),
@@ -373,7 +549,7 @@ async def create_billing_portal(user_id: str):
     Allows users to manage payment methods, view invoices, and update subscription.
     """
     try:
-        subscription = Subscription.find_by_user_id(user_id)
+        subscription = await Subscription.find_by_user_id_async(user_id)
         
         if not subscription:
             raise HTTPException(
@@ -389,9 +565,10 @@ async def create_billing_portal(user_id: str):
             )
         
         # Create billing portal session
-        session = stripe.billing_portal.Session.create(
+        session = await asyncio.to_thread(
+            stripe.billing_portal.Session.create,
             customer=stripe_customer_id,
-            return_url=f"{FRONTEND_URL}/billing",
+            return_url=BILLING_RETURN_URL,
         )
         
         return {
@@ -407,13 +584,46 @@ async def create_billing_portal(user_id: str):
         )
 
 
+async def _modify_stripe_and_mongo(
+    subscription_id: str,
+    stripe_changes: dict,
+    mongo_changes: dict,
+    mongo_rollback: dict,
+):
+    """
+    Apply a subscription change in Stripe and MongoDB concurrently.
+    Stripe is the source of truth: if its call fails the MongoDB record is
+    put back to mongo_rollback and the Stripe error is re-raised.
+    """
+    stripe_result, mongo_result = await asyncio.gather(
+        asyncio.to_thread(stripe.Subscription.modify, subscription_id, **stripe_changes),
+        asyncio.to_thread(Subscription.update_by_stripe_subscription_id, subscription_id, mongo_changes),
+        return_exceptions=True,
+    )
+    await invalidate_cached_subscription(subscription_id)
+
+    if isinstance(stripe_result, BaseException):
+        if not isinstance(mongo_result, BaseException):
+            try:
+                await asyncio.to_thread(
+                    Subscription.update_by_stripe_subscription_id, subscription_id, mongo_rollback
+                )
+            except Exception as e:
+                logger.error(f"Failed to roll back subscription {subscription_id}: {str(e)}")
+        raise stripe_result
+
+    if isinstance(mongo_result, BaseException):
+        # Stripe succeeded; the subscription.updated webhook will resync MongoDB
+        logger.error(f"MongoDB update failed for subscription {subscription_id}: {str(mongo_result)}")
+
+
 @router.post("/cancel-subscription/{user_id}")
 async def cancel_subscription(user_id: str):
     """
     Cancel a user's subscription at period end.
     """
     try:
-        subscription = Subscription.find_by_user_id(user_id)
+        subscription = await Subscription.find_by_user_id_async(user_id)
         
         if not subscription:
             raise HTTPException(
@@ -421,16 +631,12 @@ async def cancel_subscription(user_id: str):
                 detail="Subscription not found"
             )
         
-        # Cancel in Stripe (at period end)
-        stripe.Subscription.modify(
-            subscription["stripe_subscription_id"],
-            cancel_at_period_end=True
-        )
-        
-        # Update in MongoDB
-        Subscription.update_by_stripe_subscription_id(
+        # Cancel in Stripe (at period end) and mirror it in MongoDB
+        await _modify_stripe_and_mongo(
             subscription["stripe_subscription_id"],
-            {"cancel_at_period_end": True}
+            {"cancel_at_period_end": True},
+            {"cancel_at_period_end": True},
+            {"cancel_at_period_end": subscription.get("cancel_at_period_end", False)},
         )
         
         return {
@@ -453,7 +659,7 @@ async def update_vehicle_count(user_id: str, vehicle_count: int = Query(..., ge=
     This updates the quantity in Stripe and triggers prorated billing.
     """
     try:
-        subscription = Subscription.find_by_user_id(user_id)
+        subscription = await Subscription.find_by_user_id_async(user_id)
         
         if not subscription:
             raise HTTPException(
@@ -461,26 +667,27 @@ async def update_vehicle_count(user_id: str, vehicle_count: int = Query(..., ge=
                 detail="Subscription not found"
             )
         
-        # Get Stripe subscription
-        stripe_sub = stripe.Subscription.retrieve(subscription["stripe_subscription_id"])
+        # The item id is stored at checkout; only older records need a Stripe lookup
+        item_id = subscription.get("stripe_subscription_item_id")
+        if not item_id:
+            stripe_sub = await get_cached_subscription(subscription["stripe_subscription_id"])
+            item_id = stripe_sub["item_id"]
         
-        # Update quantity in Stripe
-        stripe.Subscription.modify(
+        # Update quantity in Stripe and mirror it in MongoDB
+        await _modify_stripe_and_mongo(
             subscription["stripe_subscription_id"],
-            items=[{
-                "id": stripe_sub["items"]["data"][0]["id"],
-                "quantity": vehicle_count,
-            }],
-            proration_behavior="create_prorations",
-            metadata={
-                "vehicle_count": str(vehicle_count),
-            }
-        )
-        
-        # Update in MongoDB
-        Subscription.update_by_stripe_subscription_id(
-            subscription["stripe_subscription_id"],
-            {"vehicle_count": vehicle_count}
+            {
+                "items": [{
+                    "id": item_id,
+                    "quantity": vehicle_count,
+                }],
+                "proration_behavior": "create_prorations",
+                "metadata": {
+                    "vehicle_count": str(vehicle_count),
+                },
+            },
+            {"vehicle_count": vehicle_count},
+            {"vehicle_count": subscription.get("vehicle_count")},
         )
         
         return {
@@ -501,76 +708,18 @@ async def get_plans():
     """
     Get available pricing plans.
     """
-    return {
-        "plans": [
-            {
-                "id": "starter",
-                "name": "Starter",
-                "price_per_vehicle": 19.90,
-                "currency": "MYR",
-                "description": "Perfect for small local fleets.",
-                "features": [
-                    "Maintenance logging per vehicle",
-                    "Date & mileage-based reminders",
-                    "Cost tracking per vehicle",
-                    "Basic email alerts",
-                    "Up to 3 fleet managers",
-                    "Monthly cost reports",
-                    "CSV exports"
-                ]
-            },
-            {
-                "id": "pro",
-                "name": "Professional",
-                "price_per_vehicle": 34.90,
-                "currency": "MYR",
-                "description": "For growing fleets needing advanced features.",
-                "popular": True,
-                "features": [
-                    "Everything in Starter +",
-                    "Unlimited fleet managers",
-                    "SMS alerts (via Twilio)",
-                    "Receipt photo storage (10GB)",
-                    "Driver assignment tracking",
-                    "Fuel cost tracking",
-                    "Advanced analytics & trends",
-                    "Monthly maintenance forecasting",
-                    "Preventive maintenance scheduling",
-                    "API access (read-only)"
-                ]
-            },
-            {
-                "id": "enterprise",
-                "name": "Enterprise",
-                "price_per_vehicle": 49.90,
-                "currency": "MYR",
-                "description": "Full control for large organizations.",
-                "features": [
-                    "Everything in Professional +",
-                    "Unlimited receipt storage (100GB)",
-                    "Custom workshop integrations",
-                    "Multi-location support",
-                    "Full API access (read/write)",
-                    "Webhook integrations",
-                    "Custom reports & dashboards",
-                    "Dedicated account manager",
-                    "Priority phone support (24/5)",
-                    "Service history exports for resale",
-                    "Insurance claim integration"
-                ]
-            }
-        ]
-    }
+    return Response(
+        _PLANS_JSON,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
 
 
-@router.get("/debug/init-collections")
 async def init_collections():
     """
     Initialize subscription collections in MongoDB.
     Creates the collections and indexes if they don't exist.
     """
-    from app.database import get_database
-    
     db = get_database()
     
     # Get existing collections
@@ -582,19 +731,23 @@ async def init_collections():
         db.create_collection("subscriptions")
         created.append("subscriptions")
     
-    # Create indexes for subscriptions
-    db.subscriptions.create_index("user_id")
-    db.subscriptions.create_index("stripe_subscription_id", unique=True, sparse=True)
-    db.subscriptions.create_index("stripe_customer_id")
+    # Create indexes for subscriptions (one createIndexes command)
+    db.subscriptions.create_indexes([
+        IndexModel("user_id"),
+        IndexModel("stripe_subscription_id", unique=True, sparse=True),
+        IndexModel("stripe_customer_id"),
+    ])
+    
+    # Processed webhook event ids (idempotency for Stripe retries)
+    db.webhook_events.create_index("event_id", unique=True)
     
     # Create enterprise_leads collection if not exists
     if "enterprise_leads" not in existing:
         db.create_collection("enterprise_leads")
         created.append("enterprise_leads")
     
-    # Create index for enterprise_leads
-    db.enterprise_leads.create_index("email")
-    db.enterprise_leads.create_index("created_at")
+    # Create indexes for enterprise_leads
+    db.enterprise_leads.create_indexes([IndexModel("email"), IndexModel("created_at")])
     
     return {
         "success": True,
@@ -602,7 +755,8 @@ async def init_collections():
         "all_collections": db.list_collection_names(),
         "indexes": {
             "subscriptions": list(db.subscriptions.index_information().keys()),
-            "enterprise_leads": list(db.enterprise_leads.index_information().keys())
+            "enterprise_leads": list(db.enterprise_leads.index_information().keys()),
+            "webhook_events": list(db.webhook_events.index_information().keys())
         }
     }
 
@@ -614,15 +768,11 @@ class TestSubscriptionRequest(BaseModel):
     vehicle_count: int = 1
 
 
-@router.post("/debug/create-test-subscription")
 async def create_test_subscription(request: TestSubscriptionRequest):
     """
     Create a test subscription for development/testing.
     WARNING: Only use in development!
     """
-    from app.database import get_database
-    from datetime import datetime, timedelta
-    
     db = get_database()
     
     # Check if user already has a subscription
@@ -670,3 +820,9 @@ async def create_test_subscription(request: TestSubscriptionRequest):
             "current_period_end": subscription_doc["current_period_end"].isoformat()
         }
     }
+
+
+# Development-only debug routes stay out of the routing table unless enabled
+if settings.enable_debug_routes:
+    router.add_api_route("/debug/init-collections", init_collections, methods=["GET"])
+    router.add_api_route("/debug/create-test-subscription", create_test_subscription, methods=["POST"])
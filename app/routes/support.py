@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from app.database import get_database
 from app.models.contact import Contact
 from app.services.rag_service import RAGService
 from app.services.email_service import send_support_email
+from app.utils.deps import get_rag_service
+from app.utils.auth_dep import get_optional_user_id
 from typing import Optional
 from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/support", tags=["support"])
 
+# Phrases that mark an AI answer as a non-answer (checked against the lowercased answer)
+_BAD_PHRASES = ("don't have", "not found")
+
 
 class SupportInquiry(BaseModel):
     name: str
@@ -24,25 +32,12 @@ class SupportResponse(BaseModel):
     ticket_id: Optional[str] = None
 
 
-def get_current_user_id(authorization: str = Header(None)) -> Optional[str]:
-    """Extract user ID from Bearer token"""
-    if not authorization or not authorization.startswith("Bearer "):
-        return None
-    
-    try:
-        from app.utils.auth import decode_token
-        token = authorization.replace("Bearer ", "")
-        payload = decode_token(token)
-        return payload.get("sub")
-    except Exception:
-        return None
-
-
 @router.post("/inquire", response_model=SupportResponse)
 async def submit_support_inquiry(
     inquiry: SupportInquiry,
     db=Depends(get_database),
-    user_id: Optional[str] = Depends(get_current_user_id)
+    user_id: Optional[str] = Depends(get_optional_user_id),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Submit a support inquiry.
@@ -53,18 +48,15 @@ async def submit_support_inquiry(
     
     try:
         # Try to get AI answer first
-        rag_service = RAGService()
         ai_response = await rag_service.search_and_generate(inquiry.inquiry)
         
         # Check if we got a meaningful answer
         # If answer is too generic or confidence is low, create ticket and email
-        is_ai_answer = (
-            ai_response and 
-            ai_response.get("answer") and 
-            len(ai_response.get("answer", "")) > 20 and
-            "don't have" not in ai_response.get("answer", "").lower() and
-            "not found" not in ai_response.get("answer", "").lower()
-        )
+        answer = ai_response.get("answer") if ai_response else None
+        is_ai_answer = bool(answer) and len(answer) > 20
+        if is_ai_answer:
+            answer_lower = answer.lower()
+            is_ai_answer = not any(p in answer_lower for p in _BAD_PHRASES)
         
         if is_ai_answer:
             # AI provided a good answer, return it
@@ -72,7 +64,7 @@ async def submit_support_inquiry(
                 success=True,
                 message="Your inquiry has been answered",
                 answered_by_ai=True,
-                answer=ai_response.get("answer")
+                answer=answer
             )
         else:
             # AI couldn't answer well, create support ticket
@@ -98,7 +90,7 @@ async def submit_support_inquiry(
                     ticket_id=ticket_id
                 )
             except Exception as e:
-                print(f"Warning: Email not sent for ticket {ticket_id}: {str(e)}")
+                logger.warning(f"Email not sent for ticket {ticket_id}: {str(e)}")
             
             return SupportResponse(
                 success=True,
@@ -108,7 +100,7 @@ async def submit_support_inquiry(
             )
     
     except Exception as e:
-        print(f"Support inquiry error: {str(e)}")
+        logger.error(f"Support inquiry error: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process inquiry"
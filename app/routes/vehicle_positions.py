@@ -1,11 +1,86 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import List, Optional
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional
+import orjson
+from operator import itemgetter
+from bson.errors import InvalidId
 from pydantic import BaseModel
-from app.database import get_database
+from app.utils.deps import get_position_model
 from app.models.vehicle_position import VehiclePosition
+from app.services.position_buffer import position_buffer
+from app.services.redis_client import SharedCache
+from app.utils import geohash
 from datetime import datetime, timezone
 
-router = APIRouter(prefix="/api/vehicle-positions", tags=["vehicle-positions"])
+router = APIRouter(prefix="/api/vehicle-positions", tags=["vehicle-positions"], default_response_class=ORJSONResponse)
+
+# Fleet-wide position reads are polled by dashboards but only change every few
+# seconds. They are cached in Redis when REDIS_URL is set, per process otherwise.
+# Writes are batched, so entries aren't invalidated per update: the short TTL
+# bounds how stale they get.
+LATEST_CACHE_TTL = 2
+NEARBY_CACHE_TTL = 10
+LATEST_CACHE_KEY = "fleety:latest:all"
+_position_cache = SharedCache(maxsize=1024, ttl=NEARBY_CACHE_TTL)
+
+
+def _position_dict(p: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a position document for API responses"""
+    # .get on purpose: a legacy document missing a field must not raise
+    # halfway through a streamed /history response
+    return {
+        "vehicleId": str(p.get("vehicleId")),
+        "location": p.get("location"),
+        "speed": p.get("speed"),
+        "direction": p.get("direction"),
+        "status": p.get("status"),
+        "timestamp": p.get("timestamp")
+    }
+
+
+async def _stream_positions(
+    head: bytes, first: Optional[Dict[str, Any]], rest: AsyncIterator[Dict[str, Any]]
+) -> AsyncIterator[bytes]:
+    """
+    Emit {<head>"positions":[...],"count":N} one document at a time straight
+    off the cursor, so the full list is never held in memory
+    """
+    yield head + b'"positions":['
+    count = 0
+    if first is not None:
+        yield orjson.dumps(_position_dict(first))
+        count = 1
+        async for p in rest:
+            yield b"," + orjson.dumps(_position_dict(p))
+            count += 1
+    yield b'],"count":' + str(count).encode() + b"}"
+
+
+# Nearby searches are cached per ~100m bucket of the search center. The
+# cached candidates are searched from the bucket center with this much extra
+# radius (the farthest a center can be from its rounded one), and each request
+# then measures and filters them from its own exact center.
+NEARBY_SNAP_DECIMALS = 3
+NEARBY_SNAP_SLACK_M = 80
+
+
+def _nearby_cache_key(longitude: float, latitude: float, max_distance_km: float) -> str:
+    """Cache key for the ~100m bucket containing the search center"""
+    return f"fleety:nearby:{longitude}:{latitude}:{max_distance_km}"
+
+
+def _within_radius(
+    candidates: List[Dict[str, Any]], longitude: float, latitude: float, max_distance_m: float
+) -> List[Dict[str, Any]]:
+    """Candidates within max_distance_m of the exact center, with distance_m, nearest first"""
+    vehicles = []
+    for position in candidates:
+        lng, lat = position["location"]["coordinates"]
+        distance = geohash.distance_m(latitude, longitude, lat, lng)
+        if distance <= max_distance_m:
+            vehicles.append({**position, "distance_m": distance})
+    vehicles.sort(key=itemgetter("distance_m"))
+    return vehicles
 
 
 # Pydantic schemas
@@ -34,7 +109,7 @@ class PositionResponse(BaseModel):
 # ============================================================================
 
 @router.get("/latest/all")
-async def get_all_latest_positions(db=Depends(get_database)):
+async def get_all_latest_positions(position_model: VehiclePosition = Depends(get_position_model)):
     """
     Get latest positions for all vehicles
     
@@ -42,23 +117,15 @@ async def get_all_latest_positions(db=Depends(get_database)):
         List of latest position documents for all vehicles
     """
     try:
-        position_model = VehiclePosition(db)
-        positions = position_model.get_all_latest_positions()
+        positions = await _position_cache.get(LATEST_CACHE_KEY)
+        if positions is None:
+            positions = [_position_dict(p) async for p in position_model.get_all_latest_positions()]
+            await _position_cache.set(LATEST_CACHE_KEY, positions, LATEST_CACHE_TTL)
         
         return {
             "status": "success",
             "count": len(positions),
-            "positions": [
-                {
-                    "vehicleId": str(p.get("vehicleId")),
-                    "location": p.get("location"),
-                    "speed": p.get("speed"),
-                    "direction": p.get("direction"),
-                    "status": p.get("status"),
-                    "timestamp": p.get("timestamp")
-                }
-                for p in positions
-            ]
+            "positions": positions
         }
     except Exception as e:
         raise HTTPException(
@@ -72,7 +139,7 @@ async def find_vehicles_nearby(
     longitude: float = Query(..., description="Search center longitude"),
     latitude: float = Query(..., description="Search center latitude"),
     max_distance_km: float = Query(5, ge=0.1, le=100, description="Search radius in km"),
-    db=Depends(get_database)
+    position_model: VehiclePosition = Depends(get_position_model)
 ):
     """
     Find vehicles near a location using geospatial search
@@ -87,32 +154,29 @@ async def find_vehicles_nearby(
     """
     try:
         max_distance_meters = int(max_distance_km * 1000)
-        position_model = VehiclePosition(db)
-        positions = position_model.find_vehicles_near_location(
-            longitude=longitude,
-            latitude=latitude,
-            max_distance_meters=max_distance_meters
-        )
+        snapped_lng = round(longitude, NEARBY_SNAP_DECIMALS)
+        snapped_lat = round(latitude, NEARBY_SNAP_DECIMALS)
+        cache_key = _nearby_cache_key(snapped_lng, snapped_lat, max_distance_km)
+        candidates = await _position_cache.get(cache_key)
+        if candidates is None:
+            positions = position_model.find_vehicles_near_location(
+                longitude=snapped_lng,
+                latitude=snapped_lat,
+                max_distance_meters=max_distance_meters + NEARBY_SNAP_SLACK_M
+            )
+            candidates = [_position_dict(p) async for p in positions]
+            await _position_cache.set(cache_key, candidates, NEARBY_CACHE_TTL)
+        vehicles = _within_radius(candidates, longitude, latitude, max_distance_meters)
         
         return {
             "status": "success",
-            "count": len(positions),
+            "count": len(vehicles),
             "search_center": {
                 "longitude": longitude,
                 "latitude": latitude
             },
             "radius_km": max_distance_km,
-            "vehicles": [
-                {
-                    "vehicleId": str(p.get("vehicleId")),
-                    "location": p.get("location"),
-                    "speed": p.get("speed"),
-                    "direction": p.get("direction"),
-                    "status": p.get("status"),
-                    "timestamp": p.get("timestamp")
-                }
-                for p in positions
-            ]
+            "vehicles": vehicles
         }
     except Exception as e:
         raise HTTPException(
@@ -126,11 +190,14 @@ async def get_vehicle_position_history(
     vehicle_id: str,
     limit: int = Query(100, ge=1, le=1000),
     hours_back: int = Query(24, ge=1, le=720),
-    db=Depends(get_database)
+    position_model: VehiclePosition = Depends(get_position_model)
 ):
     """
     Get historical positions for a vehicle
     
+    Raw positions are kept for 30 days (TTL index on timestamp), so older
+    history is not available here.
+    
     Args:
         vehicle_id: MongoDB ObjectId of vehicle
         limit: Maximum number of positions (1-1000)
@@ -140,33 +207,30 @@ async def get_vehicle_position_history(
         List of historical position documents
     """
     try:
-        position_model = VehiclePosition(db)
         positions = position_model.get_position_history(
             vehicle_id=vehicle_id,
             limit=limit,
             hours_back=hours_back
         )
+        # Fetch the first batch before the response starts streaming
+        # (positions.__anext__ rather than the anext builtin, which is 3.10+)
+        try:
+            first = await positions.__anext__()
+        except StopAsyncIteration:
+            first = None
         
-        return {
+        head = orjson.dumps({
             "status": "success",
-            "count": len(positions),
             "vehicle_id": vehicle_id,
             "query": {
                 "limit": limit,
                 "hours_back": hours_back
-            },
-            "positions": [
-                {
-                    "vehicleId": str(p.get("vehicleId")),
-                    "location": p.get("location"),
-                    "speed": p.get("speed"),
-                    "direction": p.get("direction"),
-                    "status": p.get("status"),
-                    "timestamp": p.get("timestamp")
-                }
-                for p in positions
-            ]
-        }
+            }
+        })[:-1] + b","
+        return StreamingResponse(
+            _stream_positions(head, first, positions),
+            media_type="application/json"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -178,26 +242,27 @@ async def get_vehicle_position_history(
 # Generic routes - MUST come last!
 # ============================================================================
 
-@router.post("/{vehicle_id}")
+@router.post("/{vehicle_id}", status_code=status.HTTP_202_ACCEPTED)
 async def update_vehicle_position(
     vehicle_id: str,
     position_data: PositionUpdate,
-    db=Depends(get_database)
+    position_model: VehiclePosition = Depends(get_position_model)
 ):
     """
     Update vehicle position (called by GPS/IoT device or mobile app)
     
+    Positions are queued and written in batches (see position_buffer), so
+    the response is 202 Accepted and the write lands within ~200ms.
+    
     Args:
         vehicle_id: MongoDB ObjectId of vehicle (from /api/vehicles/{id})
         position_data: Position update data (lat, lng, speed, direction, status)
     
     Returns:
-        Created position document
+        Accepted position document
     """
     try:
-        position_model = VehiclePosition(db)
-        
-        result = position_model.create_position(
+        position_doc = VehiclePosition.build_position_doc(
             vehicle_id=vehicle_id,
             latitude=position_data.latitude,
             longitude=position_data.longitude,
@@ -205,25 +270,22 @@ async def update_vehicle_position(
             direction=position_data.direction,
             status=position_data.status
         )
+    except InvalidId:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to update position"
+        )
+    
+    try:
+        # Fall back to a direct write if the buffer isn't running or is full
+        if not position_buffer.add(position_doc):
+            await position_model.insert_positions([position_doc])
         
-        if result:
-            return {
-                "status": "success",
-                "message": "Position updated",
-                "position": {
-                    "vehicleId": str(result.get("vehicleId")),
-                    "location": result.get("location"),
-                    "speed": result.get("speed"),
-                    "direction": result.get("direction"),
-                    "status": result.get("status"),
-                    "timestamp": result.get("timestamp")
-                }
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to update position"
-            )
+        return {
+            "status": "success",
+            "message": "Position updated",
+            "position": _position_dict(position_doc)
+        }
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -234,7 +296,7 @@ async def update_vehicle_position(
 @router.get("/{vehicle_id}")
 async def get_vehicle_latest_position(
     vehicle_id: str,
-    db=Depends(get_database)
+    position_model: VehiclePosition = Depends(get_position_model)
 ):
     """
     Get latest position for a specific vehicle
@@ -246,20 +308,12 @@ async def get_vehicle_latest_position(
         Latest position document
     """
     try:
-        position_model = VehiclePosition(db)
-        position = position_model.get_latest_position(vehicle_id)
+        position = await position_model.get_latest_position(vehicle_id)
         
         if position:
             return {
                 "status": "success",
-                "position": {
-                    "vehicleId": str(position.get("vehicleId")),
-                    "location": position.get("location"),
-                    "speed": position.get("speed"),
-                    "direction": position.get("direction"),
-                    "status": position.get("status"),
-                    "timestamp": position.get("timestamp")
-                }
+                "position": _position_dict(position)
             }
         else:
             raise HTTPException(
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel, EmailStr, validator
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, EmailStr, StringConstraints, field_validator
+from typing import Annotated
 from app.models.waitlist import Waitlist
 from app.services.email_service import resend_service
 import logging
@@ -7,30 +9,25 @@ import re
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/waitlist", tags=["waitlist"])
+router = APIRouter(prefix="/api/waitlist", tags=["waitlist"], default_response_class=ORJSONResponse)
+
+# Email format check for the email-in-path endpoints
+_EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
 
 
 class WaitlistJoinRequest(BaseModel):
     """Request body for joining waitlist"""
-    name: str
-    email: EmailStr
+    model_config = ConfigDict(extra="ignore", frozen=True)
 
-    @validator("name")
-    def name_not_empty(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Name cannot be empty")
-        if len(v) < 2:
-            raise ValueError("Name must be at least 2 characters")
-        if len(v) > 100:
-            raise ValueError("Name must be less than 100 characters")
-        return v.strip()
+    # Strip and length checks run in pydantic-core rather than Python validators
+    name: Annotated[str, StringConstraints(strip_whitespace=True, min_length=2, max_length=100)]
+    # email-validator already caps addresses at 254 characters
+    email: EmailStr
 
-    @validator("email")
-    def email_valid(cls, v):
-        # Additional validation beyond EmailStr
-        if len(v) > 255:
-            raise ValueError("Email too long")
-        return v.lower().strip()
+    @field_validator("email", mode="after")
+    @classmethod
+    def email_lower(cls, v: str) -> str:
+        return v.lower()
 
 
 class WaitlistResponse(BaseModel):
@@ -51,8 +48,18 @@ class WaitlistStatsResponse(BaseModel):
     by_source: dict
 
 
+async def send_waitlist_confirmation(email: str, name: str):
+    """Send the waitlist confirmation email (runs after the response is sent)"""
+    try:
+        await resend_service.send_waitlist_confirmation(email=email, name=name)
+        logger.info(f"Confirmation email sent to {email}")
+    except Exception as e:
+        # Log only - the user is already on the waitlist
+        logger.warning(f"Failed to send confirmation email to {email}: {str(e)}")
+
+
 @router.post("/join", response_model=WaitlistResponse)
-async def join_waitlist(request: WaitlistJoinRequest):
+async def join_waitlist(request: WaitlistJoinRequest, background_tasks: BackgroundTasks):
     """
     Add a new subscriber to the waitlist
     
@@ -80,17 +87,13 @@ async def join_waitlist(request: WaitlistJoinRequest):
             source="landing_page"
         )
 
-        # Send confirmation email (non-blocking, doesn't affect response)
+        # Send confirmation email once the response is out
         if result["success"]:
-            try:
-                await resend_service.send_waitlist_confirmation(
-                    email=request.email,
-                    name=request.name
-                )
-                logger.info(f"Confirmation email sent to {request.email}")
-            except Exception as e:
-                # Log but don't fail the request - user still added to waitlist
-                logger.warning(f"Failed to send confirmation email to {request.email}: {str(e)}")
+            background_tasks.add_task(
+                send_waitlist_confirmation,
+                email=request.email,
+                name=request.name
+            )
 
         return WaitlistResponse(
             success=result["success"],
@@ -159,8 +162,7 @@ async def confirm_waitlist_email(email: str):
     """
     try:
         # Validate email format
-        email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-        if not re.match(email_pattern, email):
+        if not _EMAIL_RE.match(email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid email format"
@@ -205,8 +207,7 @@ async def convert_waitlist_user(email: str, user_id: str):
     }
     """
     try:
-        email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-        if not re.match(email_pattern, email):
+        if not _EMAIL_RE.match(email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid email format"
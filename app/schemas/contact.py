@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from bson import ObjectId
 from typing import Optional, List
 from datetime import datetime
 
@@ -22,9 +23,9 @@ class ContactResponse(BaseModel):
     phone: Optional[str] = None
     subject: str
     message: str
-    agreeToTermsAndPrivacy: bool
-    agreeToPDPA: bool
-    status: str  # open, in_progress, closed
+    agreeToTermsAndPrivacy: bool = False
+    agreeToPDPA: bool = False
+    status: str = "open"  # open, in_progress, closed
     user_id: Optional[str] = None
     created_at: datetime
     updated_at: datetime
@@ -32,6 +33,13 @@ class ContactResponse(BaseModel):
     
     class Config:
         populate_by_name = True
+        extra = "ignore"
+
+    @field_validator("id", "user_id", mode="before")
+    @classmethod
+    def object_id_to_str(cls, v):
+        # Lets routes validate raw Mongo documents directly
+        return str(v) if isinstance(v, ObjectId) else v
 
 
 class ContactListResponse(BaseModel):
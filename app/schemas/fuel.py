@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_serializer
+from pydantic import AliasChoices, BaseModel, Field, field_serializer
 from typing import Optional
 from datetime import datetime
 
@@ -58,7 +58,9 @@ class FuelLogUpdate(BaseModel):
 
 
 class FuelLogResponse(BaseModel):
-    id: str = Field(serialization_alias="_id")
+    # Validates straight from Mongo documents' "_id" (or "id"), so routes
+    # don't need to copy the key over first
+    id: str = Field(validation_alias=AliasChoices("_id", "id"), serialization_alias="_id")
     vehicle_id: str
     
     # Vehicle & Odometer
@@ -0,0 +1,22 @@
+"""
+Analytics Write Buffer
+Collects chatbot analytics documents in memory and writes them to MongoDB
+in batches from a single background task, instead of one insert per query
+"""
+from typing import Any, Dict, List
+
+import anyio
+
+from app.models.analytics import Analytics
+from app.services.batch_buffer import BatchBuffer
+
+
+async def _insert_analytics(batch: List[Dict[str, Any]]) -> int:
+    # Analytics uses the sync PyMongo client, so the bulk write runs in a thread
+    return await anyio.to_thread.run_sync(Analytics.insert_documents, batch)
+
+
+# Global buffer instance (started in the app lifespan)
+analytics_buffer = BatchBuffer(
+    "analytics", _insert_analytics, max_batch=256, flush_interval=0.1, max_queued=10000
+)
@@ -0,0 +1,105 @@
+"""
+Batched Write Buffer
+Collects documents in memory and hands them to a writer in batches from a
+single background task, instead of one database write per request
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# Writes one batch and returns how many documents were written
+BatchWriter = Callable[[List[Dict[str, Any]]], Awaitable[int]]
+
+
+class BatchBuffer:
+    """
+    Queue + background flusher: a batch is written once `max_batch` documents
+    are waiting or `flush_interval` seconds after the first one arrived,
+    whichever comes first. Start/stop it from the app lifespan.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        writer: Optional[BatchWriter] = None,
+        max_batch: int = 256,
+        flush_interval: float = 0.1,
+        max_queued: int = 10000
+    ):
+        self.name = name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queued = max_queued
+        self._writer = writer
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, writer: Optional[BatchWriter] = None) -> None:
+        """Start the flusher on the running event loop (optionally with the writer to use)"""
+        if writer is not None:
+            self._writer = writer
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the flusher"""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    def add(self, document: Dict[str, Any]) -> bool:
+        """Queue a document for the next batch; False if the buffer is not running or full"""
+        if self._task is None:
+            return False
+        try:
+            self._queue.put_nowait(document)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"{self.name} buffer full, writing directly")
+            return False
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+            if stopping:
+                return
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            written = await self._writer(batch)
+            logger.debug(f"Flushed {written} {self.name} records")
+        except Exception as e:
+            logger.error(f"Error flushing {len(batch)} {self.name} records: {str(e)}")
@@ -10,6 +10,32 @@ from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+# Detection rules, each compiled once into a single alternation so a query is
+# scanned in one regex pass per rule set instead of one pass per pattern/keyword
+ABUSE_PATTERNS = [
+    r'damn', r'hell', r'bastard', r'idiot', r'stupid',
+    r'kill', r'die', r'suck', r'f\*ck', r'f##k', r'ass'
+]
+SPAM_KEYWORDS = ['viagra', 'casino', 'lottery', 'free money', 'click here']
+PROMPT_INJECTION_KEYWORDS = [
+    'ignore', 'forget', 'bypass', 'override', 'system prompt',
+    'you are', 'pretend', 'roleplay', 'act as', 'forget instructions'
+]
+MALICIOUS_PATTERNS = [
+    r'drop\s+table',  # SQL injection
+    r'delete\s+from',  # SQL injection
+    r'exec\(',  # Code execution
+    r'eval\(',  # Code execution
+    r'__import__',  # Python import
+    r'subprocess',  # Process execution
+    r'os\.system',  # System call
+]
+
+_ABUSE_RE = re.compile('|'.join(ABUSE_PATTERNS), re.IGNORECASE)
+_SPAM_RE = re.compile('|'.join(map(re.escape, SPAM_KEYWORDS)))
+_PROMPT_INJECTION_RE = re.compile('|'.join(map(re.escape, PROMPT_INJECTION_KEYWORDS)))
+_MALICIOUS_RE = re.compile('|'.join(MALICIOUS_PATTERNS))
+
 
 class ChatbotSafety:
     """
@@ -21,18 +47,6 @@ class ChatbotSafety:
         self.user_message_history = defaultdict(list)  # Track user messages
         self.user_warnings = defaultdict(int)  # Track warnings per user
         self.blocked_users = set()  # Temporarily blocked users
-        
-        # Patterns for detection
-        self.abuse_patterns = [
-            r'damn', r'hell', r'bastard', r'idiot', r'stupid',
-            r'kill', r'die', r'suck', r'f\*ck', r'f##k', r'ass'
-        ]
-        
-        self.spam_keywords = ['viagra', 'casino', 'lottery', 'free money', 'click here']
-        self.prompt_injection_keywords = [
-            'ignore', 'forget', 'bypass', 'override', 'system prompt',
-            'you are', 'pretend', 'roleplay', 'act as', 'forget instructions'
-        ]
     
     def check_spam(self, user_id: str, message: str) -> Tuple[bool, str]:
         """
@@ -55,7 +69,7 @@ class ChatbotSafety:
             
             # Check for spam keywords
             message_lower = message.lower()
-            if any(keyword in message_lower for keyword in self.spam_keywords):
+            if _SPAM_RE.search(message_lower):
                 logger.warning(f"Spam detected from {user_id}: {message}")
                 return True, "❌ This message contains spam. Please ask legitimate questions about Fleety."
             
@@ -71,16 +85,13 @@ class ChatbotSafety:
         Returns: (is_abusive, message)
         """
         try:
-            message_lower = message.lower()
-            
             # Check against abuse patterns
-            for pattern in self.abuse_patterns:
-                if re.search(pattern, message_lower, re.IGNORECASE):
-                    logger.warning(f"Abusive language detected: {message}")
-                    return True, (
-                        "😊 I'm here to help! Please keep our conversation respectful and family-friendly. "
-                        "Let me know how I can assist you with Fleety."
-                    )
+            if _ABUSE_RE.search(message):
+                logger.warning(f"Abusive language detected: {message}")
+                return True, (
+                    "😊 I'm here to help! Please keep our conversation respectful and family-friendly. "
+                    "Let me know how I can assist you with Fleety."
+                )
             
             return False, ""
             
@@ -97,12 +108,7 @@ class ChatbotSafety:
             message_lower = message.lower()
             
             # Check for prompt injection keywords
-            injection_detected = any(
-                keyword in message_lower 
-                for keyword in self.prompt_injection_keywords
-            )
-            
-            if injection_detected:
+            if _PROMPT_INJECTION_RE.search(message_lower):
                 logger.warning(f"Potential prompt injection detected: {message}")
                 return True, (
                     "🔒 I'm here to help with Fleety questions only. "
@@ -123,25 +129,14 @@ class ChatbotSafety:
         try:
             message_lower = message.lower()
             
-            # Patterns for malicious intent
-            malicious_patterns = [
-                r'drop\s+table',  # SQL injection
-                r'delete\s+from',  # SQL injection
-                r'exec\(',  # Code execution
-                r'eval\(',  # Code execution
-                r'__import__',  # Python import
-                r'subprocess',  # Process execution
-                r'os\.system',  # System call
-            ]
-            
-            for pattern in malicious_patterns:
-                if re.search(pattern, message_lower):
-                    logger.warning(f"Malicious request detected: {message}")
-                    return True, (
-                        "🚫 I've detected a potentially harmful request. "
-                        "For security reasons, this conversation has been reset. "
-                        "Please ask legitimate questions about Fleety."
-                    )
+            # Check against malicious-intent patterns
+            if _MALICIOUS_RE.search(message_lower):
+                logger.warning(f"Malicious request detected: {message}")
+                return True, (
+                    "🚫 I've detected a potentially harmful request. "
+                    "For security reasons, this conversation has been reset. "
+                    "Please ask legitimate questions about Fleety."
+                )
             
             return False, ""
             
@@ -10,6 +10,32 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# One pooled client for every Resend call, so requests reuse keep-alive
+# connections instead of paying a TCP/TLS handshake per email. HTTP/2 lets
+# concurrent sends (user + admin) multiplex over a single connection.
+_http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        limits = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        try:
+            _http_client = httpx.AsyncClient(timeout=10.0, limits=limits, http2=True)
+        except ImportError:
+            logger.warning("h2 not installed - Resend client falling back to HTTP/1.1")
+            _http_client = httpx.AsyncClient(timeout=10.0, limits=limits)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared AsyncClient (called on app shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 class ResendEmailService:
     """Async email service using Resend API for transactional emails"""
@@ -19,6 +45,7 @@ class ResendEmailService:
         self.api_url = "https://api.resend.com/emails"
         self.from_email = os.getenv("FROM_EMAIL", "onboarding@resend.dev")
         self.enabled = bool(self.api_key)
+        self.headers = {"Authorization": f"Bearer {self.api_key}"}
         
         if not self.enabled:
             logger.warning("Resend API key not configured - email sending disabled")
@@ -79,13 +106,11 @@ class ResendEmailService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.api_url,
-                    json=payload,
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
+            response = await get_http_client().post(
+                self.api_url,
+                json=payload,
+                headers=self.headers
+            )
             
             if response.status_code == 200:
                 logger.info(f"Waitlist confirmation sent to {email}")
@@ -156,13 +181,11 @@ class ResendEmailService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.api_url,
-                    json=payload,
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
+            response = await get_http_client().post(
+                self.api_url,
+                json=payload,
+                headers=self.headers
+            )
             
             if response.status_code == 200:
                 logger.info(f"Launch notification sent to {email}")
@@ -186,35 +209,34 @@ class ResendEmailService:
         errors = []
         
         try:
-            async with httpx.AsyncClient() as client:
-                for email in emails:
-                    try:
-                        payload = {
-                            "from": f"Fleety <{self.from_email}>",
-                            "to": email,
-                            "subject": subject,
-                            "html": html
-                        }
-                        
-                        response = await client.post(
-                            self.api_url,
-                            json=payload,
-                            headers={"Authorization": f"Bearer {self.api_key}"},
-                            timeout=10.0
-                        )
-                        
-                        if response.status_code == 200:
-                            sent += 1
-                        else:
-                            failed += 1
-                            errors.append({"email": email, "error": response.text})
-                            
-                    except Exception as e:
+            client = get_http_client()
+            for email in emails:
+                try:
+                    payload = {
+                        "from": f"Fleety <{self.from_email}>",
+                        "to": email,
+                        "subject": subject,
+                        "html": html
+                    }
+                    
+                    response = await client.post(
+                        self.api_url,
+                        json=payload,
+                        headers=self.headers
+                    )
+                    
+                    if response.status_code == 200:
+                        sent += 1
+                    else:
                         failed += 1
-                        errors.append({"email": email, "error": str(e)})
-                
-                logger.info(f"Bulk email sent: {sent} successful, {failed} failed")
-                
+                        errors.append({"email": email, "error": response.text})
+                        
+                except Exception as e:
+                    failed += 1
+                    errors.append({"email": email, "error": str(e)})
+            
+            logger.info(f"Bulk email sent: {sent} successful, {failed} failed")
+            
         except Exception as e:
             logger.error(f"Bulk email sending failed: {str(e)}")
             errors.append({"error": str(e)})
@@ -0,0 +1,12 @@
+"""
+Position Write Buffer
+Collects incoming GPS positions in memory and writes them to MongoDB with
+insert_many from a single background task, instead of one insert per update
+"""
+from app.services.batch_buffer import BatchBuffer
+
+# Global buffer instance; the lifespan starts it with
+# VehiclePosition.insert_positions as the writer
+position_buffer = BatchBuffer(
+    "position", max_batch=500, flush_interval=0.2, max_queued=50000
+)
@@ -1,12 +1,15 @@
 import os
 import json
+import time
 from typing import List, Dict, Any, Optional
 import logging
+import anyio
 import google.generativeai as genai
 from app.services.semantic_search import SemanticSearch
 from app.services.analytics import ChatbotAnalytics
 from app.services.fleety_assistant_prompt import FleetyAssistantPrompt
 from app.models.analytics import Analytics
+from app.services.analytics_buffer import analytics_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +50,11 @@ class RAGService:
         # MongoDB connection
         from app.models.faq import FAQ
         self.faq_model = FAQ
+        
+        # Prepared FAQ search index, rebuilt when stale or when FAQs change
+        self._faq_index = None
+        self._faq_index_built_at = 0.0
+        self.faq_index_ttl = 300  # seconds; bounds staleness across workers
 
     async def _is_gemini_available(self) -> bool:
         """Check if Gemini API is available"""
@@ -194,17 +202,43 @@ If you don't receive the email within 5 minutes, please contact support@fleety.c
         return None
 
 
+    async def get_faq_index(self):
+        """
+        Return (faqs, prepared index), loading FAQs and preparing their texts
+        only when the cached index is missing or older than faq_index_ttl
+        """
+        if self._faq_index is None or time.monotonic() - self._faq_index_built_at > self.faq_index_ttl:
+            all_faqs = await self.faq_model.find_all()
+            self._faq_index = (all_faqs, self.semantic_search.build_index(all_faqs))
+            self._faq_index_built_at = time.monotonic()
+        return self._faq_index
+
+    def invalidate_faq_index(self) -> None:
+        """Force the next search to reload FAQs (call after adding/deleting FAQs)"""
+        self._faq_index = None
+
+    async def warmup(self) -> None:
+        """
+        Pay one-off costs before the first request is served: load and prepare
+        the FAQ index and run one local retrieval pass. Never calls Gemini.
+        """
+        started = time.monotonic()
+        await self.get_faq_index()
+        await self._keyword_search_faqs("how do I add a vehicle", top_k=1)
+        logger.info(f"RAG service warmed up in {(time.monotonic() - started) * 1000:.0f}ms")
+
     async def _keyword_search_faqs(
         self,
         query: str,
-        top_k: int = 5
+        top_k: int = 5,
+        intent: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Search FAQs using semantic search + intent matching
         Handles synonyms, typos, and intent detection
         """
         try:
-            all_faqs = await self.faq_model.find_all()
+            all_faqs, faq_index = await self.get_faq_index()
             
             if not all_faqs:
                 logger.warning("No FAQs found in database")
@@ -215,7 +249,9 @@ If you don't receive the email within 5 minutes, please contact support@fleety.c
                 query=query,
                 faqs=all_faqs,
                 top_k=top_k,
-                threshold=0.3  # Lower threshold for broader matches
+                threshold=0.3,  # Lower threshold for broader matches
+                index=faq_index,
+                intent=intent
             )
             
             # Validate freshness of results
@@ -223,6 +259,8 @@ If you don't receive the email within 5 minutes, please contact support@fleety.c
             for faq, similarity_score in semantic_results:
                 is_fresh = self.semantic_search.validate_answer_freshness(faq)
                 if is_fresh:
+                    # Copy: the indexed FAQ dicts are shared between requests
+                    faq = dict(faq)
                     faq['similarity_score'] = similarity_score
                     validated_results.append(faq)
                 else:
@@ -380,7 +418,7 @@ Provide a helpful, specific response that:
         
         return True
 
-    async def search_and_generate(self, query: str) -> Dict[str, Any]:
+    async def search_and_generate(self, query: str, intent: Optional[str] = None) -> Dict[str, Any]:
         """
         Complete RAG pipeline with semantic search + answer grounding + analytics:
         1. Semantic search MongoDB for relevant FAQs (handles synonyms, intent)
@@ -389,6 +427,8 @@ Provide a helpful, specific response that:
         4. Generate answer with Gemini 3.0 (or best FAQ match)
         5. Track comprehensive analytics metadata
         
+        Pass `intent` if the caller already ran detect_intent on the query.
+        
         Returns:
             {
                 "answer": "grounded, synthesized answer",
@@ -426,8 +466,12 @@ Provide a helpful, specific response that:
                     "analytics": analytics
                 }
             
+            # Detect intent once; reused by the FAQ search and the answer prompt
+            if intent is None:
+                intent, _ = self.semantic_search.detect_intent(query)
+            
             # Step 1: Semantic search for relevant FAQs
-            relevant_faqs = await self._keyword_search_faqs(query, top_k=5)
+            relevant_faqs = await self._keyword_search_faqs(query, top_k=5, intent=intent)
             
             # Determine if FAQ was matched and get similarity score
             faq_matched = len(relevant_faqs) > 0
@@ -501,7 +545,6 @@ Provide a helpful, specific response that:
             
             # Step 2: Generate answer with intent and user context
             used_gemini = await self._is_gemini_available()
-            intent, _ = self.semantic_search.detect_intent(query)
             
             generated_answer = await self.generate_llm_answer(
                 query=query,
@@ -591,8 +634,7 @@ Provide a helpful, specific response that:
         """
         try:
             analytics_metadata = result.get("analytics", {})
-            
-            await Analytics.record_interaction(
+            interaction = dict(
                 user_id=user_id,
                 query=query,
                 intent=intent,
@@ -602,6 +644,12 @@ Provide a helpful, specific response that:
                 response_quality=analytics_metadata.get("similarity_score", 0.0)
             )
             
+            # Batched by the background flusher; if it isn't running or is full,
+            # write directly in a worker thread (sync PyMongo) off the event loop
+            document = Analytics.build_document(**interaction)
+            if not analytics_buffer.add(document):
+                await anyio.to_thread.run_sync(Analytics.insert_documents, [document])
+            
             logger.info(f"Analytics recorded for user {user_id}")
             return True
         
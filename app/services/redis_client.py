@@ -0,0 +1,153 @@
+"""
+Redis Client
+Optional shared redis.asyncio connection, enabled by setting REDIS_URL.
+Helpers return None when Redis is not configured or unreachable so callers
+can fall back to MongoDB.
+"""
+import logging
+import time
+from typing import Any, Optional
+
+import orjson
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Return the shared client, or None if REDIS_URL is not set"""
+    global _client
+    if not settings.redis_url:
+        return None
+    if _client is None:
+        _client = redis.from_url(
+            settings.redis_url,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5
+        )
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client (called on app shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def cache_get_json(key: str) -> Optional[Any]:
+    """Cached JSON value, or None on a miss or if Redis is unavailable"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(key)
+        return orjson.loads(raw) if raw is not None else None
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis get failed for {key}: {str(e)}")
+        return None
+
+
+async def cache_set_json(key: str, value: Any, ttl_seconds: int) -> bool:
+    """SETEX a JSON value; False if Redis is unavailable"""
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        await client.setex(key, ttl_seconds, orjson.dumps(value))
+        return True
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis set failed for {key}: {str(e)}")
+        return False
+
+
+async def cache_delete(key: str) -> None:
+    """Delete a cached key (no-op if Redis is unavailable)"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.delete(key)
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis delete failed for {key}: {str(e)}")
+
+
+class SharedCache:
+    """
+    JSON cache shared through Redis when REDIS_URL is set, and kept in a
+    per-process TTLCache otherwise
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 60):
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        if get_redis() is not None:
+            return await cache_get_json(key)
+        return self._local.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if get_redis() is not None:
+            await cache_set_json(key, value, ttl)
+        else:
+            self._local.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._local.pop(key)
+        await cache_delete(key)
+
+
+async def sliding_window_hit(key: str, window_seconds: int) -> Optional[int]:
+    """
+    Record one hit in a sorted-set sliding window.
+    Returns the number of hits already in the window before this one,
+    or None if Redis is unavailable.
+    """
+    client = get_redis()
+    if client is None:
+        return None
+
+    now = time.time()
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, 0, now - window_seconds)
+            pipe.zcard(key)
+            pipe.zadd(key, {str(time.time_ns()): now})
+            pipe.expire(key, window_seconds)
+            _, count, _, _ = await pipe.execute()
+        return count
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis rate limit check failed for {key}: {str(e)}")
+        return None
+
+
+async def fixed_window_hit(key: str, window_seconds: int) -> Optional[int]:
+    """
+    Record one hit in a fixed window counter (one INCR + EXPIRE).
+    Returns the number of hits already in the current window before this one,
+    or None if Redis is unavailable.
+    """
+    client = get_redis()
+    if client is None:
+        return None
+
+    window_key = f"{key}:{int(time.time() // window_seconds)}"
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.incr(window_key)
+            pipe.expire(window_key, window_seconds)
+            count, _ = await pipe.execute()
+        return count - 1
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis rate limit check failed for {key}: {str(e)}")
+        return None
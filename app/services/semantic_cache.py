@@ -0,0 +1,53 @@
+"""
+Semantic Answer Cache
+Reuses synthesized FAQ answers for repeated / trivially re-worded queries
+so they skip FAQ retrieval and the Gemini round-trip entirely
+"""
+import logging
+import re
+from typing import Dict, Any, Optional
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class SemanticCache:
+    """
+    LRU + TTL cache of search results keyed by the normalized query
+    (lowercased, punctuation stripped, whitespace collapsed), so
+    "How do I add a vehicle?" and "how do i add a vehicle" share one entry
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Canonical cache key for a query"""
+        text = _PUNCTUATION.sub('', query.lower())
+        return _WHITESPACE.sub(' ', text).strip()
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for an equivalent query, if any"""
+        result = self._cache.get(self.normalize(query))
+        if result is not None:
+            logger.info(f"Semantic cache hit for query: {query}")
+        return result
+
+    def set(self, query: str, result: Dict[str, Any]) -> None:
+        """Cache a result; only grounded answers are worth reusing"""
+        if not result.get("is_grounded"):
+            return
+        self._cache.set(self.normalize(query), result)
+
+    def clear(self) -> None:
+        """Drop all cached answers (call when the FAQ set changes)"""
+        self._cache.clear()
+
+
+# Global cache instance
+semantic_cache = SemanticCache()
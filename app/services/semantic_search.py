@@ -3,7 +3,8 @@ Semantic Search & RAG Enhancement Module
 Handles semantic similarity, intent matching, and grounding answers
 """
 import logging
-from typing import List, Dict, Any, Tuple
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Optional
 from difflib import SequenceMatcher
 import re
 
@@ -68,6 +69,9 @@ class SemanticSearch:
             'team': [r'team', r'invite', r'member', r'role', r'permission'],
             'compliance': [r'compliance', r'license', r'driver'],
         }
+        
+        # Repeat queries (same text up to case/surrounding whitespace) reuse the detected intent
+        self._detect_intent_cached = lru_cache(maxsize=1024)(self._detect_intent)
     
     def normalize_text(self, text: str) -> str:
         """Normalize text for comparison"""
@@ -96,7 +100,10 @@ class SemanticSearch:
         Detect user intent from query
         Returns: (intent, confidence)
         """
-        query_lower = query.lower()
+        return self._detect_intent_cached(query.strip().lower())
+    
+    def _detect_intent(self, query_lower: str) -> Tuple[str, float]:
+        """Uncached intent detection on an already lowercased query"""
         best_intent = 'general'
         best_score = 0.0
         
@@ -114,37 +121,57 @@ class SemanticSearch:
         
         return best_intent, best_score
     
-    def calculate_similarity(self, text1: str, text2: str) -> float:
+    def prepare_text(self, text: str) -> Tuple[str, str]:
         """
-        Calculate similarity between two texts using sequence matching
-        Handles typos and variations
-        Returns: similarity score (0.0 to 1.0)
+        Normalize and synonym-expand text once
+        Returns: (normalized, expanded)
         """
-        norm1 = self.normalize_text(text1)
-        norm2 = self.normalize_text(text2)
-        
+        normalized = self.normalize_text(text)
+        return normalized, self.expand_with_synonyms(normalized)
+    
+    def build_index(self, faqs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Tuple[str, str], Tuple[str, str]]]:
+        """
+        Precompute the normalized/expanded question and answer of every FAQ
+        so searches don't redo that work per FAQ per query
+        Returns: List of (faq, prepared_question, prepared_answer)
+        """
+        return [
+            (faq, self.prepare_text(faq.get('question', '')), self.prepare_text(faq.get('answer', '')))
+            for faq in faqs
+        ]
+    
+    def _prepared_similarity(self, prepared1: Tuple[str, str], prepared2: Tuple[str, str]) -> float:
+        """Similarity between two texts already passed through prepare_text"""
         # Direct similarity
-        direct_similarity = SequenceMatcher(None, norm1, norm2).ratio()
+        direct_similarity = SequenceMatcher(None, prepared1[0], prepared2[0]).ratio()
         
         # Expanded similarity (with synonyms)
-        exp1 = self.expand_with_synonyms(norm1)
-        exp2 = self.expand_with_synonyms(norm2)
-        expanded_similarity = SequenceMatcher(None, exp1, exp2).ratio()
+        expanded_similarity = SequenceMatcher(None, prepared1[1], prepared2[1]).ratio()
         
         # Weighted average: favor expanded similarity
-        combined_score = (direct_similarity * 0.4) + (expanded_similarity * 0.6)
-        
-        return combined_score
+        return (direct_similarity * 0.4) + (expanded_similarity * 0.6)
+    
+    def calculate_similarity(self, text1: str, text2: str) -> float:
+        """
+        Calculate similarity between two texts using sequence matching
+        Handles typos and variations
+        Returns: similarity score (0.0 to 1.0)
+        """
+        return self._prepared_similarity(self.prepare_text(text1), self.prepare_text(text2))
     
     def search_faqs(
         self,
         query: str,
         faqs: List[Dict[str, Any]],
         top_k: int = 5,
-        threshold: float = 0.3
+        threshold: float = 0.3,
+        index: Optional[List[Tuple[Dict[str, Any], Tuple[str, str], Tuple[str, str]]]] = None,
+        intent: Optional[str] = None
     ) -> List[Tuple[Dict[str, Any], float]]:
         """
         Search FAQs semantically
+        Pass a prebuilt `index` (from build_index) to skip re-preparing the FAQ texts,
+        and an already detected `intent` to skip detecting it again
         Returns: List of (faq, similarity_score) tuples, sorted by relevance
         """
         try:
@@ -152,18 +179,20 @@ class SemanticSearch:
                 return []
             
             # Detect intent for context
-            intent, intent_confidence = self.detect_intent(query)
-            logger.info(f"Detected intent: {intent} (confidence: {intent_confidence:.2f})")
+            if intent is None:
+                intent, intent_confidence = self.detect_intent(query)
+                logger.info(f"Detected intent: {intent} (confidence: {intent_confidence:.2f})")
+            
+            if index is None:
+                index = self.build_index(faqs)
+            prepared_query = self.prepare_text(query)
             
             results = []
             
-            for faq in faqs:
-                question = faq.get('question', '')
-                answer = faq.get('answer', '')
-                
+            for faq, prepared_question, prepared_answer in index:
                 # Calculate similarity for question and answer
-                q_similarity = self.calculate_similarity(query, question)
-                a_similarity = self.calculate_similarity(query, answer) * 0.5  # Weight answer lower
+                q_similarity = self._prepared_similarity(prepared_query, prepared_question)
+                a_similarity = self._prepared_similarity(prepared_query, prepared_answer) * 0.5  # Weight answer lower
                 
                 # Combined similarity
                 similarity = max(q_similarity, a_similarity)
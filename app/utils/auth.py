@@ -3,10 +3,25 @@ from typing import Optional
 from jose import JWTError, jwt
 import hashlib
 import secrets
-from datetime import datetime, timedelta, timezone
-from typing import Optional
-from jose import JWTError, jwt
+import time
 from app.config import settings
+from app.services.redis_client import SharedCache
+from app.utils.cache import TTLCache
+
+# Decoded payloads keyed by raw token, so repeat requests skip signature verification.
+# Each entry is dropped a few seconds before the token's own `exp`.
+_token_cache = TTLCache(maxsize=10000, ttl=300)
+_TOKEN_EXPIRY_MARGIN = 5
+
+# Per-user cutoff (epoch seconds) set on password change/reset: tokens issued
+# before it are rejected. Kept in Redis when REDIS_URL is set so every worker
+# (and a restarted one) sees it; per process otherwise. Entries only need to
+# outlive the tokens they revoke.
+_revoked_before = SharedCache(maxsize=10000, ttl=settings.access_token_expire_minutes * 60)
+# Cutoff lookups are remembered briefly so an authenticated request doesn't
+# cost a Redis round trip; a revocation reaches other workers within this
+_REVOCATION_CHECK_TTL = 5
+_cutoff_lookups = TTLCache(maxsize=10000, ttl=_REVOCATION_CHECK_TTL)
 
 
 def hash_password(password: str) -> str:
@@ -94,7 +109,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(timezone.utc) + timedelta(
             minutes=settings.access_token_expire_minutes
         )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
     encoded_jwt = jwt.encode(
         to_encode, settings.secret_key, algorithm=settings.algorithm
     )
@@ -109,3 +124,57 @@ def decode_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+
+async def revoke_user_tokens(user_id: str) -> None:
+    """Reject every token issued to this user before now (e.g. after a password change)"""
+    cutoff = int(time.time())
+    await _revoked_before.set(f"fleety:revoked:{user_id}", cutoff)
+    _cutoff_lookups.set(str(user_id), cutoff)
+
+
+async def _revocation_cutoff(user_id: str) -> int:
+    """The user's revocation cutoff, or 0 if their tokens haven't been revoked"""
+    cutoff = _cutoff_lookups.get(user_id)
+    if cutoff is None:
+        cutoff = await _revoked_before.get(f"fleety:revoked:{user_id}") or 0
+        _cutoff_lookups.set(user_id, cutoff)
+    return cutoff
+
+
+async def _is_revoked(payload: dict) -> bool:
+    user_id = payload.get("sub")
+    if not user_id:
+        return False
+    cutoff = await _revocation_cutoff(str(user_id))
+    if not cutoff:
+        return False
+    issued_at = payload.get("iat")
+    return issued_at is None or issued_at < cutoff
+
+
+async def decode_token_cached(token: str) -> Optional[dict]:
+    """decode_token with an in-process cache bounded by the token expiry"""
+    payload = _token_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        _cache_payload(token, payload)
+
+    if await _is_revoked(payload):
+        _token_cache.pop(token)
+        return None
+    return payload
+
+
+def _cache_payload(token: str, payload: dict) -> None:
+    exp = payload.get("exp")
+    if exp is None:
+        _token_cache.set(token, payload)
+    else:
+        # Near-expiry tokens aren't cached; they go back through jwt.decode,
+        # which rejects them once exp passes
+        ttl = exp - time.time() - _TOKEN_EXPIRY_MARGIN
+        if ttl > 0:
+            _token_cache.set(token, payload, ttl=ttl)
@@ -0,0 +1,53 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+
+from app.utils.auth import decode_token_cached
+
+# auto_error=False so a missing header yields 401 (HTTPBearer's own error is 403)
+bearer_scheme = HTTPBearer(auto_error=False)
+
+_BEARER_PREFIX = "Bearer "
+_BEARER_PREFIX_LEN = len(_BEARER_PREFIX)
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """
+    Token part of a raw `Authorization: Bearer <token>` header, or None.
+    A fixed-length slice, so the token body is never scanned (unlike str.replace).
+    """
+    if (
+        not authorization
+        or len(authorization) <= _BEARER_PREFIX_LEN
+        or authorization[:_BEARER_PREFIX_LEN] != _BEARER_PREFIX
+    ):
+        return None
+    return authorization[_BEARER_PREFIX_LEN:]
+
+
+async def get_current_user_id(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> str:
+    """Shared dependency: return the user id (`sub`) of the Bearer token or raise 401"""
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+
+    payload = await decode_token_cached(credentials.credentials)
+    user_id = payload.get("sub") if payload else None
+
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    return user_id
+
+
+async def get_optional_user_id(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> Optional[str]:
+    """Like get_current_user_id, but returns None for anonymous or invalid requests"""
+    if not credentials:
+        return None
+    payload = await decode_token_cached(credentials.credentials)
+    return payload.get("sub") if payload else None
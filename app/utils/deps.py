@@ -0,0 +1,51 @@
+from fastapi import Request
+
+from app.services.rag_service import RAGService
+from app.services.memory_service import MemoryService
+from app.services.greeting_service import GreetingService
+from app.models.vehicle import Vehicle
+from app.models.fuel_log import FuelLog
+from app.models.maintenance import Maintenance
+from app.models.reminder import Reminder
+from app.models.public_contact import PublicContactInquiry
+from app.models.vehicle_position import VehiclePosition
+
+
+# Shared service singletons, built once per worker in the app lifespan (see app.main)
+
+def get_rag_service(request: Request) -> RAGService:
+    return request.app.state.rag
+
+
+def get_memory_service(request: Request) -> MemoryService:
+    return request.app.state.memory
+
+
+def get_greeting_service(request: Request) -> GreetingService:
+    return request.app.state.greeting
+
+
+# Model wrappers bound to the shared Motor database, also built once in the lifespan
+
+def get_vehicle_model(request: Request) -> Vehicle:
+    return request.app.state.vehicle_model
+
+
+def get_fuel_log_model(request: Request) -> FuelLog:
+    return request.app.state.fuel_log_model
+
+
+def get_maintenance_model(request: Request) -> Maintenance:
+    return request.app.state.maintenance_model
+
+
+def get_reminder_model(request: Request) -> Reminder:
+    return request.app.state.reminder_model
+
+
+def get_public_contact_model(request: Request) -> PublicContactInquiry:
+    return request.app.state.public_contact_model
+
+
+def get_position_model(request: Request) -> VehiclePosition:
+    return request.app.state.position_model
@@ -0,0 +1,83 @@
+import math
+from typing import List, Optional
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision stored on position documents (~153m x 153m cells)
+POSITION_PRECISION = 7
+# Precision of the 3x3 cell block used to answer small-radius searches
+# (~610m x 1.2km cells at the equator)
+SEARCH_PRECISION = 6
+
+EARTH_RADIUS_M = 6371008.8
+_METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def encode(latitude: float, longitude: float, precision: int = POSITION_PRECISION) -> str:
+    """Standard base32 geohash of a point"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if longitude >= mid:
+                bits = bits * 2 + 1
+                lng_lo = mid
+            else:
+                bits *= 2
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = bits * 2 + 1
+                lat_lo = mid
+            else:
+                bits *= 2
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> tuple:
+    """(latitude, longitude) size of a cell in degrees"""
+    total_bits = 5 * precision
+    lat_bits = total_bits // 2
+    lng_bits = total_bits - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def covering_cells(latitude: float, longitude: float, radius_m: float,
+                   precision: int = SEARCH_PRECISION) -> Optional[List[str]]:
+    """
+    The cell containing the point plus its 8 neighbours, which together cover
+    every point within radius_m. None if the radius is wider than one cell
+    (or the block would cross a pole), in which case callers should fall back
+    to a $geoNear query.
+    """
+    dlat, dlng = cell_size(precision)
+    lng_cell_m = dlng * _METERS_PER_DEGREE * math.cos(math.radians(latitude))
+    if radius_m > min(dlat * _METERS_PER_DEGREE, lng_cell_m) or abs(latitude) + dlat >= 90:
+        return None
+
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            lng = (longitude + j * dlng + 180) % 360 - 180
+            cells.add(encode(latitude + i * dlat, lng, precision))
+    return sorted(cells)
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle (haversine) distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
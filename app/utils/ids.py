@@ -0,0 +1,15 @@
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+
+def parse_object_id(value: str, detail: str = "Invalid ID") -> ObjectId:
+    """
+    Convert a path/body id to ObjectId once at the HTTP boundary.
+    Uses ObjectId.is_valid so bad input never goes through exception machinery.
+    """
+    if not ObjectId.is_valid(value):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
+    return ObjectId(value)
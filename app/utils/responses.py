@@ -0,0 +1,42 @@
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import orjson
+from bson import ObjectId
+
+
+def _default(obj: Any) -> Any:
+    """orjson hook for the BSON types Mongo hands back that it can't encode natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def iter_json_envelope(
+    key: str,
+    items: Iterable[Any],
+    fields: Optional[Dict[str, Any]] = None,
+    count_key: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Incrementally encode {**fields, key: [*items], count_key: len(items)} so a
+    large cursor goes out one document at a time instead of being buffered
+    as a list. Feed the result to StreamingResponse.
+    """
+    head = b"{"
+    for name, value in (fields or {}).items():
+        head += _dumps(name) + b":" + _dumps(value) + b","
+    yield head + _dumps(key) + b":["
+
+    count = 0
+    for item in items:
+        yield (b"," if count else b"") + _dumps(item)
+        count += 1
+
+    tail = b"]"
+    if count_key:
+        tail += b"," + _dumps(count_key) + b":" + _dumps(count)
+    yield tail + b"}"
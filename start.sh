@@ -47,4 +47,4 @@ echo "Or update MONGODB_URL in .env"
 echo ""
 
 # Start the server
-python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
+python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 --loop uvloop --http httptools
@@ -117,7 +117,8 @@ def test_position_update(vehicle_id: str, position_data: dict):
             headers={"Content-Type": "application/json"}
         )
         
-        if response.status_code == 200:
+        # 202 Accepted: positions are queued and written in batches
+        if response.status_code == 202:
             print(f"✓ Updated position for vehicle {vehicle_id[:8]}...: {response.json()['status']}")
             return True
         else:
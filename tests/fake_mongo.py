@@ -0,0 +1,202 @@
+"""
+Minimal in-memory stand-ins for PyMongo/Motor collections, supporting only
+the query and update operators the models under test use
+"""
+import copy
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+_MISSING = object()
+
+
+def _compare(op, value, arg):
+    if value is _MISSING or value is None:
+        return False
+    if op == "$lt":
+        return value < arg
+    if op == "$gte":
+        return value >= arg
+    raise NotImplementedError(op)
+
+
+def _match_ops(value, ops):
+    for op, arg in ops.items():
+        if op == "$exists":
+            if (value is not _MISSING) != arg:
+                return False
+        elif op == "$not":
+            if _match_ops(value, arg):
+                return False
+        elif op == "$in":
+            if not any(
+                (isinstance(value, str) and arg_value.match(value) is not None)
+                if hasattr(arg_value, "match") else value == arg_value
+                for arg_value in arg
+            ):
+                return False
+        elif not _compare(op, value, arg):
+            return False
+    return True
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+            continue
+        value = doc.get(key, _MISSING)
+        if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            if not _match_ops(value, cond):
+                return False
+        elif value is _MISSING or value != cond:
+            return False
+    return True
+
+
+def evaluate(expr, doc):
+    """Aggregation expressions used by update pipelines ($cond/$lt/$literal)"""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, dict):
+        if "$literal" in expr:
+            return expr["$literal"]
+        if "$cond" in expr:
+            condition, if_true, if_false = expr["$cond"]
+            return evaluate(if_true if evaluate(condition, doc) else if_false, doc)
+        if "$lt" in expr:
+            left, right = (evaluate(e, doc) for e in expr["$lt"])
+            # BSON order: null/missing sorts before every other value
+            return left is None or (right is not None and left < right)
+    return expr
+
+
+def apply_update(doc, update):
+    if isinstance(update, list):
+        for stage in update:
+            (op, fields), = stage.items()
+            assert op == "$set", op
+            values = {k: evaluate(v, doc) for k, v in fields.items()}
+            doc.update(values)
+        return
+    for op, fields in update.items():
+        if op == "$set":
+            doc.update(fields)
+        elif op == "$setOnInsert":
+            pass  # only applied by upserts, see FakeCollection._upsert
+        elif op == "$inc":
+            for k, v in fields.items():
+                doc[k] = doc.get(k, 0) + v
+        else:
+            raise NotImplementedError(op)
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    if all(not v for k, v in projection.items() if k != "_id"):
+        excluded = {k for k, v in projection.items() if not v}
+        return {k: copy.deepcopy(v) for k, v in doc.items() if k not in excluded}
+    included = {k for k, v in projection.items() if v} | {"_id"}
+    if projection.get("_id") == 0:
+        included.discard("_id")
+    return {k: copy.deepcopy(v) for k, v in doc.items() if k in included}
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeCollection:
+    """Synchronous collection (PyMongo-style)"""
+
+    def __init__(self, unique=()):
+        self.docs = []
+        self.unique = tuple(unique)
+
+    def _check_unique(self, doc):
+        for key in self.unique:
+            if any(d.get(key) == doc.get(key) for d in self.docs if d is not doc):
+                raise DuplicateKeyError(f"duplicate {key}")
+
+    def insert_one(self, document):
+        doc = copy.deepcopy(document)
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return _Result(inserted_id=doc["_id"])
+
+    def insert_many(self, documents, ordered=True):
+        return _Result(inserted_ids=[self.insert_one(d).inserted_id for d in documents])
+
+    def find(self, query=None, projection=None):
+        return [_project(d, projection) for d in self.docs if matches(d, query or {})]
+
+    def find_one(self, query=None, projection=None):
+        found = FakeCollection.find(self, query, projection)
+        return found[0] if found else None
+
+    def find_one_and_update(self, query, update, return_document=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                apply_update(doc, update)
+                return copy.deepcopy(doc)
+        return None
+
+    def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                apply_update(doc, update)
+                return _Result(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            return self._upsert(query, update)
+        return _Result(matched_count=0, modified_count=0, upserted_id=None)
+
+    def _upsert(self, query, update):
+        doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        doc["_id"] = ObjectId()
+        if isinstance(update, dict):
+            doc.update(update.get("$setOnInsert", {}))
+        apply_update(doc, update)
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return _Result(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+
+    def bulk_write(self, requests, ordered=True):
+        modified = 0
+        for request in requests:
+            result = self.update_one(request._filter, request._doc, upsert=request._upsert)
+            modified += result.modified_count
+        return _Result(modified_count=modified)
+
+
+class _AsyncCursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncCollection(FakeCollection):
+    """Motor-style collection: same behaviour, awaitable methods"""
+
+    def find(self, query=None, projection=None):
+        return _AsyncCursor(FakeCollection.find(self, query, projection))
+
+    async def find_one(self, query=None, projection=None):
+        return FakeCollection.find_one(self, query, projection)
+
+    async def insert_many(self, documents, ordered=True):
+        return FakeCollection.insert_many(self, documents, ordered)
+
+    async def bulk_write(self, requests, ordered=True):
+        return FakeCollection.bulk_write(self, requests, ordered)
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+from jose import jwt
+
+from app.config import settings
+from app.utils import auth
+from app.utils import cache as cache_module
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock behind every TTLCache; auth caches start empty"""
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", fake)
+    monkeypatch.setattr(settings, "redis_url", "")  # revocations stay in-process
+    auth._token_cache.clear()
+    auth._cutoff_lookups.clear()
+    auth._revoked_before._local.clear()
+    return fake
+
+
+def _token(sub="user-1", exp_in=600, iat=None):
+    now = int(time.time())
+    claims = {"sub": sub, "exp": now + exp_in, "iat": now if iat is None else iat}
+    return jwt.encode(claims, settings.secret_key, algorithm=settings.algorithm)
+
+
+def _decode(token):
+    return asyncio.run(auth.decode_token_cached(token))
+
+
+def test_payload_cached_until_just_before_expiry(clock):
+    token = _token(exp_in=60)
+    assert _decode(token)["sub"] == "user-1"
+    assert auth._token_cache.get(token) is not None
+
+    clock.now += 60 - auth._TOKEN_EXPIRY_MARGIN - 1
+    assert auth._token_cache.get(token) is not None
+    clock.now += 2
+    assert auth._token_cache.get(token) is None
+
+
+def test_near_expiry_tokens_are_not_cached(clock):
+    token = _token(exp_in=auth._TOKEN_EXPIRY_MARGIN - 1)
+    assert _decode(token)["sub"] == "user-1"
+    assert auth._token_cache.get(token) is None
+
+
+def test_invalid_token_is_rejected(clock):
+    assert _decode("not-a-jwt") is None
+    assert _decode(_token(exp_in=-10)) is None
+
+
+def test_revocation_rejects_and_evicts_older_tokens(clock):
+    old = _token(iat=int(time.time()) - 10)
+    assert _decode(old) is not None  # now cached
+
+    asyncio.run(auth.revoke_user_tokens("user-1"))
+    assert _decode(old) is None
+    assert auth._token_cache.get(old) is None
+
+    # Tokens issued after the cutoff (e.g. the new login) still work
+    assert _decode(_token(iat=int(time.time()) + 1)) is not None
+    # Other users are unaffected
+    assert _decode(_token(sub="user-2", iat=int(time.time()) - 10)) is not None
+
+
+def test_revocation_seen_after_lookup_memo_expires(clock):
+    token = _token(iat=int(time.time()) - 10)
+    assert _decode(token) is not None  # remembers "no cutoff" for user-1
+
+    # Revoked by another worker: only the shared store knows about it
+    asyncio.run(auth._revoked_before.set("fleety:revoked:user-1", int(time.time())))
+    assert _decode(token) is not None
+
+    clock.now += auth._REVOCATION_CHECK_TTL
+    assert _decode(token) is None
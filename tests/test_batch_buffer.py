@@ -0,0 +1,71 @@
+import asyncio
+
+from app.services.batch_buffer import BatchBuffer
+
+
+class RecordingWriter:
+    def __init__(self, fail_first=False):
+        self.batches = []
+        self.fail_first = fail_first
+
+    async def __call__(self, batch):
+        if self.fail_first:
+            self.fail_first = False
+            raise RuntimeError("write failed")
+        self.batches.append(list(batch))
+        return len(batch)
+
+
+def test_flushes_full_batches_and_drains_on_stop():
+    async def run():
+        writer = RecordingWriter()
+        buffer = BatchBuffer("test", writer, max_batch=2, flush_interval=10)
+        buffer.start()
+        for i in range(5):
+            assert buffer.add({"n": i})
+        await buffer.stop()
+        return writer.batches, buffer.running
+
+    batches, running = asyncio.run(run())
+    assert [[d["n"] for d in b] for b in batches] == [[0, 1], [2, 3], [4]]
+    assert not running
+
+
+def test_flushes_after_interval():
+    async def run():
+        writer = RecordingWriter()
+        buffer = BatchBuffer("test", writer, max_batch=100, flush_interval=0.01)
+        buffer.start()
+        buffer.add({"n": 1})
+        await asyncio.sleep(0.1)
+        flushed = list(writer.batches)
+        await buffer.stop()
+        return flushed
+
+    assert asyncio.run(run()) == [[{"n": 1}]]
+
+
+def test_add_refuses_when_stopped_or_full():
+    async def run():
+        buffer = BatchBuffer("test", RecordingWriter(), max_queued=1)
+        assert not buffer.add({"n": 0})  # not started
+        buffer.start()
+        first = buffer.add({"n": 1})
+        second = buffer.add({"n": 2})  # flusher hasn't run yet: queue is full
+        await buffer.stop()
+        return first, second
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_writer_given_at_start_and_failures_dont_stop_flusher():
+    async def run():
+        writer = RecordingWriter(fail_first=True)
+        buffer = BatchBuffer("test", max_batch=1, flush_interval=10)
+        buffer.start(writer)
+        buffer.add({"n": 1})
+        buffer.add({"n": 2})
+        await buffer.stop()
+        return writer.batches
+
+    assert asyncio.run(run()) == [[{"n": 2}]]
@@ -0,0 +1,47 @@
+from app.utils import cache as cache_module
+from app.utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    c = TTLCache(maxsize=10, ttl=5)
+
+    c.set("a", 1)
+    clock.now += 4.9
+    assert c.get("a") == 1
+    clock.now += 0.1
+    assert c.get("a") is None
+    assert len(c) == 0
+
+
+def test_per_entry_ttl_overrides_default(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    c = TTLCache(maxsize=10, ttl=60)
+
+    c.set("short", 1, ttl=2)
+    c.set("long", 2)
+    clock.now += 3
+    assert c.get("short", "missing") == "missing"
+    assert c.get("long") == 2
+
+
+def test_lru_eviction_and_pop():
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")  # "b" is now least recently used
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.pop("a") == 1
+    assert c.pop("a", "gone") == "gone"
+    assert c.get("c") == 3
@@ -0,0 +1,71 @@
+import math
+import random
+
+from app.utils import geohash
+
+
+def test_encode_known_values():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash.encode(-25.38262, -49.26561, 8) == "6gkzwgjz"
+
+
+def test_encode_cell_edges_belong_to_upper_cell():
+    # A point exactly on a bisection line falls in the upper/eastern half
+    assert geohash.encode(0.0, 0.0, 5) == "s0000"
+    assert geohash.encode(-1e-9, -1e-9, 1) == "7"
+    assert geohash.encode(90.0, 180.0, 3) == "zzz"
+    assert geohash.encode(-90.0, -180.0, 3) == "000"
+
+
+def test_cell_size():
+    dlat, dlng = geohash.cell_size(6)
+    assert math.isclose(dlat, 180.0 / 2 ** 15)
+    assert math.isclose(dlng, 360.0 / 2 ** 15)
+
+
+def _cell_east_edge(longitude, precision):
+    _, dlng = geohash.cell_size(precision)
+    return math.floor((longitude + 180) / dlng) * dlng - 180 + dlng
+
+
+def test_covering_cells_crosses_cell_edge():
+    lat = 3.1
+    edge = _cell_east_edge(101.7, geohash.SEARCH_PRECISION)
+    inside, outside = edge - 1e-7, edge + 0.0005  # ~55m apart
+
+    cells = geohash.covering_cells(lat, inside, 200)
+    assert geohash.encode(lat, inside, geohash.SEARCH_PRECISION) in cells
+    assert geohash.encode(lat, outside, geohash.SEARCH_PRECISION) in cells
+    assert len(cells) == 9
+
+
+def test_covering_cells_wraps_antimeridian():
+    cells = geohash.covering_cells(10.0, 179.9999, 100)
+    assert geohash.encode(10.0, -179.9999, geohash.SEARCH_PRECISION) in cells
+
+
+def test_covering_cells_covers_every_point_in_radius():
+    rng = random.Random(42)
+    radius = 500
+    for _ in range(500):
+        lat, lng = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        cells = geohash.covering_cells(lat, lng, radius)
+        bearing = rng.uniform(0, 2 * math.pi)
+        dist = rng.uniform(0, radius)
+        # Small offsets, so a flat-earth step is accurate enough
+        dlat = dist * math.cos(bearing) / 111195
+        dlng = dist * math.sin(bearing) / (111195 * math.cos(math.radians(lat)))
+        other = (lat + dlat, (lng + dlng + 180) % 360 - 180)
+        if geohash.distance_m(lat, lng, *other) <= radius:
+            assert geohash.encode(*other, geohash.SEARCH_PRECISION) in cells
+
+
+def test_covering_cells_falls_back_for_large_radius_or_poles():
+    assert geohash.covering_cells(3.1, 101.7, 5000) is None
+    assert geohash.covering_cells(89.999, 0.0, 10) is None
+
+
+def test_distance_m():
+    assert geohash.distance_m(0, 0, 0, 0) == 0
+    # One degree of latitude is ~111.2km
+    assert abs(geohash.distance_m(0, 0, 1, 0) - 111195) < 1
@@ -0,0 +1,41 @@
+import orjson
+from bson import ObjectId
+
+from app.utils.responses import iter_json_envelope
+
+
+def test_envelope_round_trips():
+    oid = ObjectId()
+    body = b"".join(iter_json_envelope(
+        "items",
+        [{"_id": oid, "n": 1}, {"n": 2}],
+        fields={"status": "success"},
+        count_key="count"
+    ))
+    assert orjson.loads(body) == {
+        "status": "success",
+        "items": [{"_id": str(oid), "n": 1}, {"n": 2}],
+        "count": 2,
+    }
+
+
+def test_empty_items_without_count():
+    assert orjson.loads(b"".join(iter_json_envelope("items", []))) == {"items": []}
+
+
+def test_streams_one_item_at_a_time():
+    consumed = []
+
+    def items():
+        for n in range(3):
+            consumed.append(n)
+            yield {"n": n}
+
+    chunks = iter_json_envelope("items", items(), count_key="count")
+    assert next(chunks) == b'{"items":['
+    assert consumed == []
+    assert next(chunks) == b'{"n":0}'
+    assert next(chunks) == b',{"n":1}'
+    assert consumed == [0, 1]
+    rest = b"".join(chunks)
+    assert rest == b',{"n":2}],"count":3}'
@@ -0,0 +1,41 @@
+from app.services.semantic_cache import SemanticCache
+from app.utils import cache as cache_module
+
+
+def test_normalize_ignores_case_punctuation_and_spacing():
+    assert SemanticCache.normalize("  How do I add a Vehicle?! ") == "how do i add a vehicle"
+    assert SemanticCache.normalize("how   do\ti add\na vehicle") == "how do i add a vehicle"
+    assert SemanticCache.normalize("What's the cost?") == "whats the cost"
+    assert SemanticCache.normalize("?!") == ""
+
+
+def test_reworded_query_hits_the_same_entry():
+    cache = SemanticCache()
+    result = {"answer": "Use the Add Vehicle button", "is_grounded": True}
+    cache.set("How do I add a vehicle?", result)
+    assert cache.get("how do i add a vehicle") == result
+    assert cache.get("how do I remove a vehicle") is None
+
+
+def test_ungrounded_answers_are_not_cached():
+    cache = SemanticCache()
+    cache.set("q", {"answer": "guess", "is_grounded": False})
+    cache.set("r", {"answer": "guess"})
+    assert cache.get("q") is None
+    assert cache.get("r") is None
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = SemanticCache(ttl=10)
+    cache.set("q", {"is_grounded": True})
+    now[0] += 10
+    assert cache.get("q") is None
+
+
+def test_clear():
+    cache = SemanticCache()
+    cache.set("q", {"is_grounded": True})
+    cache.clear()
+    assert cache.get("q") is None
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from app.models.vehicle_position import VehiclePosition
+from app.utils import geohash
+from fake_mongo import FakeAsyncCollection
+
+VEHICLE = str(ObjectId())
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def model():
+    db = {
+        "VehiclePositions": FakeAsyncCollection(),
+        "VehiclePositionsArchive": FakeAsyncCollection(),
+        "VehicleLatestPositions": FakeAsyncCollection(unique=("vehicleId",)),
+    }
+    return VehiclePosition(db)
+
+
+def _position(timestamp, latitude=3.1, longitude=101.7, vehicle_id=VEHICLE, speed=10):
+    doc = VehiclePosition.build_position_doc(vehicle_id, latitude, longitude, speed=speed)
+    doc["timestamp"] = timestamp
+    return doc
+
+
+def _latest(model, vehicle_id=VEHICLE):
+    return next(d for d in model.latest.docs if d["vehicleId"] == ObjectId(vehicle_id))
+
+
+def test_newer_position_replaces_latest(model):
+    asyncio.run(model.insert_positions([_position(T0, speed=10)]))
+    asyncio.run(model.insert_positions([_position(T0 + timedelta(seconds=5), latitude=3.2, speed=20)]))
+    latest = _latest(model)
+    assert latest["timestamp"] == T0 + timedelta(seconds=5)
+    assert latest["speed"] == 20
+    assert latest["geohash7"] == geohash.encode(3.2, 101.7)
+    assert len(model.latest.docs) == 1
+
+
+def test_older_position_does_not_overwrite_latest(model):
+    asyncio.run(model.insert_positions([_position(T0, speed=10)]))
+    asyncio.run(model.insert_positions([_position(T0 - timedelta(seconds=5), latitude=3.2, speed=99)]))
+    latest = _latest(model)
+    assert latest["timestamp"] == T0
+    assert latest["speed"] == 10
+    assert latest["location"]["coordinates"] == [101.7, 3.1]
+    # The late position is still kept in history
+    assert len(model.collection.docs) == 2
+
+
+def test_newest_in_batch_wins_regardless_of_order(model):
+    batch = [
+        _position(T0 + timedelta(seconds=2), speed=2),
+        _position(T0 + timedelta(seconds=3), speed=3),
+        _position(T0 + timedelta(seconds=1), speed=1),
+    ]
+    asyncio.run(model.insert_positions(batch))
+    assert _latest(model)["speed"] == 3
+
+
+def test_history_failure_still_updates_latest_and_archive(model):
+    async def broken_insert_many(documents, ordered=True):
+        raise RuntimeError("history write failed")
+
+    model.collection.insert_many = broken_insert_many
+    with pytest.raises(RuntimeError):
+        asyncio.run(model.insert_positions([_position(T0)]))
+    assert _latest(model)["timestamp"] == T0
+    assert len(model.archive.docs) == 1
+
+
+def test_migrate_latest_geohashes(model):
+    oid = ObjectId()
+    model.latest.docs.append({
+        "_id": ObjectId(), "vehicleId": oid, "timestamp": T0,
+        "location": {"type": "Point", "coordinates": [101.7, 3.1]},
+    })
+    assert model.geohash_ready is False
+    asyncio.run(model.migrate_latest_geohashes())
+    assert model.geohash_ready is True
+    assert _latest(model, str(oid))["geohash7"] == geohash.encode(3.1, 101.7)
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import subscription as subscription_module
+from app.models.subscription import WebhookEvent
+from fake_mongo import FakeCollection
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls datetime.utcnow() inside the subscription module"""
+    state = {"now": T0}
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return state["now"]
+
+    monkeypatch.setattr(subscription_module, "datetime", FakeDatetime)
+    return state
+
+
+@pytest.fixture
+def events(monkeypatch):
+    collection = FakeCollection(unique=("event_id",))
+    monkeypatch.setattr(WebhookEvent, "get_collection", classmethod(lambda cls: collection))
+    return collection
+
+
+def _stored(events, event_id="evt_1"):
+    return next(d for d in events.docs if d["event_id"] == event_id)
+
+
+def test_new_event_is_claimed(clock, events):
+    assert WebhookEvent.record("evt_1", "invoice.paid", "{}") is True
+    doc = _stored(events)
+    assert doc["status"] == "received"
+    assert doc["attempts"] == 1
+    assert doc["claimed_at"] == T0
+
+
+def test_redelivery_while_in_flight_is_ignored(clock, events):
+    WebhookEvent.record("evt_1", "invoice.paid", "{}")
+    clock["now"] = T0 + WebhookEvent.PROCESSING_LEASE - timedelta(seconds=1)
+    assert WebhookEvent.record("evt_1", "invoice.paid", "{}") is False
+    assert _stored(events)["attempts"] == 1
+
+
+def test_processed_event_is_never_claimed_again(clock, events):
+    WebhookEvent.record("evt_1", "invoice.paid", "{}")
+    WebhookEvent.mark_processed("evt_1")
+    clock["now"] = T0 + timedelta(days=1)
+    assert WebhookEvent.record("evt_1", "invoice.paid", "{}") is False
+    assert WebhookEvent.find_unfinished() == []
+
+
+def test_stale_received_event_is_taken_over(clock, events):
+    WebhookEvent.record("evt_1", "invoice.paid", "{}")
+    later = T0 + WebhookEvent.PROCESSING_LEASE + timedelta(seconds=1)
+    clock["now"] = later
+    assert WebhookEvent.record("evt_1", "invoice.paid", "{}") is True
+    doc = _stored(events)
+    assert doc["attempts"] == 2
+    assert doc["claimed_at"] == later
+    # The new claim starts a fresh lease
+    assert WebhookEvent.record("evt_1", "invoice.paid", "{}") is False
+
+
+def test_failed_event_is_retried_until_max_attempts(clock, events):
+    WebhookEvent.record("evt_1", "invoice.paid", "{}")
+    for attempt in range(2, WebhookEvent.MAX_ATTEMPTS + 1):
+        WebhookEvent.mark_processed("evt_1", error="boom")
+        claimed = WebhookEvent.claim("evt_1")
+        assert claimed is not None
+        assert claimed["attempts"] == attempt
+        assert claimed["error"] is None
+    WebhookEvent.mark_processed("evt_1", error="boom")
+    assert WebhookEvent.claim("evt_1") is None
+    assert WebhookEvent.record("evt_1", "invoice.paid", "{}") is False
+
+
+def test_legacy_row_without_claimed_at_is_claimable(clock, events):
+    events.insert_one({"event_id": "evt_old", "status": "received", "payload": "{}"})
+    claimed = WebhookEvent.claim("evt_old")
+    assert claimed["attempts"] == 1
+    assert claimed["claimed_at"] == T0
+
+
+def test_find_unfinished_lists_failed_and_stale_events(clock, events):
+    for event_id in ("evt_failed", "evt_stale", "evt_done", "evt_fresh"):
+        WebhookEvent.record(event_id, "invoice.paid", "{}")
+    WebhookEvent.mark_processed("evt_failed", error="boom")
+    WebhookEvent.mark_processed("evt_done")
+    clock["now"] = T0 + WebhookEvent.PROCESSING_LEASE + timedelta(seconds=1)
+    WebhookEvent.claim("evt_fresh")  # reclaimed now, so in flight again
+
+    unfinished = {row["event_id"] for row in WebhookEvent.find_unfinished()}
+    assert unfinished == {"evt_failed", "evt_stale"}